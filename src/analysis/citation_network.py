@@ -1,6 +1,7 @@
 from models.paper import Paper
 from analysis.journal_metrics import JournalRanker
 from analysis.openalex import OpenAlexClient
+from analysis.doi_resolver import get_doi_resolver
 
 class CitationProcessor:
     """
@@ -12,6 +13,7 @@ class CitationProcessor:
         """
         self.journal_ranker = JournalRanker(csv_path=journal_csv_path)
         self.openalex_client = OpenAlexClient()
+        self.doi_resolver = get_doi_resolver()
         self.network = {} # Using a dictionary to store Paper objects, keyed by DOI
 
     def _get_or_create_paper(self, doi):
@@ -30,15 +32,17 @@ class CitationProcessor:
         print("Starting citation network expansion using OpenAlex...")
         
         # Pre-process seed papers: resolve DOIs from Titles if missing
-        for paper in seed_papers:
-            if not paper.DOI and paper.title:
-                print(f"  Resolving DOI for: {paper.title[:50]}...")
-                doi = self.openalex_client.get_doi_from_title(paper.title)
+        unresolved = [p for p in seed_papers if not p.DOI and p.title]
+        if unresolved:
+            print(f"  Resolving DOIs for {len(unresolved)} seed papers...")
+            found = self.doi_resolver.resolve_many([p.title for p in unresolved])
+            for paper in unresolved:
+                doi = found.get(paper.title)
                 if doi:
                     paper.DOI = doi
-                    print(f"    -> Found: {doi}")
+                    print(f"    -> {paper.title[:50]}: {doi}")
                 else:
-                    print("    -> No match found.")
+                    print(f"    -> {paper.title[:50]}: no match found.")
 
         seed_dois = [p.DOI for p in seed_papers if p.DOI]
         if not seed_dois:
@@ -0,0 +1,108 @@
+import logging
+import threading
+import concurrent.futures
+from utils import http_client
+from core.merge_index import normalize_title
+
+
+class DOIResolver:
+    """
+    Shared title -> DOI lookup service backed by OpenAlex title search.
+
+    Lookups run concurrently on a small thread pool; the shared api.openalex.org rate
+    limiter in utils.rate_limit keeps the whole pool inside the polite pool. Results, including
+    misses, are cached by normalized title for the life of the process, so the aggregator
+    and the citation network never ask twice for the same title. Request errors are not
+    cached, a later call will retry them.
+    """
+    BASE_URL = "https://api.openalex.org/works"
+
+    def __init__(self, email="pypaperbot@example.com", max_workers=8, timeout=10):
+        self.email = email
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.cache = {}  # normalized title -> DOI or None (confirmed miss)
+
+    def _lookup(self, title):
+        """
+        Queries OpenAlex for a single title.
+        Returns (doi_or_None, ok) where ok is False on request errors.
+        """
+        # Commas separate filters in OpenAlex syntax
+        params = {
+            'filter': f'title.search:{title.replace(",", " ")}',
+            'per-page': 1,
+            'mailto': self.email,
+            'select': 'doi,title'
+        }
+        try:
+            resp = http_client.get(self.BASE_URL, params=params, timeout=self.timeout)
+            if resp.status_code != 200:
+                return None, False
+            results = resp.json().get('results', [])
+            if results and results[0].get('doi'):
+                return results[0]['doi'].replace('https://doi.org/', ''), True
+            return None, True
+        except Exception as e:
+            logging.debug(f"DOI lookup failed for '{title[:50]}': {e}")
+            return None, False
+
+    def resolve(self, title):
+        """Resolves a single title to a DOI (or None)."""
+        return self.resolve_many([title]).get(title)
+
+    def resolve_many(self, titles, progress=None):
+        """
+        Resolves a batch of titles concurrently.
+
+        Args:
+            titles (list): Paper titles.
+            progress (callable, optional): Called as progress(done, total) after each lookup.
+
+        Returns:
+            dict: title -> DOI (or None if no match was found).
+        """
+        results = {}
+        pending = {}  # normalized title -> first original title
+        for title in titles:
+            if not title:
+                continue
+            norm = normalize_title(title)
+            if not norm:
+                continue
+            if norm in self.cache:
+                results[title] = self.cache[norm]
+            else:
+                pending.setdefault(norm, title)
+
+        if pending:
+            total = len(pending)
+            done = 0
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self._lookup, title): norm for norm, title in pending.items()}
+                for future in concurrent.futures.as_completed(futures):
+                    norm = futures[future]
+                    doi, ok = future.result()
+                    if ok:
+                        self.cache[norm] = doi
+                    done += 1
+                    if progress:
+                        progress(done, total)
+
+        for title in titles:
+            if title and title not in results:
+                results[title] = self.cache.get(normalize_title(title))
+        return results
+
+
+_default_resolver = None
+_default_lock = threading.Lock()
+
+
+def get_doi_resolver():
+    """Returns the process-wide resolver shared by the aggregator and the citation network."""
+    global _default_resolver
+    with _default_lock:
+        if _default_resolver is None:
+            _default_resolver = DOIResolver()
+        return _default_resolver
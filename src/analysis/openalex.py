@@ -1,57 +1,37 @@
-import requests
-import time
+from utils import http_client
 import logging
 from urllib.parse import quote
 from collections import Counter
+from analysis.doi_resolver import get_doi_resolver
 
 
 class OpenAlexClient:
     """
     Client for the OpenAlex API to fetch paper metadata, citations, and references.
     Uses the 'Polite Pool' by providing an email and implements batching.
+    Requests go through http_client, which paces them and retries 429s.
     """
     BASE_URL = "https://api.openalex.org/works"
 
     def __init__(self, email="pypaperbot@example.com"):
         self.email = email
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': f'PyPaperBot/1.4.1 (mailto:{email})'
-        })
+        # DOIs whose batch and per-DOI lookups both failed (still throttled or erroring)
+        self.unresolved_dois = []
 
     def get_doi_from_title(self, title):
         """
         Attempts to find a DOI for a paper title using OpenAlex search.
+        Delegates to the shared, cached DOIResolver.
         """
         if not title:
             return None
-            
-        params = {
-            'search': title,
-            'per-page': 1,
-            'mailto': self.email,
-            'select': 'doi,title'
-        }
-        
-        try:
-            response = self.session.get(self.BASE_URL, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                results = data.get('results', [])
-                if results:
-                    # Simple verification: check if titles are somewhat similar?
-                    # For now, we assume the first search result is the best match.
-                    found_doi = results[0].get('doi')
-                    if found_doi:
-                        return found_doi.replace('https://doi.org/', '')
-        except Exception:
-            pass
-            
-        return None
+        return get_doi_resolver().resolve(title)
 
     def get_works_by_dois(self, dois, batch_size=50):
         """
         Fetches metadata for a list of DOIs using OpenAlex batch functionality.
+        A batch that still fails after http_client's retries falls back to per-DOI
+        lookups; DOIs that fail those too are logged and kept in self.unresolved_dois.
         
         Args:
             dois (list): List of DOI strings.
@@ -80,24 +60,47 @@ class OpenAlexClient:
             }
 
             try:
-                response = self.session.get(self.BASE_URL, params=params, timeout=30)
+                response = http_client.get(self.BASE_URL, params=params, timeout=30)
 
                 if response.status_code == 200:
                     data = response.json()
                     results = data.get('results', [])
                     for work in results:
                         yield work
-                elif response.status_code == 429:
-                    print("  [OpenAlex] Rate limit hit. Sleeping for 2 seconds...")
-                    time.sleep(2)
-                else:
-                    print(f"  [OpenAlex] Error {response.status_code}")
+                    continue
+                print(f"  [OpenAlex] Error {response.status_code}, looking up {len(batch)} DOIs one by one")
 
             except Exception as e:
-                print(f"  [OpenAlex] Request failed: {e}")
-
-            # Polite delay between batches
-            time.sleep(0.2)
+                print(f"  [OpenAlex] Request failed: {e}, looking up {len(batch)} DOIs one by one")
+
+            unresolved = []
+            for doi in batch:
+                work, ok = self.get_work_by_doi(doi)
+                if work:
+                    yield work
+                elif not ok:
+                    unresolved.append(doi)
+            if unresolved:
+                logging.warning(f"OpenAlex: could not fetch {len(unresolved)} DOIs: {', '.join(unresolved)}")
+                self.unresolved_dois.extend(unresolved)
+
+    def get_work_by_doi(self, doi):
+        """
+        Fetches a single work by DOI.
+        Returns (work_or_None, ok) where ok is False on request errors; a 404 is a confirmed miss.
+        """
+        params = {
+            'mailto': self.email,
+            'select': 'id,doi,title,publication_year,primary_location,authorships,cited_by_count,referenced_works,best_oa_location'
+        }
+        try:
+            response = http_client.get(f"{self.BASE_URL}/https://doi.org/{doi}", params=params, timeout=30)
+            if response.status_code == 200:
+                return response.json(), True
+            return None, response.status_code == 404
+        except Exception as e:
+            logging.debug(f"OpenAlex lookup failed for {doi}: {e}")
+            return None, False
 
     def get_citations_and_references(self, seed_dois):
         """
@@ -156,7 +159,7 @@ class OpenAlexClient:
                 }
 
                 try:
-                    response = self.session.get(self.BASE_URL, params=params, timeout=30)
+                    response = http_client.get(self.BASE_URL, params=params, timeout=30)
                     if response.status_code == 200:
                         data = response.json()
                         for work in data.get('results', []):
@@ -187,10 +190,9 @@ class OpenAlexClient:
             }
 
             try:
-                response = self.session.get(self.BASE_URL, params=params, timeout=30)
+                response = http_client.get(self.BASE_URL, params=params, timeout=30)
                 if response.status_code == 200:
                     for work in response.json().get('results', []):
                         yield work
             except Exception:
                 pass
-            time.sleep(0.2)
@@ -2,7 +2,7 @@ import pandas as pd
 import os
 import json
 import math
-import requests
+from utils import http_client
 import logging
 import time
 import concurrent.futures
@@ -15,6 +15,7 @@ class RankingEngine:
         self.presets = self._load_presets(presets_path)
         self.current_year = datetime.now().year
         self.author_cache = {} # Cache author H-indices to save API calls
+        self._author_inflight = set() # Authors with a lookup already scheduled
 
     def _load_presets(self, path):
         if os.path.exists(path):
@@ -26,41 +27,49 @@ class RankingEngine:
         """
         Process a list of papers: prefetch author metrics in parallel, then calculate scores.
         """
-        # 1. Identify authors to fetch
-        authors_to_fetch = set()
-        for p in papers:
-            if not p.authors: continue
-            first_author = p.authors.split(',')[0].strip()
-            if first_author and first_author not in self.author_cache:
-                authors_to_fetch.add(first_author)
-        
-        # 2. Prefetch in parallel
-        if authors_to_fetch:
-            print(f"Fetching metrics for {len(authors_to_fetch)} authors...")
-            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-                future_to_author = {executor.submit(self._fetch_author_h_index, author): author for author in authors_to_fetch}
-                
+        # 1. Prefetch in parallel
+        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+            future_to_author = self.prefetch_author_metrics(papers, executor)
+            if future_to_author:
+                print(f"Fetching metrics for {len(future_to_author)} authors...")
                 completed = 0
-                total = len(authors_to_fetch)
-                
+                total = len(future_to_author)
                 for future in concurrent.futures.as_completed(future_to_author):
-                    author = future_to_author[future]
-                    try:
-                        h_index = future.result()
-                        self.author_cache[author] = h_index
-                    except Exception as e:
-                        logging.warning(f"Error fetching author {author}: {e}")
-                        self.author_cache[author] = 0
-                    
                     completed += 1
                     if completed % 5 == 0:
                         print(f"  Progress: {completed}/{total} authors processed...", end='\r')
-            print(f"  Done.                               ")
+                print(f"  Done.                               ")
 
-        # 3. Calculate scores
+        # 2. Calculate scores
         for p in papers:
             self.calculate_score(p, preset_name)
 
+    def prefetch_author_metrics(self, papers, executor):
+        """
+        Schedules H-index lookups for first authors not yet cached or in flight.
+        Results land in self.author_cache; returns {future: author} for the new lookups.
+        Lets callers warm the cache while papers are still streaming in.
+        """
+        future_to_author = {}
+        for p in papers:
+            if not p.authors: continue
+            first_author = p.authors.split(',')[0].strip()
+            if not first_author or first_author in self.author_cache or first_author in self._author_inflight:
+                continue
+            self._author_inflight.add(first_author)
+            future = executor.submit(self._fetch_and_cache_author, first_author)
+            future_to_author[future] = first_author
+        return future_to_author
+
+    def _fetch_and_cache_author(self, author):
+        try:
+            self.author_cache[author] = self._fetch_author_h_index(author)
+        except Exception as e:
+            logging.warning(f"Error fetching author {author}: {e}")
+            self.author_cache[author] = 0
+        finally:
+            self._author_inflight.discard(author)
+
     def calculate_score(self, paper, preset_name='general'):
         config = self.presets.get(preset_name, self.presets.get('general'))
         weights = config.get('weights', {})
@@ -198,7 +207,7 @@ class RankingEngine:
         try:
             # Respect rate limits (naive check)
             # time.sleep(0.1) # Removed sleep for parallel execution
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params, timeout=10)
             if response.status_code == 200:
                 results = response.json().get('results', [])
                 if results:
@@ -1,96 +1,245 @@
 import logging
-from typing import Dict
+from typing import Dict, Iterator, List, Optional, Tuple
 import time
+import queue
+import threading
 from models.paper import Paper
-from sources.google_scholar import GoogleScholarSource
-from sources.openalex import OpenAlexSource
-from sources.semanticscholar import SemanticScholarSource
-from sources.arxiv import ArxivSource
-from sources.pubmed import PubMedSource
-from sources.core import CoreSource
+from analysis.doi_resolver import get_doi_resolver
+from core.merge_index import MergeIndex, normalize_title, normalize_doi
+from core.source_stats import SourceStats, RUN, SKIP, RETRY, PROBE, DEPRIORITIZE
+from sources import registry
+
+
+def __getattr__(name):
+    # Lazy re-export of the source classes (e.g. `from core.aggregator import ArxivSource`)
+    for source_name, (_, class_name, _) in registry.SOURCES.items():
+        if class_name == name:
+            return registry.get_source_class(source_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class Aggregator:
-    def __init__(self):
-        # Initialize all sources
-        self.sources = [
-            GoogleScholarSource(headless=False), # Explicitly non-headless
-            OpenAlexSource(),
-            SemanticScholarSource(),
-            ArxivSource(),
-            PubMedSource(),
-            CoreSource()
-        ]
-    
+    # Default deadlines in seconds. Google Scholar launches a browser, so it gets more time.
+    DEFAULT_SOURCE_TIMEOUT = 30
+    DEFAULT_TOTAL_TIMEOUT = 120
+    SOURCE_TIMEOUTS = {
+        'google_scholar': 90,
+    }
+    # Result pages buffered between source threads and the merge loop; bounds memory on deep harvests
+    MAX_BUFFERED_PAGES = 8
+
+    def __init__(self, source_timeout: Optional[float] = None, total_timeout: Optional[float] = None,
+                 source_timeouts: Optional[Dict[str, float]] = None,
+                 source_limits: Optional[Dict[str, int]] = None,
+                 sources: Optional[List[str]] = None,
+                 stats: Optional[SourceStats] = None, time_budget: Optional[float] = None):
+        # Only the selected sources (all of them if None) are imported and built
+        self.sources = registry.create_sources(sources)
+        self.source_timeout = source_timeout or self.DEFAULT_SOURCE_TIMEOUT
+        self.total_timeout = time_budget or total_timeout or self.DEFAULT_TOTAL_TIMEOUT
+        self.source_timeouts = dict(self.SOURCE_TIMEOUTS)
+        if source_timeouts:
+            self.source_timeouts.update(source_timeouts)
+        # Per-source result caps overriding limit_per_source (e.g. a deep OpenAlex harvest)
+        self.source_limits = dict(source_limits or {})
+        # Latency/yield statistics recorded after each search; with a time budget they also
+        # drive scheduling (skip, shorter deadline or a second attempt per source)
+        self.stats = stats
+        self.time_budget = time_budget
+        self.schedule = {}
+
+        self.doi_resolver = get_doi_resolver()
+
+        # Merged papers and per-source outcome ('ok', 'error', 'timeout' or 'skipped') of the last search
+        self.results = MergeIndex()
+        self.source_status = {}
+        self.partial_sources = []
+
+    def _get_source_timeout(self, source):
+        """Per-source deadline, never longer than the overall deadline."""
+        timeout = self.source_timeouts.get(source.name, self.source_timeout)
+        return min(timeout, self.total_timeout)
+
     def search_all(self, query: str, limit_per_source: int = 10) -> Dict[str, Paper]:
         """
-        Queries all sources, merges results by DOI/Title, and returns a unified dict.
+        Queries all sources concurrently, merges results by DOI/Title, and returns a unified dict.
+        Sources that miss their deadline are skipped and listed in self.partial_sources.
         """
-        all_papers = {}
-        
-        for source in self.sources:
+        for _ in self.iter_search(query, limit_per_source):
+            pass
+        return self.results.papers
+
+    def iter_search(self, query: str, limit_per_source: int = 10) -> Iterator[Tuple[str, List[Paper]]]:
+        """
+        Streaming variant of search_all.
+
+        Yields (source_name, papers) for each result page a source returns, where papers are
+        the merged Paper objects that page added or updated. Sources that page deeply
+        (OpenAlex harvests) yield several batches. Merged papers are shared objects, so a
+        paper yielded early picks up later updates in place. After the fan-out, a final
+        ('doi_rescue', papers) batch carries the papers whose DOI was rescued.
+        The merged map is available as self.results while iterating.
+        """
+        self.results = MergeIndex()
+        self.source_status = {}
+        self.partial_sources = []
+
+        self.schedule = {}
+        if self.stats and self.time_budget:
+            self.schedule = self.stats.plan([s.name for s in self.sources], self.time_budget)
+
+        start = time.monotonic()
+        pages = queue.Queue(maxsize=self.MAX_BUFFERED_PAGES)
+        stop = threading.Event()
+        running = {}
+        deadlines = {}
+        scheduled = {}  # name -> (decision, seconds) the source was given
+        finished = {}  # name -> seconds until the source finished or was abandoned
+        returned = {}
+        # Deprioritized and probed sources start last so they do not hold up the rate limiters
+        ordered = sorted(self.sources, key=lambda s: self.schedule.get(s.name, (RUN,))[0] in (DEPRIORITIZE, PROBE))
+        for source in ordered:
+            decision, budget = self.schedule.get(source.name, (RUN, None))
+            if decision == SKIP:
+                logging.info(f"Skipping {source.name}: too slow or unreliable for the time budget.")
+                self.source_status[source.name] = 'skipped'
+                continue
+            limit = self.source_limits.get(source.name, limit_per_source)
+            timeout = self._get_source_timeout(source)
+            if budget is not None:
+                timeout = min(timeout, budget)
+            running[source.name] = source
+            returned[source.name] = 0
+            deadlines[source.name] = start + timeout
+            scheduled[source.name] = (decision, timeout)
+            if decision == PROBE:
+                logging.info(f"Probing {source.name} again after it was skipped.")
+            attempts = 2 if decision == RETRY else 1
+            # Daemon threads: a hung source must not keep the process alive after its deadline
+            threading.Thread(target=self._run_source, args=(source, query, limit, pages, stop, attempts),
+                             daemon=True).start()
+
+        try:
+            while running:
+                wait_for = max(0, min(deadlines[name] for name in running) - time.monotonic())
+                try:
+                    name, kind, payload = pages.get(timeout=wait_for)
+                except queue.Empty:
+                    name, kind, payload = None, None, None
+
+                # Messages from sources that already timed out are dropped
+                if name in running:
+                    source = running[name]
+                    if kind == 'page':
+                        returned[name] += len(payload)
+                        merged = [self._merge_paper(self.results, p) for p in payload]
+                        yield name, merged
+                    elif kind == 'done':
+                        del running[name]
+                        finished[name] = time.monotonic() - start
+                        self.source_status[name] = 'ok'
+                    else:
+                        # Catch-all for any source failure to ensure graceful degradation
+                        del running[name]
+                        finished[name] = time.monotonic() - start
+                        logging.error(f"Source {type(source).__name__} failed unexpectedly: {payload}")
+                        self.source_status[name] = 'error'
+
+                # Give up on sources past their deadline. Pages they already delivered stay merged.
+                now = time.monotonic()
+                for name in list(running):
+                    if now >= deadlines[name]:
+                        source = running.pop(name)
+                        finished[name] = now - start
+                        decision, timeout = scheduled[name]
+                        logging.warning(f"Source {type(source).__name__} missed its deadline "
+                                        f"({timeout:.1f}s, scheduled as {decision}), continuing without it.")
+                        self.source_status[name] = 'timeout'
+                        self.partial_sources.append(name)
+        finally:
+            stop.set()
+
+        if self.partial_sources:
+            logging.warning(f"Partial results: no answer from {', '.join(self.partial_sources)}.")
+        logging.info(f"Source fan-out finished in {time.monotonic() - start:.1f}s.")
+        if self.stats:
+            self._record_stats(finished, returned)
+
+        # After initial merge, try to rescue missing DOIs
+        rescued = self._rescue_missing_dois(self.results)
+        if rescued:
+            yield 'doi_rescue', rescued
+
+    def _record_stats(self, finished, returned):
+        """Records latency, outcome and unique yield of every source that ran, then saves."""
+        unique = dict.fromkeys(finished, 0)
+        for paper in self.results.values():
+            if len(paper.sources) == 1:
+                only = next(iter(paper.sources))
+                if only in unique:
+                    unique[only] += 1
+        for name, latency in finished.items():
+            self.stats.record(name, self.source_status[name], latency, returned.get(name, 0), unique[name])
+        try:
+            self.stats.save()
+        except OSError as e:
+            logging.warning(f"Could not save source stats: {e}")
+
+    def _run_source(self, source, query, limit, pages, stop, attempts=1):
+        """
+        Worker thread: pushes each result page of one source onto the merge queue.
+        Sources planned as RETRY get `attempts` sequential tries; pages from a failed try are
+        merged idempotently.
+        """
+        for attempt in range(attempts):
             try:
-                papers = source.search(query, limit_per_source)
-                for p in papers:
-                    self._merge_paper(all_papers, p)
+                for papers in source.iter_pages(query, limit):
+                    if not self._put(pages, (source.name, 'page', papers), stop):
+                        return
+                self._put(pages, (source.name, 'done', None), stop)
+                return
             except Exception as e:
-                # Catch-all for any source failure to ensure graceful degradation
-                logging.error(f"Source {type(source).__name__} failed unexpectedly: {e}")
+                if attempt + 1 < attempts and not stop.is_set():
+                    logging.info(f"{source.name} failed ({e}), retrying once.")
+                    continue
+                self._put(pages, (source.name, 'error', e), stop)
+
+    @staticmethod
+    def _put(pages, item, stop):
+        """Blocking put that gives up once the search has finished or been abandoned."""
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.5)
+                return True
+            except queue.Full:
                 continue
-                
-        # After initial merge, try to rescue missing DOIs
-        self._rescue_missing_dois(all_papers)
-        
-        return all_papers
+        return False
 
-    def _merge_paper(self, unique_papers: Dict[str, Paper], new_paper: Paper):
+    def _merge_paper(self, unique_papers: MergeIndex, new_paper: Paper) -> Paper:
         """
-        Smart merge: uses DOI if available, otherwise normalized title.
+        Smart merge: matches on DOI, arXiv ID, OpenAlex ID, then normalized title.
         Updates existing paper with new info (e.g. if OpenAlex has DOI but Scholar didn't).
+        Returns the merged paper held by the index.
         """
-        # 1. Try to find by DOI
-        if new_paper.DOI:
-            if new_paper.DOI in unique_papers:
-                existing = unique_papers[new_paper.DOI]
-                self._update_existing(existing, new_paper)
-                return
-            
-        # 2. Try to find by Title (Normalized)
-        norm_title = self._normalize_title(new_paper.title)
-        
-        # Check if any existing paper matches this title
-        title_matched_key = None
-        for key, existing in unique_papers.items():
-            if self._normalize_title(existing.title) == norm_title:
-                title_matched_key = key
-                break
-        
-        if title_matched_key:
-            existing = unique_papers[title_matched_key]
-            self._update_existing(existing, new_paper)
-            
-            # Critical: If the NEW paper has a DOI but the EXISTING key was a Title,
-            # we should migrate the entry to the DOI key.
-            if new_paper.DOI and not existing.DOI:
-                existing.DOI = new_paper.DOI
-                del unique_papers[title_matched_key]
-                unique_papers[new_paper.DOI] = existing
-            elif new_paper.DOI and existing.DOI and new_paper.DOI != existing.DOI:
-                # Edge case: different DOIs for same title? Keep existing but log warning.
-                pass
-            elif not existing.DOI and new_paper.DOI:
-                 # Existing has no DOI, new has DOI. Update existing object with DOI.
-                 existing.DOI = new_paper.DOI
-                 # Re-key
-                 del unique_papers[title_matched_key]
-                 unique_papers[new_paper.DOI] = existing
-            return
-
-        # 3. If new, add it
-        key = new_paper.DOI if new_paper.DOI else norm_title
-        unique_papers[key] = new_paper
+        norm_title = normalize_title(new_paper.title)
+        existing = unique_papers.find(new_paper, norm_title)
+
+        if existing is None:
+            unique_papers.add(new_paper, norm_title)
+            return new_paper
+
+        had_doi = bool(existing.DOI)
+        self._update_existing(existing, new_paper)
+        unique_papers.reindex(existing)
+
+        # Critical: If the NEW paper brought a DOI but the EXISTING key was a Title,
+        # we should migrate the entry to the DOI key.
+        # (Different DOIs for the same title: keep the existing one.)
+        if existing.DOI and not had_doi:
+            unique_papers.rekey(existing, existing.DOI)
+        return existing
 
     def _update_existing(self, existing: Paper, new: Paper):
         """Merges metadata from 'new' into 'existing'."""
@@ -117,58 +266,50 @@ class Aggregator:
         if new.openalex_id: existing.openalex_id = new.openalex_id
         if new.semantic_scholar_id: existing.semantic_scholar_id = new.semantic_scholar_id
         if new.arxiv_id: existing.arxiv_id = new.arxiv_id
+        if new.pmid: existing.pmid = new.pmid
 
-    def _rescue_missing_dois(self, papers_map: Dict[str, Paper]):
+    def _rescue_missing_dois(self, papers_map: MergeIndex) -> List[Paper]:
         """
-        Iterates through papers without DOIs and tries to find them via OpenAlex title search.
-        Updates the map in place (re-keying if necessary).
+        Looks up papers without DOIs via the shared OpenAlex title resolver (batched, concurrent).
+        Updates the map in place (re-keying if necessary) and returns the rescued papers.
         """
-        keys_to_update = []
-        
-        # Find papers needing rescue
-        for key, p in papers_map.items():
-            if not p.DOI and p.title:
-                keys_to_update.append(key)
-        
-        if not keys_to_update:
-            return
+        to_rescue = [p for p in papers_map.values() if not p.DOI and p.title]
+        if not to_rescue:
+            return []
 
-        logging.info(f"Attempting DOI rescue for {len(keys_to_update)} papers...")
-        
-        # Use OpenAlex source helper
-        oa_source = None
-        for s in self.sources:
-            if isinstance(s, OpenAlexSource):
-                oa_source = s
-                break
-        
-        if not oa_source: return
+        logging.info(f"Attempting DOI rescue for {len(to_rescue)} papers...")
 
-        count = 0
-        processed = 0
-        total = len(keys_to_update)
-        
-        for key in keys_to_update:
-            processed += 1
-            print(f"  DOI Rescue: {processed}/{total}...", end='\r')
-            
-            p = papers_map[key]
-            found_doi = oa_source.get_doi_from_title(p.title)
-            
+        def progress(done, total):
+            print(f"  DOI Rescue: {done}/{total}...", end='\r')
+
+        found = self.doi_resolver.resolve_many([p.title for p in to_rescue], progress=progress)
+
+        rescued = []
+        for p in to_rescue:
+            found_doi = found.get(p.title)
             if found_doi:
-                p.DOI = found_doi
-                # We need to re-key this entry from Title-Key to DOI-Key
-                # to prevent duplicates if we run this again or merge later
-                del papers_map[key]
-                papers_map[found_doi] = p
-                count += 1
-                time.sleep(0.1) # Polite rate limit
-        
+                rescued.append(self._apply_rescued_doi(papers_map, p, found_doi))
+        count = len(rescued)
+
         print(f"  DOI Rescue: Done. Rescued {count} DOIs.       ")
         
         if count > 0:
             logging.info(f"Rescued {count} DOIs.")
+        return rescued
 
-    def _normalize_title(self, title):
-        if not title: return ""
-        return "".join(e for e in title if e.isalnum()).lower()
+    def _apply_rescued_doi(self, papers_map: MergeIndex, paper: Paper, doi: str) -> Paper:
+        """
+        Sets a rescued DOI and re-keys the entry from Title-Key to DOI-Key,
+        folding it into an existing entry if another source already had that DOI.
+        Returns the paper that now holds the DOI.
+        """
+        duplicate = papers_map.by_doi.get(normalize_doi(doi))
+        if duplicate is not None and duplicate is not paper:
+            papers_map.remove(paper)
+            self._update_existing(duplicate, paper)
+            papers_map.reindex(duplicate)
+            return duplicate
+        paper.DOI = doi
+        papers_map.reindex(paper)
+        papers_map.rekey(paper, doi)
+        return paper
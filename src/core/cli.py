@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import concurrent.futures
+import json
 import sys
 import os
 import io
@@ -9,16 +11,19 @@ from urllib.parse import urljoin
 
 from models.paper import Paper
 from utils.papers_filters import filterJurnals, filter_min_date
-from extractors.downloader import download_papers
-from extractors.scholar import get_scholar_papers_info
+from extractors.downloader import download_papers, warm_up_scihub, DEFAULT_WORKERS
+from extractors.pdf_store import PDFStore, LINK_MODES
 from extractors.crossref import getPapersInfoFromDOIs
 from utils.proxy import proxy
 from core.project_manager import ProjectManager
 from analysis.citation_network import CitationProcessor
 from core.filtering import FilterEngine
 from core.aggregator import Aggregator
+from core.source_stats import SourceStats
+from sources import registry
 from analysis.ranking import RankingEngine
 from utils import suppress_errors
+from utils import http_client
 
 __version__ = "2.0.0"  # AcademicArchiver
 
@@ -66,7 +71,67 @@ def _get_max_dwn_args(args):
     return max_dwn, max_dwn_type
 
 
+def _print_banner():
+    print("\n" + "=" * 80, flush=True)
+    print("  AcademicArchiver v{}".format(__version__))
+    print("  Professional Scientific Paper Downloader & Aggregator")
+    print("=" * 80)
+    print("\n Multi-source Search: Google Scholar, OpenAlex, Semantic Scholar, ArXiv, PubMed")
+    print(" Advanced Ranking: Journal SJR, Author H-Index, Citation Impact")
+    print(" Smart Filtering: Consensus detection & Evidence-based ranking\n")
+    print("=" * 80 + "\n")
+
+
+def _emit_ndjson(out, event, paper=None, **fields):
+    """Write one NDJSON record to the machine-readable output stream."""
+    record = {"event": event}
+    record.update(fields)
+    if paper is not None:
+        record.update(paper.toDict())
+    out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    out.flush()
+
+
+def stats_command(argv):
+    """`stats` subcommand: prints the recorded per-source search statistics."""
+    parser = argparse.ArgumentParser(prog='AcademicArchiver stats',
+                                     description='Show per-source latency, error rate and unique yield recorded across runs.')
+    parser.add_argument('--json', action='store_true', default=False, help='Print raw numbers as JSON')
+    parser.add_argument('--reset', action='store_true', default=False, help='Clear the recorded statistics')
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help='Also show the schedule that would be used for this budget (seconds)')
+    args = parser.parse_args(argv)
+
+    stats = SourceStats()
+    if args.reset:
+        stats.reset()
+        print(f"Source statistics cleared ({stats.path}).")
+        return
+    summary = stats.summary()
+    schedule = stats.plan(list(summary), args.time_budget) if args.time_budget else {}
+    if args.json:
+        print(json.dumps({'sources': summary, 'schedule': schedule}, indent=2))
+        return
+    if not summary:
+        print("No source statistics recorded yet.")
+        return
+
+    print(f"{'Source':<18}{'Runs':>6}{'Errors':>8}{'Timeouts':>10}{'Latency':>10}{'Returned':>10}{'Unique':>8}{'Uniq/s':>8}"
+          + ("  Schedule" if schedule else ""))
+    for name, row in sorted(summary.items(), key=lambda item: -item[1]['unique_per_second']):
+        line = (f"{name:<18}{row['runs']:>6}{row['error_rate']:>8.0%}{row['timeout_rate']:>10.0%}"
+                f"{row['recent_latency']:>9.1f}s{row['mean_returned']:>10.1f}{row['mean_unique']:>8.1f}"
+                f"{row['unique_per_second']:>8.2f}")
+        if schedule:
+            decision, deadline = schedule[name]
+            line += f"  {decision}" + (f" ({deadline:.0f}s)" if decision != 'skip' else "")
+        print(line)
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'stats':
+        return stats_command(sys.argv[2:])
+
     # Force unbuffered output for immediate feedback
     sys.stdout.reconfigure(line_buffering=True) if hasattr(sys.stdout, 'reconfigure') else None
     
@@ -80,17 +145,9 @@ def main():
     # Suppress OSError from undetected_chromedriver cleanup
     warnings.filterwarnings("ignore", category=DeprecationWarning)
 
-    print("\n" + "=" * 80, flush=True)
-    print("  AcademicArchiver v{}".format(__version__))
-    print("  Professional Scientific Paper Downloader & Aggregator")
-    print("=" * 80)
-    print("\n Multi-source Search: Google Scholar, OpenAlex, Semantic Scholar, ArXiv, PubMed")
-    print(" Advanced Ranking: Journal SJR, Author H-Index, Citation Impact")
-    print(" Smart Filtering: Consensus detection & Evidence-based ranking\n")
-    print("=" * 80 + "\n")
-    
     parser = argparse.ArgumentParser(
-        description='AcademicArchiver is a professional tool to search, rank, and download scientific papers.')
+        description='AcademicArchiver is a professional tool to search, rank, and download scientific papers.',
+        epilog='Subcommands: "stats" shows per-source search statistics recorded across runs.')
     
     # Core Arguments
     parser.add_argument('--query', type=str, default=None,
@@ -105,10 +162,22 @@ def main():
     # Search Configuration
     parser.add_argument('--preset', type=str, default='general', choices=['general', 'medicine', 'cs', 'humanities'],
                         help='Search preset for specific fields (default: general)')
+    parser.add_argument('--sources', type=str, default=None,
+                        help='Comma-separated sources to query, overriding the preset '
+                             f'(available: {", ".join(registry.available_sources())})')
     parser.add_argument('--limit', type=int, default=10,
                         help='Number of results to fetch per source (default: 10)')
     parser.add_argument('--scholar-pages', type=str, default="1",
                         help='Number of Google Scholar pages to scrape (default: 1)')
+    parser.add_argument('--harvest', type=int, default=None,
+                        help='Harvest up to N OpenAlex results with cursor paging (other sources keep --limit)')
+    parser.add_argument('--source-timeout', type=float, default=None,
+                        help='Deadline in seconds for each search source (default: 30, Google Scholar: 90)')
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help='Schedule sources for this overall budget (seconds) using recorded statistics: '
+                             'slow or unreliable sources are skipped or cut short (see the "stats" subcommand)')
+    parser.add_argument('--search-timeout', type=float, default=None,
+                        help='Overall deadline in seconds for the multi-source search (default: 120)')
     
     # Advanced Config
     parser.add_argument('--min-year', default=None, type=int, help='Minimal publication year')
@@ -116,6 +185,26 @@ def main():
                         help='Custom Sci-Hub mirror URL')
     parser.add_argument('--scihub-mode', type=str, default='auto', choices=['auto', 'http', 'selenium'],
                         help='Sci-Hub download mode (default: auto)')
+    parser.add_argument('--no-oa', action='store_true', default=False,
+                        help='Skip the open-access lookup (OpenAlex, Unpaywall, arXiv) before Sci-Hub')
+    parser.add_argument('--no-probe', action='store_true', default=False,
+                        help='Download direct links without probing them with a small ranged request first')
+    parser.add_argument('--fixed-order', action='store_true', default=False,
+                        help='Always try download sources in the default order instead of the order learned per host')
+    parser.add_argument('--retry-unavailable', action='store_true', default=False,
+                        help='Ask Sci-Hub again for papers it recently reported as unavailable')
+    parser.add_argument('--hedge-scihub', action='store_true', default=False,
+                        help='Send a request to the next Sci-Hub mirror when the current one is slower than usual, '
+                             'and keep the first PDF')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Papers downloaded in parallel (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--refresh', action='store_true', default=False,
+                        help='Re-download papers already listed in the download folder manifest')
+    parser.add_argument('--pdf-store', nargs='?', const='', default=None, metavar='DIR',
+                        help='Share PDFs across download folders through a content-addressed store '
+                             '(default location: the cache directory)')
+    parser.add_argument('--store-link', type=str, default='hardlink', choices=list(LINK_MODES),
+                        help='How store PDFs appear in the download folder (default: hardlink)')
     parser.add_argument('--headless', action='store_true', default=True,
                         help='Run Chrome in headless mode (default: True)')
     parser.add_argument('--no-headless', dest='headless', action='store_false',
@@ -124,6 +213,11 @@ def main():
                         help='Enable citation network expansion (PageRank analysis)')
     parser.add_argument('--no-interactive', action='store_true', default=False,
                         help='Skip interactive filtering and download all results')
+    parser.add_argument('--output', type=str, default='table', choices=['table', 'ndjson'],
+                        help='Output format. "ndjson" streams one JSON record per line to stdout as sources '
+                             'respond; progress messages go to stderr (default: table)')
+    parser.add_argument('--no-cache', action='store_true', default=False,
+                        help='Bypass the on-disk metadata response cache and always query the APIs')
     
     # Legacy/Compatibility Arguments (kept to prevent breaking existing scripts)
     parser.add_argument('--skip-words', type=str, default=None, help='(Legacy) Skip words in title')
@@ -141,6 +235,18 @@ def main():
 
     args = parser.parse_args()
 
+    # In NDJSON mode stdout carries only JSON records; route human-readable output to stderr
+    ndjson_out = None
+    if args.output == 'ndjson':
+        ndjson_out = sys.stdout
+        sys.stdout = sys.stderr
+    else:
+        check_version()
+        _print_banner()
+
+    if args.no_cache:
+        http_client.configure(cache=False)
+
     # Setup Directories
     dwn_dir = args.dwn_dir.replace('\\', '/')
     if dwn_dir[-1] != '/':
@@ -148,10 +254,15 @@ def main():
     if not os.path.exists(dwn_dir):
         os.makedirs(dwn_dir, exist_ok=True)
 
+    if args.scihub_mode in ('auto', 'selenium'):
+        # Get past the mirrors' DDOS-Guard while the search and ranking run
+        warm_up_scihub()
+
     # --- Phase 1: Aggregation ---
     print("\n[Phase 1] Aggregating papers from multiple sources...")
     
     papers_map = {}
+    ranking_engine = RankingEngine()
     
     # Case A: DOI List (Direct Download)
     if args.doi or args.doi_file:
@@ -170,13 +281,54 @@ def main():
             p = getPapersInfoFromDOIs(doi, args.restrict)
             if p:
                 papers_map[doi] = p
+                if ndjson_out:
+                    _emit_ndjson(ndjson_out, "update", p, source="crossref")
                 
     # Case B: Search Query (The Aggregator)
     elif args.query:
         print(f"  > Mode: Search Query '{args.query}' (Preset: {args.preset})")
-        aggregator = Aggregator()
-        # We use args.limit for per-source limit
-        papers_map = aggregator.search_all(args.query, limit_per_source=args.limit)
+        source_timeouts = {}
+        source_limits = {}
+        if args.source_timeout:
+            # An explicit deadline applies to every source, Google Scholar included
+            source_timeouts['google_scholar'] = args.source_timeout
+        if args.harvest:
+            # Deep harvests page through OpenAlex for as long as the overall deadline allows
+            source_limits['openalex'] = args.harvest
+            source_timeouts['openalex'] = args.search_timeout or Aggregator.DEFAULT_TOTAL_TIMEOUT
+        if args.sources:
+            try:
+                source_names = registry.parse_source_list(args.sources)
+            except ValueError as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+        else:
+            source_names = registry.preset_sources(args.preset)
+        if args.harvest and source_names is not None and 'openalex' not in source_names:
+            source_names.append('openalex')
+        print(f"  > Sources: {', '.join(source_names or registry.available_sources())}")
+        aggregator = Aggregator(source_timeout=args.source_timeout, total_timeout=args.search_timeout,
+                                source_timeouts=source_timeouts, source_limits=source_limits,
+                                sources=source_names, stats=SourceStats(), time_budget=args.time_budget)
+        # Consume the search as a stream: author metrics for ranking are fetched in the
+        # background while slower sources (e.g. Google Scholar) are still loading.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as author_executor:
+            # We use args.limit for per-source limit
+            for source_name, papers in aggregator.iter_search(args.query, limit_per_source=args.limit):
+                print(f"  > {source_name}: {len(papers)} papers ({len(aggregator.results)} unique so far)")
+                ranking_engine.prefetch_author_metrics(papers, author_executor)
+                if ndjson_out:
+                    for p in papers:
+                        _emit_ndjson(ndjson_out, "update", p, source=source_name)
+        papers_map = aggregator.results.papers
+        skipped = [name for name, status in aggregator.source_status.items() if status == 'skipped']
+        if skipped:
+            print(f"  > Skipped for the time budget: {', '.join(skipped)}")
+        if aggregator.partial_sources:
+            print(f"  > Partial results: timed out waiting for {', '.join(aggregator.partial_sources)}")
+        if ndjson_out:
+            _emit_ndjson(ndjson_out, "search_done", unique=len(papers_map),
+                         sources=aggregator.source_status, partial_sources=aggregator.partial_sources)
         
     else:
         print("Error: Please provide --query or --doi/--doi-file.")
@@ -187,7 +339,6 @@ def main():
 
     # --- Phase 2: Ranking ---
     print("\n[Phase 2] Ranking and Scoring...")
-    ranking_engine = RankingEngine()
     
     for p in papers_list:
         ranking_engine.calculate_score(p, preset_name=args.preset)
@@ -237,12 +388,25 @@ def main():
     # --- Phase 5: Download ---
     print("\n[Phase 5] Downloading PDFs...")
     
+    store = None
+    if args.pdf_store is not None:
+        store = PDFStore(args.pdf_store or None, link_mode=args.store_link)
+        print("Using PDF store: {}".format(store.root))
+
     download_papers(
         papers_list, 
         dwn_dir, 
         num_limit=None, 
         scihub_mode=args.scihub_mode, 
-        headless=args.headless
+        headless=args.headless,
+        workers=args.workers,
+        refresh=args.refresh,
+        store=store,
+        scihub_hedge=args.hedge_scihub,
+        retry_unavailable=args.retry_unavailable,
+        resolve_oa=not args.no_oa,
+        probe_links=not args.no_probe,
+        learn_order=not args.fixed_order
     )
 
     # --- Phase 6: Final Report ---
@@ -253,6 +417,11 @@ def main():
     Paper.generateBibtex(papers_list, os.path.join(dwn_dir, "bibtex.bib"))
     print(f"  > Report saved to: {report_path}")
 
+    if ndjson_out:
+        for rank, p in enumerate(papers_list, 1):
+            _emit_ndjson(ndjson_out, "result", p, rank=rank)
+
+    http_client.close_all()
     print("\nDone.")
 
 
@@ -261,7 +430,6 @@ if __name__ == "__main__":
     suppress_errors.install()
 
     try:
-        check_version()
         main()
     except KeyboardInterrupt:
         print("\n\n  Operation cancelled by user")
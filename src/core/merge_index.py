@@ -0,0 +1,124 @@
+from typing import Dict, Iterator, Optional
+from models.paper import Paper
+
+
+def normalize_title(title):
+    """Lowercase alphanumeric form of a title, used as the dedup key for papers without DOI."""
+    if not title: return ""
+    return "".join(e for e in title if e.isalnum()).lower()
+
+
+def normalize_doi(doi):
+    if not doi: return ""
+    return doi.strip().lower().replace('https://doi.org/', '')
+
+
+class MergeIndex:
+    """
+    Keyed store of merged papers with secondary lookup maps.
+
+    The primary map (`papers`) is keyed by DOI when known, otherwise by normalized title,
+    which is what Aggregator.search_all returns. The secondary maps point at the Paper
+    objects themselves, so re-keying an entry from its title to its DOI only touches the
+    primary map and stays O(1). Normalized titles are computed once per paper.
+    """
+
+    def __init__(self):
+        self.papers: Dict[str, Paper] = {}
+        self.by_title: Dict[str, Paper] = {}
+        self.by_doi: Dict[str, Paper] = {}
+        self.by_arxiv_id: Dict[str, Paper] = {}
+        self.by_openalex_id: Dict[str, Paper] = {}
+        # id(paper) -> current primary key / normalized title
+        self._keys: Dict[int, str] = {}
+        self._titles: Dict[int, str] = {}
+
+    def __len__(self):
+        return len(self.papers)
+
+    def __contains__(self, key):
+        return key in self.papers
+
+    def __getitem__(self, key):
+        return self.papers[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.papers)
+
+    def items(self):
+        return self.papers.items()
+
+    def values(self):
+        return self.papers.values()
+
+    def key_of(self, paper: Paper) -> Optional[str]:
+        return self._keys.get(id(paper))
+
+    def find(self, paper: Paper, norm_title: Optional[str] = None) -> Optional[Paper]:
+        """Returns the indexed paper matching by DOI, arXiv ID, OpenAlex ID or title, in that order."""
+        if paper.DOI:
+            match = self.by_doi.get(normalize_doi(paper.DOI))
+            if match is not None:
+                return match
+        if paper.arxiv_id:
+            match = self.by_arxiv_id.get(paper.arxiv_id)
+            if match is not None:
+                return match
+        if paper.openalex_id:
+            match = self.by_openalex_id.get(paper.openalex_id)
+            if match is not None:
+                return match
+        if norm_title is None:
+            norm_title = normalize_title(paper.title)
+        if norm_title:
+            return self.by_title.get(norm_title)
+        return None
+
+    def add(self, paper: Paper, norm_title: Optional[str] = None) -> str:
+        """Inserts a new paper, keyed by DOI if available, otherwise normalized title (never an empty key)."""
+        if norm_title is None:
+            norm_title = normalize_title(paper.title)
+        key = paper.DOI if paper.DOI else norm_title
+        if not key:
+            # Untitled papers without a DOI get their own key instead of all sharing ''
+            key = f"untitled:{id(paper)}"
+        self.papers[key] = paper
+        self._keys[id(paper)] = key
+        self._titles[id(paper)] = norm_title
+        self.reindex(paper)
+        return key
+
+    def reindex(self, paper: Paper):
+        """Registers the paper's current identifiers in the secondary maps (first writer wins)."""
+        norm_title = self._titles.get(id(paper))
+        if norm_title:
+            self.by_title.setdefault(norm_title, paper)
+        if paper.DOI:
+            self.by_doi.setdefault(normalize_doi(paper.DOI), paper)
+        if paper.arxiv_id:
+            self.by_arxiv_id.setdefault(paper.arxiv_id, paper)
+        if paper.openalex_id:
+            self.by_openalex_id.setdefault(paper.openalex_id, paper)
+
+    def remove(self, paper: Paper):
+        """Drops a paper from the primary map and every secondary map pointing at it."""
+        key = self._keys.pop(id(paper), None)
+        if key is not None and self.papers.get(key) is paper:
+            del self.papers[key]
+        norm_title = self._titles.pop(id(paper), None)
+        for lookup, ident in ((self.by_title, norm_title),
+                              (self.by_doi, normalize_doi(paper.DOI)),
+                              (self.by_arxiv_id, paper.arxiv_id),
+                              (self.by_openalex_id, paper.openalex_id)):
+            if ident and lookup.get(ident) is paper:
+                del lookup[ident]
+
+    def rekey(self, paper: Paper, new_key: str):
+        """Moves an indexed paper to a new primary key (e.g. from title to DOI)."""
+        old_key = self._keys.get(id(paper))
+        if old_key == new_key:
+            return
+        if old_key is not None and self.papers.get(old_key) is paper:
+            del self.papers[old_key]
+        self.papers[new_key] = paper
+        self._keys[id(paper)] = new_key
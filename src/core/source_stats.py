@@ -0,0 +1,147 @@
+"""
+Per-source search statistics persisted across runs.
+
+After every search the aggregator records, per source, how long it took, whether it
+failed or timed out, how many papers it returned and how many of those no other source
+found (unique yield). plan() turns those numbers into a schedule for a time budget:
+sources that cannot answer in time or keep failing are skipped, slow low-yield sources get
+a shorter deadline, and flaky but useful sources get a second, sequential attempt. A skipped
+source records nothing, so once REPROBE_AFTER has passed since its last run it is probed
+again; failure rates follow recent runs, so a recovered source is scheduled normally.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from utils.utils import get_cache_dir, atomic_write_json
+
+# Weight of the newest run in the latency/yield moving averages
+EWMA_ALPHA = 0.3
+# Runs needed before a source's numbers are trusted for scheduling
+MIN_RUNS = 3
+# A skipped source is given one probe run once its last run is this old (seconds)
+REPROBE_AFTER = 24 * 3600
+
+# Scheduling decisions
+RUN = 'run'
+DEPRIORITIZE = 'deprioritize'
+RETRY = 'retry'
+PROBE = 'probe'
+SKIP = 'skip'
+
+
+def _ewma(previous, value):
+    return value if previous is None else EWMA_ALPHA * value + (1 - EWMA_ALPHA) * previous
+
+
+class SourceStats:
+    FILENAME = 'source_stats.json'
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_cache_dir(), self.FILENAME)
+        self._lock = threading.Lock()
+        self.sources = self._load()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f).get('sources', {})
+            except (json.JSONDecodeError, IOError, AttributeError):
+                logging.warning(f"Could not read source stats {self.path}, starting fresh.")
+        return {}
+
+    def record(self, name, status, latency, returned=0, unique=0):
+        """
+        Records one search by one source.
+
+        Args:
+            name (str): Source name.
+            status (str): 'ok', 'error' or 'timeout'.
+            latency (float): Seconds until the source finished (or was abandoned).
+            returned (int): Papers the source returned.
+            unique (int): Papers that no other source found.
+        """
+        with self._lock:
+            entry = self.sources.setdefault(name, {
+                'runs': 0, 'errors': 0, 'timeouts': 0, 'returned': 0, 'unique': 0,
+                'total_latency': 0.0, 'latency_ewma': None, 'unique_ewma': None,
+            })
+            entry['failure_ewma'] = _ewma(entry.get('failure_ewma'), float(status != 'ok'))
+            entry['runs'] += 1
+            entry['errors'] += status == 'error'
+            entry['timeouts'] += status == 'timeout'
+            entry['returned'] += returned
+            entry['unique'] += unique
+            entry['total_latency'] += latency
+            entry['latency_ewma'] = _ewma(entry['latency_ewma'], latency)
+            entry['unique_ewma'] = _ewma(entry['unique_ewma'], unique)
+            entry['last_run'] = time.time()
+
+    def save(self):
+        with self._lock:
+            atomic_write_json(self.path, {'version': 1, 'sources': self.sources})
+
+    def reset(self):
+        with self._lock:
+            self.sources = {}
+        self.save()
+
+    def summary(self):
+        """Per-source derived numbers: runs, failure rates, latency and unique yield."""
+        rows = {}
+        for name, e in self.sources.items():
+            runs = e['runs'] or 1
+            latency = e['latency_ewma'] or 0.0
+            failure = e.get('failure_ewma')
+            if failure is None:
+                failure = (e['errors'] + e['timeouts']) / runs
+            rows[name] = {
+                'runs': e['runs'],
+                'error_rate': e['errors'] / runs,
+                'timeout_rate': e['timeouts'] / runs,
+                'recent_failure_rate': failure,
+                'mean_latency': e['total_latency'] / runs,
+                'recent_latency': latency,
+                'mean_returned': e['returned'] / runs,
+                'mean_unique': e['unique'] / runs,
+                'unique_per_second': (e['unique_ewma'] or 0.0) / latency if latency else 0.0,
+                'last_run': e.get('last_run', 0),
+            }
+        return rows
+
+    def plan(self, names, budget):
+        """
+        Schedules sources for a search with an overall time budget (seconds).
+
+        Returns {name: (decision, deadline)} where decision is RUN, DEPRIORITIZE, RETRY,
+        PROBE or SKIP. Sources with fewer than MIN_RUNS recorded runs always run with the full
+        budget; a source that would be skipped but has not run for REPROBE_AFTER is probed.
+        """
+        now = time.time()
+        summary = self.summary()
+        ranked = [summary[n]['unique_per_second'] for n in names
+                  if n in summary and summary[n]['runs'] >= MIN_RUNS]
+        median_yield = sorted(ranked)[len(ranked) // 2] if ranked else 0.0
+
+        schedule = {}
+        for name in names:
+            s = summary.get(name)
+            if s is None or s['runs'] < MIN_RUNS:
+                schedule[name] = (RUN, budget)
+                continue
+            failure_rate = s['recent_failure_rate']
+            if failure_rate >= 0.8 or s['recent_latency'] > budget:
+                if now - s['last_run'] >= REPROBE_AFTER:
+                    schedule[name] = (PROBE, budget)
+                else:
+                    schedule[name] = (SKIP, 0)
+            elif failure_rate >= 0.2 and s['mean_unique'] > 0:
+                schedule[name] = (RETRY, budget)
+            elif s['unique_per_second'] < median_yield / 4:
+                # Costly for what it adds: give it a little headroom over its usual latency
+                schedule[name] = (DEPRIORITIZE, min(budget, max(2 * s['recent_latency'], 1.0)))
+            else:
+                schedule[name] = (RUN, budget)
+        return schedule
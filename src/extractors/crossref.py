@@ -1,4 +1,4 @@
-import requests
+from utils import http_client
 from models.paper import Paper
 
 def getPapersInfoFromDOIs(DOI, restrict):
@@ -9,7 +9,7 @@ def getPapersInfoFromDOIs(DOI, restrict):
     paper = Paper(DOI=DOI)
     try:
         url = f"https://api.crossref.org/works/{DOI}"
-        r = requests.get(url, timeout=10)
+        r = http_client.get(url, timeout=10)
         if r.status_code == 200:
             data = r.json()['message']
             
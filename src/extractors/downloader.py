@@ -1,8 +1,23 @@
+import os
 from os import path
+import concurrent.futures
+import threading
+import time
 import urllib.parse
 import requests
+from utils import http_client
+from utils.concurrency import KeyedSemaphore
 from utils.net_info import NetInfo
-from extractors.scihub import SciHubClient, SciHubDownloadError
+from extractors.scihub import SciHubClient, SciHubDownloadError, start_warm_up
+from extractors.pdf_stream import PDFStream, ResumableDownload, PartialDownloads, open_resumable, write_atomic
+from extractors.manifest import DownloadManifest, paper_keys
+from extractors.negative_cache import NegativeCache, DAY
+from extractors.pdf_url_cache import PDFURLCache
+from extractors.oa_resolver import OAResolver
+from extractors.url_probe import URLProber, PDF, VERDICT_LABELS, LANDING_PAGE, PAYWALL, BROKEN
+from extractors.strategy_stats import (StrategyStats, strategy_keys, STRATEGIES, STRATEGY_LABELS, DIRECT,
+                                       OPEN_ACCESS, SCHOLAR_PDF, SCIHUB_DOI, SCIHUB_LINK, SUCCESS, NOT_AVAILABLE,
+                                       INVALID_PDF, DEFINITIVE_OUTCOMES)
 
 def safe_print(text):
     """Print text safely handling Unicode characters on Windows."""
@@ -23,6 +38,27 @@ def safe_print(text):
 
 ALLOWED_SCIHUB_MIRRORS = ["https://sci-hub.mk", "https://sci-hub.vg", "https://sci-hub.al", "https://sci-hub.shop"]
 
+# Interrupted downloads are kept here (inside the download dir) and resumed with Range requests
+PARTIAL_DIR = '.partial'
+
+# Papers downloaded in parallel, and concurrent requests allowed per publisher/repository host
+DEFAULT_WORKERS = 4
+MAX_PER_HOST = 2
+
+# Per-request timeout (seconds) of direct PDF links
+DIRECT_TIMEOUT = 15
+
+# Wall time (seconds) after which no further open-access candidate of a paper is started;
+# requests of the stage never wait past it
+OA_STAGE_TIMEOUT = 45
+
+# SciHubDownloadError reason for lookups skipped because of the negative cache
+KNOWN_MISS = 'known_miss'
+CACHED_MISS_ERROR = "Not available in Sci-Hub (cached)"
+
+# Strategy outcome of a direct link the prober rejected (other verdicts are not definitive)
+PROBE_OUTCOMES = {LANDING_PAGE: INVALID_PDF, PAYWALL: NOT_AVAILABLE, BROKEN: NOT_AVAILABLE}
+
 
 def _normalize_mirror(url):
     if not url:
@@ -53,6 +89,14 @@ def get_preferred_scihub_mirrors(custom_url=None):
     return mirrors
 
 
+def warm_up_scihub(scihub_url=None):
+    """
+    Starts the DDOS-Guard warm-up of the Sci-Hub mirrors in the background, so the download
+    phase finds their cookies ready. Returns the (daemon) thread.
+    """
+    return start_warm_up(get_preferred_scihub_mirrors(scihub_url))
+
+
 def get_save_dir(folder, fname):
     """Get a unique directory path for saving a file, handling duplicates."""
     dir_ = path.join(folder, fname)
@@ -65,9 +109,11 @@ def get_save_dir(folder, fname):
 
 
 def save_file(file_name, content, paper, dwn_source, source_label=None):
-    """Save downloaded content to a file and update paper metadata."""
-    with open(file_name, 'wb') as f:
-        f.write(content)
+    """
+    Save downloaded content (bytes or a stream of chunks, e.g. a PDFStream) to a file
+    and update paper metadata. The file appears under its final name only once complete.
+    """
+    write_atomic(file_name, content)
 
     paper.downloaded = True
     paper.downloadedFrom = dwn_source
@@ -87,18 +133,404 @@ def _format_scihub_label(mirror_url):
     return "Sci-Hub ({})".format(host)
 
 
+class DownloadSession:
+    """
+    State shared by the download workers of one download_papers() run: the Sci-Hub client,
+    per-host slots, partial downloads, the folder manifest, the optional shared PDF store,
+    the Sci-Hub negative cache, the optional direct-link prober, the optional download strategy
+    statistics and the download limit.
+    """
+
+    def __init__(self, dwnl_dir, num_limit, scihub_client=None, max_per_host=MAX_PER_HOST, refresh=False,
+                 store=None, negative_cache=None, retry_unavailable=False, prober=None, strategy_stats=None):
+        self.dwnl_dir = dwnl_dir
+        self.num_limit = num_limit
+        self.scihub_client = scihub_client
+        self.refresh = refresh
+        self.store = store
+        self.negative_cache = negative_cache
+        self.retry_unavailable = retry_unavailable
+        self.known_misses = 0
+        self.prober = prober
+        self.strategy_stats = strategy_stats
+        self.probe_skips = 0
+        self.host_slots = KeyedSemaphore(max_per_host)
+        self.partials = PartialDownloads(path.join(dwnl_dir, PARTIAL_DIR))
+        self.manifest = DownloadManifest(dwnl_dir)
+        self.num_downloaded = 0
+        self._counter_lock = threading.Lock()
+        # Serializes picking a free file name
+        self._save_lock = threading.Lock()
+        if scihub_client:
+            scihub_client.partials = self.partials
+
+    def claim_slot(self):
+        """Counts a download about to be saved; False once the limit is reached."""
+        with self._counter_lock:
+            if self.num_limit is not None and self.num_downloaded >= self.num_limit:
+                return False
+            self.num_downloaded += 1
+            return True
+
+    def release_slot(self):
+        """Gives a slot back when the body fails mid-stream."""
+        with self._counter_lock:
+            self.num_downloaded -= 1
+
+    def limit_reached(self):
+        with self._counter_lock:
+            return self.num_limit is not None and self.num_downloaded >= self.num_limit
+
+    def already_downloaded(self, p):
+        """Manifest record of a verified earlier download of `p` (None with refresh)."""
+        if self.refresh:
+            return None
+        return self.manifest.lookup(p)
+
+    def needs_fetch(self, p):
+        """False for papers that are already in the folder or can be linked from the store."""
+        if self.already_downloaded(p):
+            return False
+        return self.store is None or self.refresh or self.store.find(paper_keys(p)) is None
+
+    def _target_file(self, p):
+        """
+        File name for a paper about to be saved (call with _save_lock held): with refresh,
+        the manifest's earlier file for the paper, otherwise a free, reserved name.
+        Returns (file_name, reserved).
+        """
+        previous = self.manifest.lookup(p, verify=False) if self.refresh else None
+        if previous and path.exists(self.manifest.abspath(previous)):
+            # --refresh replaces the earlier file instead of adding "(2)title.pdf"
+            return self.manifest.abspath(previous), False
+        file_name = get_save_dir(self.dwnl_dir, p.getFileName())
+        # Reserve the name; the body streams in outside the lock
+        open(file_name, 'wb').close()
+        return file_name, True
+
+    def link_from_store(self, p):
+        """
+        Links a paper from the shared PDF store into the folder, before any network attempt.
+        The store is checked by the hash of the paper's manifest entry (its file was deleted
+        or changed) and then by identifier (DOI, arXiv, ...). Returns the source label or None.
+        """
+        if self.store is None or self.refresh:
+            return None
+        previous = self.manifest.lookup(p, verify=False)
+        if previous and self.store.has_blob(previous['sha256']):
+            found = (previous['sha256'], previous['source'])
+        else:
+            found = self.store.find(paper_keys(p))
+        if found is None or not self.claim_slot():
+            return None
+        sha256, source = found
+        with self._save_lock:
+            file_name, reserved = self._target_file(p)
+            try:
+                self.store.link(sha256, file_name)
+            except OSError:
+                self.release_slot()
+                if reserved:
+                    os.remove(file_name)
+                return None
+        p.downloaded = True
+        p.download_source = source or "PDF store"
+        self.manifest.record(p, file_name, p.download_source, sha256=sha256)
+        return p.download_source
+
+    def save(self, p, content, dwn_source, source_label):
+        """Streams `content` into the paper's file and records it in the manifest."""
+        try:
+            if not self.claim_slot():
+                return False
+            with self._save_lock:
+                file_name, reserved = self._target_file(p)
+            try:
+                save_file(file_name, content, p, dwn_source, source_label)
+            except BaseException:
+                self.release_slot()
+                if reserved:
+                    os.remove(file_name)
+                raise
+            sha256 = None
+            if self.store is not None:
+                try:
+                    sha256 = self.store.add(file_name, paper_keys(p), p.download_source)
+                    # Identical PDFs in other folders now share one blob
+                    self.store.link(sha256, file_name)
+                except OSError as e:
+                    print("Warning: could not add {} to the PDF store: {}".format(file_name, e))
+            self.manifest.record(p, file_name, p.download_source, sha256=sha256)
+            return True
+        finally:
+            if isinstance(content, (PDFStream, ResumableDownload)):
+                content.close()
+
+    def probe_links(self, papers):
+        """Probes every direct-link candidate of `papers` at once. Returns {url: verdict}."""
+        urls = []
+        for p in papers:
+            urls.append(p.pdf_link)
+            urls.extend(url for _, url in p.oa_links)
+            if p.scholar_link and p.scholar_link[-3:].lower() == "pdf":
+                urls.append(p.scholar_link)
+        return self.prober.probe_all([u for u in urls if u and not self.partials.load(u)], NetInfo.HEADERS)
+
+    def fetch_direct(self, p, url, source_label, log=None, timeout=DIRECT_TIMEOUT):
+        """
+        Downloads a direct PDF link; the host slot is held while the body streams.
+        With a prober, only links it judges to be PDFs are fetched (partial downloads
+        are always resumed). `timeout` caps the probe and every download request.
+        Returns the strategy outcome: SUCCESS, NOT_AVAILABLE, INVALID_PDF, or None when
+        the failure says nothing about the link (server error, unreachable, download
+        limit reached).
+        """
+        if self.prober is not None and not self.partials.load(url):
+            verdict = self.prober.probe(url, NetInfo.HEADERS, timeout=min(timeout, self.prober.timeout))
+            if verdict != PDF:
+                with self._counter_lock:
+                    self.probe_skips += 1
+                if log is not None:
+                    log.append("  Skipped {}: {}".format(source_label, VERDICT_LABELS[verdict]))
+                return PROBE_OUTCOMES.get(verdict)
+        statuses = []
+
+        def get(url, **kwargs):
+            response = http_client.get(url, **kwargs)
+            statuses.append(response.status_code)
+            return response
+
+        with self.host_slots.slot(urllib.parse.urlparse(url).netloc.lower()):
+            stream = open_resumable(get, url, self.partials, headers=NetInfo.HEADERS, timeout=timeout)
+            if stream is None:
+                if self.prober is not None:
+                    self.prober.forget(url)
+                return _failed_fetch_outcome(statuses[-1] if statuses else None)
+            return SUCCESS if self.save(p, stream, 3, source_label) else None
+
+    def fetch_scihub(self, p, identifier, is_doi):
+        """
+        Downloads `identifier` through Sci-Hub unless it is a cached miss (raised as a
+        SciHubDownloadError with reason KNOWN_MISS). New misses are cached by failure class.
+        Returns the mirror URL, or None if the download limit was reached.
+        """
+        if self.negative_cache is not None and not self.retry_unavailable:
+            miss = self.negative_cache.lookup(identifier, is_doi)
+            if miss:
+                with self._counter_lock:
+                    self.known_misses += 1
+                raise SciHubDownloadError("Skipped, {} as of {} (cached)".format(
+                    miss['reason'].replace('_', ' '), time.strftime('%Y-%m-%d', time.localtime(miss['at']))),
+                    reason=KNOWN_MISS)
+        try:
+            pdf_stream, source_url, mirror_url = self.scihub_client.download(identifier, is_doi=is_doi)
+        except SciHubDownloadError as e:
+            if self.negative_cache is not None:
+                self.negative_cache.record(identifier, e.reason, is_doi)
+            raise
+        if self.negative_cache is not None:
+            self.negative_cache.discard(identifier, is_doi)
+        return mirror_url if self.save(p, pdf_stream, 2, _format_scihub_label(mirror_url)) else None
+
+    def close(self):
+        self.partials.remove_if_empty()
+        if self.negative_cache is not None:
+            self.negative_cache.save()
+        if self.prober is not None:
+            self.prober.save()
+        if self.strategy_stats is not None:
+            self.strategy_stats.save()
+        try:
+            self.manifest.save()
+        except OSError as e:
+            print("Warning: could not write download manifest: {}".format(e))
+
+
+def _scihub_error(e, log):
+    """Logs a failed Sci-Hub attempt and returns its download_error."""
+    if isinstance(e, SciHubDownloadError):
+        error_msg = str(e)
+        if e.reason == KNOWN_MISS:
+            log.append("  Sci-Hub: {}".format(error_msg))
+            return CACHED_MISS_ERROR
+        if "not available" in error_msg.lower():
+            log.append("  Sci-Hub: Paper not available in database")
+            return "Not available in Sci-Hub"
+        log.append("  Sci-Hub: Download failed - {}".format(error_msg))
+        return "Sci-Hub error: " + error_msg[:50]
+    error_type = type(e).__name__
+    log.append("  Sci-Hub: Download failed ({})".format(error_type))
+    return "Sci-Hub error: " + error_type
+
+
+def _failed_fetch_outcome(status):
+    """Strategy outcome of a direct link that did not answer with a PDF (HTTP `status`)."""
+    if status is None or status in (408, 429) or status >= 500:
+        return None
+    return INVALID_PDF if status in (200, 206) else NOT_AVAILABLE
+
+
+def _scihub_outcome(e):
+    """Strategy outcome of a failed Sci-Hub lookup: only 'not available' and bad PDFs are definitive."""
+    if isinstance(e, SciHubDownloadError) and e.reason in (NOT_AVAILABLE, INVALID_PDF):
+        return e.reason
+    return None
+
+
+# Attempts return (downloaded, download_error, outcome); outcome is SUCCESS, NOT_AVAILABLE,
+# INVALID_PDF, or None for transient failures that are not recorded in the strategy stats.
+
+def _attempt_direct(p, session, log):
+    """Direct PDF link (Google Scholar or OpenAlex/Unpaywall)."""
+    source_label = "Direct Link"
+    if p.download_source == "OpenAlex/Unpaywall":
+        source_label = "OpenAlex/Unpaywall"
+    elif "scholar" in p.pdf_link:
+        source_label = "Google Scholar (direct link)"
+    try:
+        outcome = session.fetch_direct(p, p.pdf_link, source_label, log)
+    except requests.exceptions.RequestException:
+        return False, None, None
+    if outcome == SUCCESS:
+        log.append(f"  Downloaded from {source_label}")
+        return True, None, SUCCESS
+    return False, None, outcome
+
+
+def _attempt_open_access(p, session, log):
+    """
+    Open-access candidates found by OAResolver (arXiv, OpenAlex, Unpaywall), in order.
+    No new candidate is started once the stage has run for OA_STAGE_TIMEOUT seconds, and
+    each candidate's requests time out by then, so a slow host does not hold its slot past it.
+    The stage fails definitively only if every candidate did.
+    """
+    deadline = time.monotonic() + OA_STAGE_TIMEOUT
+    outcomes = []
+    for i, (source_label, oa_url) in enumerate(p.oa_links):
+        remaining = deadline - time.monotonic()
+        if i and remaining <= 0:
+            log.append("  Gave up on {} open-access candidates after {}s".format(len(p.oa_links) - i, OA_STAGE_TIMEOUT))
+            return False, None, None
+        try:
+            outcome = session.fetch_direct(p, oa_url, source_label, log,
+                                           timeout=max(1, min(DIRECT_TIMEOUT, remaining)))
+        except requests.exceptions.RequestException:
+            outcome = None
+        if outcome == SUCCESS:
+            log.append(f"  Downloaded from {source_label} (open access)")
+            return True, None, SUCCESS
+        outcomes.append(outcome)
+    return False, None, outcomes[0] if None not in outcomes else None
+
+
+def _attempt_scholar_pdf(p, session, log):
+    """Direct PDF link from Scholar (link ends with pdf)."""
+    try:
+        outcome = session.fetch_direct(p, p.scholar_link, "Google Scholar (PDF link)", log)
+    except requests.exceptions.RequestException:
+        return False, None, None
+    if outcome == SUCCESS:
+        log.append("  Downloaded from Google Scholar PDF link")
+        return True, None, SUCCESS
+    return False, None, outcome
+
+
+def _attempt_scihub_doi(p, session, log):
+    """Sci-Hub via the hybrid client, by DOI."""
+    try:
+        mirror_url = session.fetch_scihub(p, p.DOI, is_doi=True)
+        if mirror_url:
+            log.append("  Downloaded from Sci-Hub (DOI) via {}".format(mirror_url))
+            return True, None, SUCCESS
+    except Exception as e:
+        return False, _scihub_error(e, log), _scihub_outcome(e)
+    return False, None, None
+
+
+def _attempt_scihub_link(p, session, log):
+    """Sci-Hub via the hybrid client, by Scholar link (papers without a DOI)."""
+    try:
+        mirror_url = session.fetch_scihub(p, p.scholar_link, is_doi=False)
+        if mirror_url:
+            log.append("  Downloaded from Sci-Hub (Scholar link) via {}".format(mirror_url))
+            return True, None, SUCCESS
+    except Exception as e:
+        return False, _scihub_error(e, log), _scihub_outcome(e)
+    return False, None, None
+
+
+# strategy -> (applies to paper, attempt); STRATEGIES gives the default order
+ATTEMPTS = {
+    DIRECT: (lambda p, session: p.pdf_link is not None, _attempt_direct),
+    OPEN_ACCESS: (lambda p, session: bool(p.oa_links), _attempt_open_access),
+    SCHOLAR_PDF: (lambda p, session: p.scholar_link is not None and p.scholar_link[-3:].lower() == "pdf",
+                  _attempt_scholar_pdf),
+    SCIHUB_DOI: (lambda p, session: p.DOI is not None and session.scihub_client is not None, _attempt_scihub_doi),
+    SCIHUB_LINK: (lambda p, session: p.scholar_link is not None and session.scihub_client is not None,
+                  _attempt_scihub_link),
+}
+
+
+def _download_paper(p, session, log):
+    """
+    Runs the attempt chain for one paper (direct link, open-access candidates, Scholar PDF link,
+    Sci-Hub by DOI, Sci-Hub by Scholar link). With strategy statistics the chain is reordered
+    for the paper's host and DOI prefix, and attempt types that keep failing there are skipped.
+    Only definitive attempt outcomes are recorded. Messages go to `log` so they can be printed in paper order.
+    Returns (downloaded, download_error).
+    """
+    strategies = [s for s in STRATEGIES if ATTEMPTS[s][0](p, session)]
+    keys = strategy_keys(p)
+    stats = session.strategy_stats
+    if stats is not None:
+        strategies, skipped = stats.order(keys, strategies)
+        for strategy, key in skipped.items():
+            log.append("  Skipping {}: it has not worked for {} recently".format(
+                STRATEGY_LABELS[strategy], key.split(':', 1)[1]))
+
+    download_error = None
+    for strategy in strategies:
+        start = time.monotonic()
+        downloaded, error, outcome = ATTEMPTS[strategy][1](p, session, log)
+        if stats is not None and outcome in DEFINITIVE_OUTCOMES:
+            stats.record(keys, strategy, outcome, time.monotonic() - start)
+        # The first error is the one reported
+        download_error = download_error or error
+        if downloaded:
+            return True, download_error
+    return False, download_error
+
+
 def download_papers(papers, dwnl_dir, num_limit, scihub_url=None,
                     headless=True, scihub_mode='auto',
-                    update_csv_callback=None):
+                    update_csv_callback=None, workers=DEFAULT_WORKERS, max_per_host=MAX_PER_HOST,
+                    refresh=False, store=None, scihub_hedge=False, retry_unavailable=False, resolve_oa=True,
+                    probe_links=True, learn_order=True):
     """
     Download papers from various sources (Scholar, Sci-Hub, etc).
     Renamed from downloadPapers to snake_case.
+
+    Papers are downloaded by `workers` threads. At most `max_per_host` requests hit the
+    same publisher host at once, Sci-Hub mirrors have their own cap (SciHubClient.MAX_PER_MIRROR),
+    and results are printed in paper order. A mirror that keeps failing is dropped on its own;
+    the run continues with the remaining mirrors and direct links.
+    Papers already listed in the folder's manifest are skipped unless `refresh` is set.
+    With a `store` (PDFStore), papers already in the shared store are linked instead of
+    downloaded, and new downloads are added to it. `scihub_hedge` races a slow mirror
+    against the next one (SciHubClient hedged mode). Papers Sci-Hub recently reported as
+    unavailable are not asked for again unless `retry_unavailable` is set.
+    With `resolve_oa`, legal open-access PDF locations (OpenAlex, Unpaywall, arXiv) are
+    looked up for the whole batch first and tried before Sci-Hub. With `probe_links`,
+    direct-link candidates are probed with small ranged GETs first and only links that
+    serve a PDF are downloaded in full (see extractors.url_probe). With `learn_order`, the
+    attempt chain of each paper is ordered from per-host and per-DOI-prefix statistics of
+    earlier attempts (see extractors.strategy_stats).
     """
     preferred_mirrors = get_preferred_scihub_mirrors(scihub_url)
     NetInfo.SciHub_URL = preferred_mirrors[0]
 
     print("\nSci-Hub mirrors order: {}".format(" -> ".join(preferred_mirrors[:4])))
-    print("The downloader will try Google Scholar first, then Sci-Hub mirrors.\n")
+    print("The downloader will try direct and open-access links first, then Sci-Hub mirrors.\n")
 
     # Initialize hybrid Sci-Hub client (don't pass selenium_driver - let it create its own if needed)
     scihub_client = None
@@ -108,156 +540,109 @@ def download_papers(papers, dwnl_dir, num_limit, scihub_url=None,
             use_selenium=(scihub_mode == 'selenium'),
             headless=headless,
             selenium_driver=None,  # Don't reuse Scholar's driver
-            preferred_mirrors=preferred_mirrors
+            preferred_mirrors=preferred_mirrors,
+            hedge=scihub_hedge,
+            url_cache=PDFURLCache()
         )
 
-    num_downloaded = 0
+    negative_cache = None
+    if scihub_client:
+        ttl_days = scihub_client.config.get("negative_cache_ttl_days", {})
+        negative_cache = NegativeCache(ttls={reason: days * DAY for reason, days in ttl_days.items()})
+    session = DownloadSession(dwnl_dir, num_limit, scihub_client, max_per_host, refresh, store,
+                              negative_cache, retry_unavailable)
+    if probe_links:
+        session.prober = URLProber(host_slots=session.host_slots)
+    if learn_order:
+        session.strategy_stats = StrategyStats()
+
+    def run(p):
+        log = []
+        previous = session.already_downloaded(p)
+        if previous:
+            p.downloaded = True
+            p.download_source = previous['source']
+            log.append("  Already downloaded: {}".format(previous['path']))
+            return (True, None), log
+        if session.limit_reached():
+            return None, log
+        linked = session.link_from_store(p)
+        if linked:
+            log.append("  Linked from PDF store ({})".format(linked))
+            return (True, None), log
+        try:
+            return _download_paper(p, session, log), log
+        except Exception as e:
+            # Catch any unexpected errors during paper processing
+            log.append("  ERROR processing paper: {} - {}".format(p.title[:50] if p.title else "Unknown", type(e).__name__))
+            return (False, None), log
+
+    to_download = [p for p in papers if p.canBeDownloaded()]
+    pending = [p for p in to_download if session.needs_fetch(p)]
+    if resolve_oa and pending:
+        resolved = OAResolver().resolve(pending)
+        print("Open-access candidates found for {} of {} papers.\n".format(resolved, len(pending)))
+    if session.prober is not None:
+        verdicts = session.probe_links(pending)
+        if verdicts:
+            pdfs = sum(v == PDF for v in verdicts.values())
+            print("Probed {} direct links: {} serve a PDF.\n".format(len(verdicts), pdfs))
     paper_number = 1
-    consecutive_failures = 0
-    MAX_CONSECUTIVE_FAILURES = 5
+    mirrors_down_reported = False
+    succeeded = failed = 0
 
     try:
-        for p in papers:
-            if p.canBeDownloaded() and (num_limit is None or num_downloaded < num_limit):
-                try:
-                    safe_print("Download {} of {} -> {}".format(paper_number, len(papers), p.title))
-                    paper_number += 1
-
-                    pdf_dir = get_save_dir(dwnl_dir, p.getFileName())
-
-                    downloaded = False
-                    download_error = None
-                    paper_failed = False
-
-                    # Attempt 1: Direct PDF link (Google Scholar or OpenAlex/Unpaywall)
-                    if not downloaded and p.pdf_link is not None:
-                        try:
-                            r = requests.get(p.pdf_link, headers=NetInfo.HEADERS, timeout=15)
-                            if r.content[:4] == b'%PDF':
-                                # Determine source label
-                                source_label = "Direct Link"
-                                if p.download_source == "OpenAlex/Unpaywall":
-                                    source_label = "OpenAlex/Unpaywall"
-                                elif "scholar" in p.pdf_link:
-                                    source_label = "Google Scholar (direct link)"
-
-                                save_file(pdf_dir, r.content, p, 3, source_label)
-                                downloaded = True
-                                num_downloaded += 1
-                                consecutive_failures = 0  # Reset on success
-                                safe_print(f"  Downloaded from {source_label}")
-                        except requests.exceptions.RequestException:
-                            pass
-
-                    # Attempt 2: Direct PDF link from scholar (if link ends with pdf)
-                    if not downloaded and p.scholar_link is not None and p.scholar_link[-3:].lower() == "pdf":
-                        try:
-                            r = requests.get(p.scholar_link, headers=NetInfo.HEADERS, timeout=15)
-                            if r.content[:4] == b'%PDF':
-                                save_file(pdf_dir, r.content, p, 3, "Google Scholar (PDF link)")
-                                downloaded = True
-                                num_downloaded += 1
-                                consecutive_failures = 0  # Reset on success
-                                safe_print("  Downloaded from Google Scholar PDF link")
-                        except requests.exceptions.RequestException:
-                            pass
-
-                    # Attempt 3: Sci-Hub via hybrid client (mirrors: .mk, .shop, .vg)
-                    if not downloaded and p.DOI is not None and scihub_client:
-                        try:
-                            pdf_content, source_url, mirror_url = scihub_client.download(p.DOI, is_doi=True)
-                            save_file(
-                                pdf_dir,
-                                pdf_content,
-                                p,
-                                2,
-                                _format_scihub_label(mirror_url)
-                            )
-                            downloaded = True
-                            num_downloaded += 1
-                            consecutive_failures = 0  # Reset on success
-                            safe_print("  Downloaded from Sci-Hub (DOI) via {}".format(mirror_url))
-                        except SciHubDownloadError as e:
-                            error_msg = str(e)
-                            if "not available" in error_msg.lower():
-                                safe_print("  Sci-Hub: Paper not available in database")
-                                download_error = "Not available in Sci-Hub"
-                            else:
-                                safe_print("  Sci-Hub: Download failed - {}".format(error_msg))
-                                download_error = "Sci-Hub error: " + error_msg[:50]
-                            paper_failed = True
-                        except Exception as e:
-                            error_type = type(e).__name__
-                            safe_print("  Sci-Hub: Download failed ({})".format(error_type))
-                            download_error = "Sci-Hub error: " + error_type
-                            paper_failed = True
-
-                    # Attempt 4: Sci-Hub via hybrid client (using scholar link if no DOI)
-                    if not downloaded and p.scholar_link is not None and scihub_client:
-                        try:
-                            pdf_content, source_url, mirror_url = scihub_client.download(p.scholar_link, is_doi=False)
-                            save_file(
-                                pdf_dir,
-                                pdf_content,
-                                p,
-                                2,
-                                _format_scihub_label(mirror_url)
-                            )
-                            downloaded = True
-                            num_downloaded += 1
-                            safe_print("  Downloaded from Sci-Hub (Scholar link) via {}".format(mirror_url))
-                        except SciHubDownloadError as e:
-                            error_msg = str(e)
-                            if "not available" in error_msg.lower():
-                                safe_print("  Sci-Hub: Paper not available in database")
-                                if not download_error:
-                                    download_error = "Not available in Sci-Hub"
-                            else:
-                                safe_print("  Sci-Hub: Download failed - {}".format(error_msg))
-                                if not download_error:
-                                    download_error = "Sci-Hub error: " + error_msg[:50]
-                        except Exception as e:
-                            error_type = type(e).__name__
-                            safe_print("  Sci-Hub: Download failed ({})".format(error_type))
-                            if not download_error:
-                                download_error = "Sci-Hub error: " + error_type
-
-                    if not downloaded:
-                        safe_print("  Failed to download: {}".format(p.title))
-                        if download_error:
-                            safe_print("  Error: {}".format(download_error))
-                        # Mark as failed in paper object (for CSV reporting)
-                        p.downloaded = False
-                        p.downloadedFrom = 0
-                        p.download_source = ""
-
-                        # Track consecutive failures
-                        if paper_failed:
-                            consecutive_failures += 1
-
-                        # Early termination check
-                        if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
-                            print("\n[STOP] {} consecutive download failures.".format(MAX_CONSECUTIVE_FAILURES))
-                            print("This may indicate Sci-Hub is down or blocking requests.")
-                            print("Successfully downloaded {} papers before stopping.\n".format(num_downloaded))
-                            break
-
-                    # Update CSV every 10 papers to avoid losing progress
-                    if update_csv_callback and paper_number % 10 == 0:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [(p, executor.submit(run, p)) for p in to_download]
+            # Report in paper order; later papers keep downloading while we wait on earlier ones
+            for p, future in futures:
+                result, log = future.result()
+                if result is None:
+                    continue  # Download limit reached before this paper started
+
+                safe_print("Download {} of {} -> {}".format(paper_number, len(papers), p.title))
+                paper_number += 1
+                for line in log:
+                    safe_print(line)
+
+                downloaded, download_error = result
+                succeeded += downloaded
+                failed += not downloaded
+                if not downloaded:
+                    safe_print("  Failed to download: {}".format(p.title))
+                    if download_error:
+                        safe_print("  Error: {}".format(download_error))
+                    # Mark as failed in paper object (for CSV reporting)
+                    p.downloaded = False
+                    p.downloadedFrom = 0
+                    p.download_source = ""
+
+                if scihub_client and not mirrors_down_reported and scihub_client.all_mirrors_disabled():
+                    mirrors_down_reported = True
+                    print("\n[STOP] Every Sci-Hub mirror failed {} times in a row.".format(
+                        SciHubClient.MAX_CONSECUTIVE_FAILURES))
+                    print("This may indicate Sci-Hub is down or blocking requests. "
+                          "Continuing with direct links only.\n")
+
+                # Update CSV (and the manifest) every 10 papers to avoid losing progress
+                if paper_number % 10 == 0:
+                    session.manifest.save()
+                    if update_csv_callback:
                         try:
                             update_csv_callback()
                         except Exception:
                             pass  # Don't fail downloads if CSV update fails
 
-                except Exception as e:
-                    # Catch any unexpected errors during paper processing
-                    safe_print("  ERROR processing paper: {} - {}".format(p.title[:50] if p.title else "Unknown", type(e).__name__))
-                    p.downloaded = False
-                    p.downloadedFrom = 0
-                    # Continue with next paper
-                    continue
+        print("\nDownload summary: {} available, {} failed".format(succeeded, failed))
+        if session.probe_skips:
+            print("  {} direct links skipped after probing (landing pages, paywalls, "
+                  "oversized or dead links)".format(session.probe_skips))
+        if session.known_misses:
+            print("  {} Sci-Hub lookups skipped as known misses from earlier runs "
+                  "(use --retry-unavailable to ask again)".format(session.known_misses))
 
     finally:
+        session.close()
         # Clean up Sci-Hub client resources
         if scihub_client:
             scihub_client.close()
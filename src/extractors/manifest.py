@@ -0,0 +1,124 @@
+"""
+Per-folder download manifest.
+
+manifest.json in the download directory records every saved PDF: its path (relative
+to the folder), size, sha256, download source and the paper's identifiers. Entries are
+indexed by every identifier (DOI, arXiv, OpenAlex, Semantic Scholar, CORE; the
+normalized title for papers without any), so re-running a query finds already fetched
+papers in O(1) instead of downloading them again as "(2)title.pdf".
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from core.merge_index import normalize_doi, normalize_title
+from utils.utils import atomic_write_json
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def paper_keys(paper):
+    """Manifest keys for a paper: one per known identifier, or its title if it has none."""
+    keys = []
+    if paper.DOI:
+        keys.append('doi:' + normalize_doi(paper.DOI))
+    for prefix, value in (('arxiv', paper.arxiv_id), ('openalex', paper.openalex_id),
+                          ('semantic_scholar', paper.semantic_scholar_id), ('core', paper.core_id)):
+        if value:
+            keys.append(f'{prefix}:{str(value).strip().lower()}')
+    if not keys and paper.title:
+        keys.append('title:' + normalize_title(paper.title))
+    return keys
+
+
+class DownloadManifest:
+    FILENAME = 'manifest.json'
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, self.FILENAME)
+        self._lock = threading.Lock()
+        self.entries = {}  # entry id (first key at record time) -> record
+        self.index = {}    # any key -> entry id
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('entries', {})
+        except (json.JSONDecodeError, IOError, AttributeError):
+            logging.warning(f"Could not read download manifest {self.path}, starting a new one.")
+            self.entries = {}
+        for entry_id, record in self.entries.items():
+            for key in record.get('keys', []):
+                self.index[key] = entry_id
+
+    def lookup(self, paper, verify=True):
+        """
+        Returns the manifest record of an already downloaded paper, or None.
+        With verify, the file must still exist with the recorded size (a stat, not a re-hash).
+        """
+        with self._lock:
+            for key in paper_keys(paper):
+                entry_id = self.index.get(key)
+                if entry_id is not None:
+                    record = self.entries[entry_id]
+                    if not verify or self.verify(record):
+                        return record
+        return None
+
+    def verify(self, record, full=False):
+        """Checks the file exists with the recorded size (and, with full, the recorded sha256)."""
+        file_path = self.abspath(record)
+        try:
+            if os.path.getsize(file_path) != record['size']:
+                return False
+        except OSError:
+            return False
+        return not full or file_sha256(file_path) == record['sha256']
+
+    def abspath(self, record):
+        return os.path.join(self.folder, record['path'])
+
+    def record(self, paper, file_path, source, sha256=None):
+        """Adds (or replaces) the entry for a saved paper."""
+        keys = paper_keys(paper)
+        if not keys:
+            return None
+        entry = {
+            'keys': keys,
+            'path': os.path.relpath(file_path, self.folder),
+            'size': os.path.getsize(file_path),
+            'sha256': sha256 or file_sha256(file_path),
+            'source': source,
+            'title': paper.title,
+            'downloaded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        with self._lock:
+            # Drop entries this paper supersedes, so every key points at one record
+            for key in keys:
+                old_id = self.index.get(key)
+                if old_id is not None and old_id in self.entries:
+                    for old_key in self.entries.pop(old_id)['keys']:
+                        self.index.pop(old_key, None)
+            self.entries[keys[0]] = entry
+            for key in keys:
+                self.index[key] = keys[0]
+        return entry
+
+    def save(self):
+        with self._lock:
+            data = {'version': 1, 'entries': dict(self.entries)}
+        atomic_write_json(self.path, data)
@@ -0,0 +1,195 @@
+"""
+Health-scored Sci-Hub mirror pool.
+
+Every request to a mirror is recorded with its latency and outcome. The pool keeps moving
+averages of latency, success, Cloudflare challenges and timeouts per mirror and orders the
+mirrors by expected time to an answer (latency / success rate), so a dead or slow first
+mirror stops costing a timeout on every paper.
+
+Each mirror has a circuit breaker: after MAX_CONSECUTIVE_FAILURES failures in a row it
+opens and the mirror is skipped. Once the cooldown has passed the breaker is half-open and a
+single request probes the mirror; success closes the breaker, failure re-opens it with a
+doubled cooldown. Failures of requests that were already in flight when the breaker opened
+do not extend the cooldown. Stats and breaker states persist between runs (mirror_health.json in the
+cache directory).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from utils.utils import get_cache_dir, atomic_write_json
+
+# Weight of the newest request in the moving averages
+EWMA_ALPHA = 0.3
+# Consecutive failures that open a mirror's circuit breaker
+MAX_CONSECUTIVE_FAILURES = 5
+# First cooldown of an open breaker (seconds); doubled after each failed probe
+BASE_COOLDOWN = 60
+MAX_COOLDOWN = 6 * 3600
+# Success rate floor so a failing mirror's score stays finite
+MIN_SUCCESS = 0.05
+# Recent latencies kept per mirror for percentiles (hedging delays)
+LATENCY_WINDOW = 20
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Outcomes that mean the mirror answered properly (it may just not have the paper)
+HEALTHY = (None, 'not_available')
+
+
+def _ewma(previous, value):
+    return value if previous is None else EWMA_ALPHA * value + (1 - EWMA_ALPHA) * previous
+
+
+class MirrorPool:
+    FILENAME = 'mirror_health.json'
+
+    def __init__(self, path=None, max_failures=MAX_CONSECUTIVE_FAILURES, base_cooldown=BASE_COOLDOWN):
+        self.path = path or os.path.join(get_cache_dir(), self.FILENAME)
+        self.max_failures = max_failures
+        self.base_cooldown = base_cooldown
+        self._lock = threading.Lock()
+        self._probing = set()
+        self._dirty = False
+        self.mirrors = self._load()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f).get('mirrors', {})
+            except (json.JSONDecodeError, IOError, AttributeError):
+                logging.warning(f"Could not read mirror health {self.path}, starting fresh.")
+        return {}
+
+    def _entry(self, url):
+        return self.mirrors.setdefault(url, {
+            'requests': 0, 'latency_ewma': None, 'success_ewma': None,
+            'cloudflare_ewma': None, 'timeout_ewma': None,
+            'consecutive_failures': 0, 'state': CLOSED, 'opened_at': None, 'cooldown': self.base_cooldown,
+            'recent_latencies': [],
+        })
+
+    def _state(self, entry, now):
+        if entry['state'] == OPEN and now - entry['opened_at'] >= entry['cooldown']:
+            return HALF_OPEN
+        return entry['state']
+
+    def score(self, url):
+        """Expected seconds to an answer from the mirror; None before its first request."""
+        entry = self.mirrors.get(url)
+        if not entry or entry['latency_ewma'] is None:
+            return None
+        return entry['latency_ewma'] / max(entry['success_ewma'], MIN_SUCCESS)
+
+    def latency_percentile(self, url, q):
+        """q-th percentile (0-100) of the mirror's recent answered-request latencies, or None."""
+        with self._lock:
+            recent = sorted(self.mirrors.get(url, {}).get('recent_latencies', []))
+        if not recent:
+            return None
+        return recent[min(len(recent) - 1, int(len(recent) * q / 100))]
+
+    def ordered(self, urls):
+        """
+        Mirrors worth trying now, best first. Untried mirrors come first (in the given order)
+        so each gets measured; open breakers are left out; a half-open mirror is handed to
+        one caller at a time as a probe, after the healthy mirrors.
+        """
+        now = time.time()
+        untried, healthy, probes = [], [], []
+        with self._lock:
+            for position, url in enumerate(urls):
+                entry = self.mirrors.get(url)
+                state = self._state(entry, now) if entry else CLOSED
+                if state == OPEN:
+                    continue
+                if state == HALF_OPEN:
+                    if url not in self._probing:
+                        self._probing.add(url)
+                        probes.append(url)
+                elif self.score(url) is None:
+                    untried.append(url)
+                else:
+                    healthy.append((self.score(url), position, url))
+        return untried + [url for _, _, url in sorted(healthy)] + probes
+
+    def release_probe(self, url):
+        """Gives back a half-open probe that ordered() handed out but that was not used."""
+        with self._lock:
+            self._probing.discard(url)
+
+    def is_open(self, url):
+        entry = self.mirrors.get(url)
+        return bool(entry) and self._state(entry, time.time()) == OPEN
+
+    def record(self, url, error_type, latency):
+        """
+        Records one request to a mirror.
+
+        Args:
+            url (str): Mirror URL.
+            error_type (str): None on success, otherwise the SciHubClient error type.
+            latency (float): Seconds the request took.
+
+        Returns:
+            bool: True if this result opened the mirror's breaker.
+        """
+        healthy = error_type in HEALTHY
+        with self._lock:
+            self._dirty = True
+            was_probe = url in self._probing
+            self._probing.discard(url)
+            entry = self._entry(url)
+            entry['requests'] += 1
+            entry['latency_ewma'] = _ewma(entry['latency_ewma'], latency)
+            entry['success_ewma'] = _ewma(entry['success_ewma'], 1.0 if healthy else 0.0)
+            entry['cloudflare_ewma'] = _ewma(entry['cloudflare_ewma'], 1.0 if error_type == 'cloudflare' else 0.0)
+            entry['timeout_ewma'] = _ewma(entry['timeout_ewma'], 1.0 if error_type == 'timeout' else 0.0)
+            if healthy:
+                recent = entry.setdefault('recent_latencies', [])
+                recent.append(round(latency, 3))
+                del recent[:-LATENCY_WINDOW]
+                entry.update(consecutive_failures=0, state=CLOSED, opened_at=None, cooldown=self.base_cooldown)
+                return False
+            entry['consecutive_failures'] += 1
+            if entry['state'] == OPEN:
+                if was_probe:
+                    # Failed half-open probe: back off further
+                    entry['cooldown'] = min(entry['cooldown'] * 2, MAX_COOLDOWN)
+                    entry['opened_at'] = time.time()
+                # Otherwise a request in flight when the breaker opened: already counted
+                return False
+            if entry['consecutive_failures'] >= self.max_failures:
+                entry.update(state=OPEN, opened_at=time.time())
+                return True
+            return False
+
+    def summary(self):
+        """Per-mirror derived numbers for reporting."""
+        now = time.time()
+        return {url: {
+            'requests': e['requests'],
+            'latency': e['latency_ewma'],
+            'success_rate': e['success_ewma'],
+            'cloudflare_rate': e['cloudflare_ewma'],
+            'timeout_rate': e['timeout_ewma'],
+            'state': self._state(e, now),
+            'score': self.score(url),
+        } for url, e in self.mirrors.items()}
+
+    def save(self):
+        """Persists the stats if anything was recorded since loading."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'version': 1, 'mirrors': {url: dict(e, recent_latencies=list(e.get('recent_latencies', [])))
+                                              for url, e in self.mirrors.items()}}
+            self._dirty = False
+        try:
+            atomic_write_json(self.path, data)
+        except OSError as e:
+            logging.warning(f"Could not save mirror health {self.path}: {e}")
@@ -0,0 +1,85 @@
+"""
+Persistent negative cache of Sci-Hub misses.
+
+A paper Sci-Hub answered "not available" for (or whose page had no usable PDF) is recorded
+with the reason and a timestamp, so later runs skip it without asking every mirror again.
+Entries expire after a TTL that depends on the failure class; transient failures (timeouts,
+Cloudflare, HTTP errors) are never cached because they say nothing about the paper.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from core.merge_index import normalize_doi
+from utils.utils import get_cache_dir, atomic_write_json
+
+DAY = 24 * 3600
+
+# Seconds a miss is remembered, per SciHubClient error type
+DEFAULT_TTLS = {
+    'not_available': 30 * DAY,
+    'no_pdf_link': 7 * DAY,
+    'invalid_pdf': 3 * DAY,
+}
+
+
+def cache_key(identifier, is_doi=True):
+    return 'doi:' + normalize_doi(identifier) if is_doi else 'url:' + identifier.strip()
+
+
+class NegativeCache:
+    FILENAME = 'scihub_misses.json'
+
+    def __init__(self, path=None, ttls=None):
+        self.path = path or os.path.join(get_cache_dir(), self.FILENAME)
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.entries = self._load()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f).get('misses', {})
+            except (json.JSONDecodeError, IOError, AttributeError):
+                logging.warning(f"Could not read Sci-Hub miss cache {self.path}, starting fresh.")
+        return {}
+
+    def lookup(self, identifier, is_doi=True):
+        """The cached miss ({'reason', 'at'}) for an identifier if it has not expired, else None."""
+        with self._lock:
+            entry = self.entries.get(cache_key(identifier, is_doi))
+        if entry is None or time.time() - entry['at'] >= self.ttls.get(entry['reason'], 0):
+            return None
+        return entry
+
+    def record(self, identifier, reason, is_doi=True):
+        """Remembers a miss; reasons without a TTL are ignored. Returns True if cached."""
+        if not self.ttls.get(reason):
+            return False
+        with self._lock:
+            self.entries[cache_key(identifier, is_doi)] = {'reason': reason, 'at': time.time()}
+            self._dirty = True
+        return True
+
+    def discard(self, identifier, is_doi=True):
+        with self._lock:
+            if self.entries.pop(cache_key(identifier, is_doi), None) is not None:
+                self._dirty = True
+
+    def save(self):
+        """Writes the cache (dropping expired entries) if anything changed."""
+        now = time.time()
+        with self._lock:
+            if not self._dirty:
+                return
+            self.entries = {key: e for key, e in self.entries.items()
+                            if now - e['at'] < self.ttls.get(e['reason'], 0)}
+            data = {'version': 1, 'misses': dict(self.entries)}
+            self._dirty = False
+        try:
+            atomic_write_json(self.path, data)
+        except OSError as e:
+            logging.warning(f"Could not save Sci-Hub miss cache {self.path}: {e}")
@@ -0,0 +1,144 @@
+"""
+Open-access-first PDF resolution.
+
+Before any download starts, OAResolver looks up legal PDF locations for the whole batch:
+OpenAlex best_oa_location (bulk, 50 DOIs or PMIDs per request), Unpaywall (per DOI, only
+for papers OpenAlex had no PDF for) and the arXiv PDF URL pattern for papers with an arXiv
+ID or an arXiv DOI. The lookups run concurrently under one deadline, which also caps each
+request's timeout, and their candidates are attached to each paper as `oa_links`, which the downloader tries before Sci-Hub.
+"""
+import concurrent.futures
+import logging
+import re
+import time
+from core.merge_index import normalize_doi
+from utils import http_client
+
+ARXIV_DOI = re.compile(r'^10\.48550/arxiv\.(.+)$', re.IGNORECASE)
+
+# Labels recorded as the download source (and tried in this order)
+ARXIV = "arXiv"
+OPENALEX = "OpenAlex/Unpaywall"
+UNPAYWALL = "Unpaywall"
+
+
+def arxiv_pdf_url(paper):
+    """PDF URL built from the paper's arXiv ID (or arXiv DOI), or None."""
+    arxiv_id = paper.arxiv_id
+    if not arxiv_id and paper.DOI:
+        match = ARXIV_DOI.match(normalize_doi(paper.DOI))
+        arxiv_id = match.group(1) if match else None
+    if not arxiv_id:
+        return None
+    return f"https://arxiv.org/pdf/{arxiv_id.replace('arxiv:', '').replace('arXiv:', '')}"
+
+
+class OAResolver:
+    OPENALEX_URL = "https://api.openalex.org/works"
+    UNPAYWALL_URL = "https://api.unpaywall.org/v2/"
+
+    def __init__(self, email=http_client.CONTACT_EMAIL, unpaywall=True, max_workers=8, timeout=15,
+                 deadline=60, batch_size=50):
+        self.email = email
+        self.unpaywall = unpaywall
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.deadline = deadline
+        self.batch_size = batch_size
+
+    def _timeout(self, end):
+        """Per-request timeout: self.timeout, cut short so no request outlives the deadline."""
+        return max(1, min(self.timeout, end - time.monotonic()))
+
+    def _openalex_batch(self, field, values, end):
+        """best_oa_location PDF URLs for one batch, keyed by normalized DOI or PMID."""
+        prefix = 'https://doi.org/' if field == 'doi' else ''
+        params = {
+            'filter': f"{field}:{'|'.join(prefix + v for v in values)}",
+            'per-page': len(values),
+            'mailto': self.email,
+            'select': 'doi,ids,best_oa_location',
+        }
+        found = {}
+        try:
+            resp = http_client.get(self.OPENALEX_URL, params=params, timeout=self._timeout(end))
+            if resp.status_code != 200:
+                return found
+            for work in resp.json().get('results', []):
+                pdf_url = (work.get('best_oa_location') or {}).get('pdf_url')
+                if not pdf_url:
+                    continue
+                if work.get('doi'):
+                    found['doi:' + normalize_doi(work['doi'])] = pdf_url
+                pmid = (work.get('ids') or {}).get('pmid')
+                if pmid:
+                    found['pmid:' + pmid.rstrip('/').rsplit('/', 1)[-1]] = pdf_url
+        except Exception as e:
+            logging.debug(f"OpenAlex OA lookup failed: {e}")
+        return found
+
+    def _unpaywall(self, doi, end):
+        try:
+            resp = http_client.get(self.UNPAYWALL_URL + doi, params={'email': self.email},
+                                   timeout=self._timeout(end))
+            if resp.status_code != 200:
+                return None
+            return (resp.json().get('best_oa_location') or {}).get('url_for_pdf')
+        except Exception as e:
+            logging.debug(f"Unpaywall lookup failed for {doi}: {e}")
+            return None
+
+    @staticmethod
+    def _collect(futures, end):
+        """Yields (future, result) as lookups finish; lookups still queued at `end` are dropped."""
+        try:
+            for future in concurrent.futures.as_completed(futures, timeout=max(0, end - time.monotonic())):
+                yield future, future.result()
+        except concurrent.futures.TimeoutError:
+            logging.info("OA resolution hit its deadline, continuing with what was found.")
+            for future in futures:
+                future.cancel()
+
+    def resolve(self, papers):
+        """
+        Attaches OA candidates to each paper's `oa_links` ([(label, url)], best first).
+        Returns the number of papers that got at least one candidate.
+        """
+        dois = sorted({normalize_doi(p.DOI) for p in papers if p.DOI})
+        pmids = sorted({str(p.pmid) for p in papers if p.pmid})
+        end = time.monotonic() + self.deadline
+        openalex = {}
+        unpaywall = {}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            batches = [executor.submit(self._openalex_batch, field, values[i:i + self.batch_size], end)
+                       for field, values in (('doi', dois), ('pmid', pmids))
+                       for i in range(0, len(values), self.batch_size)]
+            for _, found in self._collect(batches, end):
+                openalex.update(found)
+
+            if self.unpaywall:
+                # OpenAlex already carries Unpaywall's data for most works; ask only for the rest
+                missing = [doi for doi in dois if 'doi:' + doi not in openalex]
+                lookups = {executor.submit(self._unpaywall, doi, end): doi for doi in missing}
+                for future, pdf_url in self._collect(lookups, end):
+                    if pdf_url:
+                        unpaywall[lookups[future]] = pdf_url
+
+        resolved = 0
+        for p in papers:
+            doi = normalize_doi(p.DOI) if p.DOI else None
+            candidates = [
+                (ARXIV, arxiv_pdf_url(p)),
+                (OPENALEX, openalex.get('doi:' + doi) if doi else None),
+                (OPENALEX, openalex.get('pmid:' + str(p.pmid)) if p.pmid else None),
+                (UNPAYWALL, unpaywall.get(doi) if doi else None),
+            ]
+            seen = {p.pdf_link}
+            p.oa_links = []
+            for label, url in candidates:
+                if url and url not in seen:
+                    seen.add(url)
+                    p.oa_links.append((label, url))
+            resolved += bool(p.oa_links)
+        return resolved
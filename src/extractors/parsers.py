@@ -241,6 +241,84 @@ def getSchiHubPDF_xpath(html_content):
     return result
 
 
+# Kinds of Sci-Hub mirror answers (SciHubPage.kind)
+SCIHUB_NOT_AVAILABLE = 'not_available'
+SCIHUB_CLOUDFLARE = 'cloudflare'
+SCIHUB_PDF_LINK = 'pdf_link'
+SCIHUB_UNKNOWN = 'unknown'
+
+# Where a Sci-Hub page points to its PDF, most specific first (SciHubEVA's XPath, then any viewer element)
+SCIHUB_PDF_XPATHS = (
+    '//*[@id="pdf"]/@src|//*[@id="article"]//iframe/@src',
+    '//iframe/@src',
+    '//embed/@src',
+    '//object/@data',
+)
+CLOUDFLARE_MARKERS = (b'Cloudflare', b'cf-browser-verification', b'Just a moment', b'Checking your browser')
+
+
+class SciHubPage:
+    """
+    What a Sci-Hub mirror answered: `kind` is one of the SCIHUB_* kinds and `pdf_url` is
+    set for SCIHUB_PDF_LINK (as found in the page, possibly relative). `is_pdf` is True
+    when the body itself was already the PDF (pdf_url is then the page URL).
+    """
+    __slots__ = ('kind', 'pdf_url', 'is_pdf')
+
+    def __init__(self, kind, pdf_url=None, is_pdf=False):
+        self.kind = kind
+        self.pdf_url = pdf_url
+        self.is_pdf = is_pdf
+
+    def __eq__(self, other):
+        return isinstance(other, SciHubPage) and (self.kind, self.pdf_url, self.is_pdf) == (
+            other.kind, other.pdf_url, other.is_pdf)
+
+    def __repr__(self):
+        return f"SciHubPage({self.kind!r}, pdf_url={self.pdf_url!r}, is_pdf={self.is_pdf})"
+
+
+def classify_scihub_page(content, page_url=None):
+    """
+    Classifies a Sci-Hub response body with at most one parse. Replaces running
+    is_scihub_paper_not_available, is_cloudflare_page and getSchiHubPDF_xpath one after
+    another (up to three parses of the same page).
+
+    A body that is already a PDF is not parsed at all, and the cheap byte marker of the
+    "not available" page is checked before the single lxml parse. The checks keep the order
+    of the three-step analysis: "not available" (marker or message block) first, then
+    Cloudflare, then the PDF viewer element.
+    Returns a SciHubPage.
+    """
+    if not content:
+        return SciHubPage(SCIHUB_UNKNOWN)
+    if content.lstrip()[:4] == b'%PDF':
+        return SciHubPage(SCIHUB_PDF_LINK, page_url, is_pdf=True)
+    if b'not yet available in my database' in content:
+        return SciHubPage(SCIHUB_NOT_AVAILABLE)
+
+    try:
+        html = etree.HTML(content)
+    except (etree.ParserError, ValueError):
+        html = None
+
+    if html is not None:
+        for block in html.xpath('//block-rounded[contains(concat(" ", @class, " "), " message ")]'):
+            text = ''.join(block.itertext()).lower()
+            if 'not yet available' in text or 'not available in my database' in text:
+                return SciHubPage(SCIHUB_NOT_AVAILABLE)
+    if any(marker in content for marker in CLOUDFLARE_MARKERS):
+        return SciHubPage(SCIHUB_CLOUDFLARE)
+    if html is None:
+        return SciHubPage(SCIHUB_UNKNOWN)
+
+    for xpath in SCIHUB_PDF_XPATHS:
+        for value in html.xpath(xpath):
+            if value.strip():
+                return SciHubPage(SCIHUB_PDF_LINK, value.strip())
+    return SciHubPage(SCIHUB_UNKNOWN)
+
+
 def get_scihub_urls(html):
     """Renamed from SciHubUrls to snake_case."""
     result = []
@@ -0,0 +1,145 @@
+"""
+Content-addressed PDF store shared by every download folder.
+
+Blobs live under <root>/objects/<aa>/<sha256>.pdf and an SQLite index maps paper
+identifiers (the manifest keys: DOI, arXiv, OpenAlex, ...) to blob hashes. Project
+folders get hardlinks (or symlinks, or copies) named with Paper.getFileName(), so the same
+PDF is stored once no matter how many queries or folders reference it, and a paper already
+in the store is linked locally instead of downloaded again.
+
+Blobs are copies made read-only, never the caller's own file, and their size and mtime
+are recorded: a blob that changed anyway (edited through a hardlink by a user allowed to
+write it) is re-hashed before reuse and dropped if it no longer matches its name.
+"""
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from extractors.manifest import file_sha256
+from utils.utils import get_cache_dir
+
+LINK_MODES = ('hardlink', 'symlink', 'copy')
+
+
+class PDFStore:
+    def __init__(self, root=None, link_mode='hardlink'):
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unknown link mode '{link_mode}'. Use one of: {', '.join(LINK_MODES)}")
+        self.root = root or os.path.join(get_cache_dir(), 'pdf_store')
+        self.link_mode = link_mode
+        self.index_path = os.path.join(self.root, 'index.sqlite3')
+        self._local = threading.local()
+        os.makedirs(os.path.join(self.root, 'objects'), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS keys (key TEXT PRIMARY KEY, sha256 TEXT NOT NULL, '
+                         'source TEXT, added REAL NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS blobs (sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL, '
+                         'mtime_ns INTEGER NOT NULL)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.index_path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def blob_path(self, sha256):
+        return os.path.join(self.root, 'objects', sha256[:2], sha256 + '.pdf')
+
+    def has_blob(self, sha256):
+        """True if the blob exists and still matches its hash (re-hashed only if its size or mtime changed)."""
+        if not sha256:
+            return False
+        blob = self.blob_path(sha256)
+        try:
+            st = os.stat(blob)
+        except OSError:
+            return False
+        try:
+            row = self._connect().execute('SELECT size, mtime_ns FROM blobs WHERE sha256 = ?', (sha256,)).fetchone()
+        except sqlite3.Error as e:
+            logging.debug(f"PDF store lookup failed: {e}")
+            row = None
+        if row == (st.st_size, st.st_mtime_ns):
+            return True
+        if file_sha256(blob) != sha256:
+            logging.warning(f"PDF store blob {blob} was modified, dropping it.")
+            os.remove(blob)
+            return False
+        self._record_blob(sha256, blob)
+        return True
+
+    def _record_blob(self, sha256, blob):
+        os.chmod(blob, 0o444)
+        st = os.stat(blob)
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO blobs VALUES (?, ?, ?)', (sha256, st.st_size, st.st_mtime_ns))
+        except sqlite3.Error as e:
+            logging.debug(f"Could not record PDF store blob {blob}: {e}")
+
+    def find(self, keys):
+        """(sha256, source) of a stored blob for any of the keys, or None."""
+        try:
+            conn = self._connect()
+            for key in keys:
+                row = conn.execute('SELECT sha256, source FROM keys WHERE key = ?', (key,)).fetchone()
+                if row and self.has_blob(row[0]):
+                    return row
+        except sqlite3.Error as e:
+            logging.debug(f"PDF store lookup failed: {e}")
+        return None
+
+    def add(self, file_path, keys, source=None, sha256=None):
+        """
+        Stores a read-only copy of a downloaded file and indexes it under `keys`.
+        Returns its sha256.
+        """
+        sha256 = sha256 or file_sha256(file_path)
+        blob = self.blob_path(sha256)
+        if not self.has_blob(sha256):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            tmp = f"{blob}.{os.getpid()}.{threading.get_ident()}.tmp"
+            # A copy, not a link: later edits of the caller's file must not reach the blob
+            shutil.copyfile(file_path, tmp)
+            os.replace(tmp, blob)
+            self._record_blob(sha256, blob)
+        try:
+            conn = self._connect()
+            with conn:
+                conn.executemany('INSERT OR REPLACE INTO keys VALUES (?, ?, ?, ?)',
+                                 [(key, sha256, source, time.time()) for key in keys])
+        except sqlite3.Error as e:
+            logging.warning(f"Could not index {file_path} in the PDF store: {e}")
+        return sha256
+
+    def link(self, sha256, dest):
+        """
+        Places the blob at `dest` (replacing any file there) using the configured link mode,
+        falling back to a symlink and then a copy when links are not possible.
+        Raises OSError if the blob is missing or no longer matches its hash.
+        """
+        blob = self.blob_path(sha256)
+        if not self.has_blob(sha256):
+            raise OSError(f"PDF store blob {blob} is missing or modified")
+        tmp = f"{dest}.{threading.get_ident()}.link"
+        modes = LINK_MODES[LINK_MODES.index(self.link_mode):]
+        for mode in modes:
+            try:
+                if mode == 'hardlink':
+                    os.link(blob, tmp)
+                elif mode == 'symlink':
+                    os.symlink(os.path.abspath(blob), tmp)
+                else:
+                    shutil.copyfile(blob, tmp)
+                    os.chmod(tmp, 0o644)
+                os.replace(tmp, dest)
+                return mode
+            except OSError:
+                if os.path.lexists(tmp):
+                    os.remove(tmp)
+        raise OSError(f"Could not link {blob} to {dest}")
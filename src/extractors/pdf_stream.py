@@ -0,0 +1,292 @@
+"""
+Streamed PDF bodies.
+
+Downloads are requested with stream=True; open_pdf_stream() reads just enough of the
+body to check the %PDF signature and drops anything else (HTML error pages, captchas)
+before it is downloaded. Accepted bodies are written chunk by chunk to a temp file
+that is renamed into place, so a PDF never sits fully in memory and an interrupted
+download never leaves a truncated file under the final name.
+
+With a partial-download directory, open_resumable() keeps the body in a persistent
+.part file next to a small JSON record (URL, ETag/Last-Modified, bytes received).
+Interrupted transfers resume with a Range request, both within the same download and
+in later runs.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import requests
+
+CHUNK_SIZE = 64 * 1024
+PDF_SIGNATURE = b'%PDF'
+
+# Range re-requests made within one download after the connection drops
+RESUME_RETRIES = 3
+# Partial-file metadata is flushed after this many new bytes
+META_FLUSH_BYTES = 1024 * 1024
+
+
+class PDFStream:
+    """Iterable over a response body whose first bytes were checked to be a PDF."""
+
+    def __init__(self, response, head, chunks):
+        self.response = response
+        self.url = response.url
+        self._head = head
+        self._chunks = chunks
+
+    def __iter__(self):
+        yield self._head
+        for chunk in self._chunks:
+            if chunk:
+                yield chunk
+
+    def close(self):
+        try:
+            self.response.close()
+        except Exception:
+            pass
+
+
+def open_pdf_stream(response, chunk_size=CHUNK_SIZE):
+    """
+    Sniffs a streamed response. Returns a PDFStream, or None (connection closed)
+    if the status is not 200 or the body does not start with %PDF.
+    """
+    if response.status_code != 200:
+        response.close()
+        return None
+    chunks = response.iter_content(chunk_size=chunk_size)
+    head = b''
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= len(PDF_SIGNATURE):
+            break
+    if not head.startswith(PDF_SIGNATURE):
+        response.close()
+        return None
+    return PDFStream(response, head, chunks)
+
+
+def write_atomic(file_name, content):
+    """
+    Writes bytes or an iterable of byte chunks to `file_name` via a temp file in the
+    same directory and an atomic rename. Returns the number of bytes written.
+    """
+    if isinstance(content, ResumableDownload):
+        return content.finish(file_name)
+    chunks = [content] if isinstance(content, (bytes, bytearray)) else content
+    directory = os.path.dirname(os.path.abspath(file_name))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.part')
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(tmp_path, file_name)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        if isinstance(content, PDFStream):
+            content.close()
+    return size
+
+
+class PartialDownloads:
+    """Partially downloaded bodies (`<key>.part` + `<key>.json`) kept across retries and runs."""
+
+    def __init__(self, directory):
+        # Created on first use; remove_if_empty() tidies up after a run
+        self.directory = directory
+
+    def paths(self, url):
+        key = hashlib.sha1(url.split('#')[0].encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + '.part', base + '.json'
+
+    def load(self, url):
+        """Metadata of a usable partial body for `url`, or None."""
+        part_path, meta_path = self.paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            received = os.path.getsize(part_path)
+        except (OSError, ValueError):
+            return None
+        if received == 0 or not (meta.get('etag') or meta.get('last_modified')):
+            # Without a validator we cannot tell whether the remote file changed
+            return None
+        meta['bytes'] = received
+        return meta
+
+    def open_part(self, url, append):
+        os.makedirs(self.directory, exist_ok=True)
+        return open(self.paths(url)[0], 'ab' if append else 'wb')
+
+    def save(self, url, meta):
+        _, meta_path = self.paths(url)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    def discard(self, url):
+        for file_path in self.paths(url):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def remove_if_empty(self):
+        """End of run: drops the directory unless it still holds resumable downloads."""
+        try:
+            os.rmdir(self.directory)
+        except OSError:
+            pass
+
+
+class ResumableDownload:
+    """
+    PDF body streamed into a persistent .part file. finish() completes it (resuming with
+    Range requests if the connection drops) and renames it into place.
+    """
+
+    def __init__(self, request, url, response, offset, partials, request_kwargs, head=b'', chunks=None):
+        self._request = request
+        self._kwargs = request_kwargs
+        self.response = response
+        self.url = response.url or url
+        self.source_url = url
+        self.offset = offset
+        self.partials = partials
+        self.part_path, _ = partials.paths(url)
+        self._head = head
+        self._chunks = chunks if chunks is not None else response.iter_content(chunk_size=CHUNK_SIZE)
+        # Byte offsets of a content-encoded body do not match the decoded bytes we store
+        encoding = response.headers.get('Content-Encoding', 'identity').lower()
+        self.resumable = encoding in ('', 'identity')
+        self.meta = {
+            'url': url,
+            'etag': response.headers.get('ETag') if self.resumable else None,
+            'last_modified': response.headers.get('Last-Modified') if self.resumable else None,
+            'total': _total_length(response, offset) if self.resumable else None,
+        }
+
+    def _supports_range(self):
+        return self.resumable and (self.response.status_code == 206
+                                   or self.response.headers.get('Accept-Ranges', '').lower() == 'bytes')
+
+    def _flush_meta(self, received):
+        self.meta['bytes'] = received
+        self.partials.save(self.source_url, self.meta)
+
+    def _resume(self, received):
+        """Re-requests the rest of the body after a dropped connection."""
+        self.response.close()
+        self.response = _request_range(self._request, self.source_url, received, self.meta, self._kwargs)
+        if self.response.status_code != 206:
+            raise requests.exceptions.ConnectionError(
+                f"Server did not resume at byte {received} (HTTP {self.response.status_code})")
+        self._chunks = self.response.iter_content(chunk_size=CHUNK_SIZE)
+
+    def finish(self, file_name):
+        """Streams the rest of the body and moves the completed file to `file_name`."""
+        received = self.offset
+        retries = RESUME_RETRIES
+        try:
+            with self.partials.open_part(self.source_url, append=bool(self.offset)) as f:
+                if self._head:
+                    f.write(self._head)
+                    received += len(self._head)
+                flushed = received
+                while True:
+                    try:
+                        for chunk in self._chunks:
+                            if not chunk:
+                                continue
+                            f.write(chunk)
+                            received += len(chunk)
+                            if received - flushed >= META_FLUSH_BYTES:
+                                f.flush()
+                                self._flush_meta(received)
+                                flushed = received
+                        break
+                    except requests.exceptions.RequestException:
+                        f.flush()
+                        self._flush_meta(received)
+                        if retries <= 0 or not self._supports_range():
+                            raise
+                        retries -= 1
+                        self._resume(received)
+            total = self.meta.get('total')
+            if total and received < total:
+                self._flush_meta(received)
+                raise requests.exceptions.ConnectionError(f"Incomplete body: {received} of {total} bytes")
+            os.replace(self.part_path, file_name)
+            self.partials.discard(self.source_url)
+        except BaseException:
+            if self.partials.load(self.source_url) is None:
+                # Nothing a later run could resume from
+                self.partials.discard(self.source_url)
+            raise
+        finally:
+            self.close()
+        return received
+
+    def close(self):
+        try:
+            self.response.close()
+        except Exception:
+            pass
+
+
+def _total_length(response, offset):
+    """Full body size from Content-Range (206) or Content-Length (200), if known."""
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range and not content_range.endswith('/*'):
+        return int(content_range.rsplit('/', 1)[1])
+    length = response.headers.get('Content-Length')
+    return int(length) + offset if length and length.isdigit() else None
+
+
+def _request_range(request, url, offset, meta, kwargs):
+    headers = dict(kwargs.get('headers') or {})
+    headers['Range'] = f'bytes={offset}-'
+    validator = meta.get('etag') or meta.get('last_modified')
+    if validator:
+        headers['If-Range'] = validator
+    return request(url, **dict(kwargs, headers=headers, stream=True))
+
+
+def open_resumable(request, url, partials, **kwargs):
+    """
+    Starts (or resumes) a PDF download. `request(url, **kwargs)` performs the GET,
+    e.g. http_client.get or a session's get.
+
+    If a partial body exists the request carries Range/If-Range; a 206 answer continues
+    it, a 200 (file changed or ranges unsupported) starts over. A fresh body must start
+    with %PDF. Returns a ResumableDownload, or None (connection closed) if the response
+    is not a PDF.
+    """
+    meta = partials.load(url)
+    if meta:
+        response = _request_range(request, url, meta['bytes'], meta, kwargs)
+        if response.status_code == 206:
+            download = ResumableDownload(request, url, response, meta['bytes'], partials, kwargs)
+            for validator in ('etag', 'last_modified'):
+                download.meta[validator] = download.meta[validator] or meta.get(validator)
+            return download
+        if response.status_code != 200:
+            response.close()
+            partials.discard(url)
+            response = request(url, **dict(kwargs, stream=True))
+        else:
+            partials.discard(url)
+    else:
+        response = request(url, **dict(kwargs, stream=True))
+
+    stream = open_pdf_stream(response)
+    if stream is None:
+        return None
+    return ResumableDownload(request, url, response, 0, partials, kwargs, head=stream._head, chunks=stream._chunks)
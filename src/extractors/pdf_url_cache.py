@@ -0,0 +1,71 @@
+"""
+Persistent cache of resolved Sci-Hub PDF URLs.
+
+A Sci-Hub download is two round trips: the mirror's HTML page, which names the storage URL
+of the PDF, then the PDF itself. Once a paper has been fetched, its mirror and storage URL
+are remembered here, so a retry, a later run or a re-download of a deleted file goes
+straight to the PDF. Entries are validated by use: a cached URL that no longer serves a PDF
+is dropped and the client falls back to the mirror page.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from utils.utils import get_cache_dir, atomic_write_json
+from extractors.negative_cache import cache_key, DAY
+
+# Storage URLs are stable; entries older than this are re-resolved through the mirror page
+DEFAULT_TTL = 90 * DAY
+
+
+class PDFURLCache:
+    FILENAME = 'scihub_pdf_urls.json'
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL):
+        self.path = path or os.path.join(get_cache_dir(), self.FILENAME)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.entries = self._load()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f).get('urls', {})
+            except (json.JSONDecodeError, IOError, AttributeError):
+                logging.warning(f"Could not read Sci-Hub PDF URL cache {self.path}, starting fresh.")
+        return {}
+
+    def lookup(self, identifier, is_doi=True):
+        """The cached {'mirror', 'pdf_url', 'at'} for an identifier if it has not expired, else None."""
+        with self._lock:
+            entry = self.entries.get(cache_key(identifier, is_doi))
+        if entry is None or time.time() - entry['at'] >= self.ttl:
+            return None
+        return entry
+
+    def record(self, identifier, mirror_url, pdf_url, is_doi=True):
+        with self._lock:
+            self.entries[cache_key(identifier, is_doi)] = {'mirror': mirror_url, 'pdf_url': pdf_url, 'at': time.time()}
+            self._dirty = True
+
+    def discard(self, identifier, is_doi=True):
+        with self._lock:
+            if self.entries.pop(cache_key(identifier, is_doi), None) is not None:
+                self._dirty = True
+
+    def save(self):
+        """Writes the cache (dropping expired entries) if anything changed."""
+        now = time.time()
+        with self._lock:
+            if not self._dirty:
+                return
+            self.entries = {key: e for key, e in self.entries.items() if now - e['at'] < self.ttl}
+            data = {'version': 1, 'urls': dict(self.entries)}
+            self._dirty = False
+        try:
+            atomic_write_json(self.path, data)
+        except OSError as e:
+            logging.warning(f"Could not save Sci-Hub PDF URL cache {self.path}: {e}")
@@ -18,6 +18,7 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from extractors.parsers import parse_scholar_results
 from utils.net_info import NetInfo
+from utils import http_client
 
 
 def wait_for_ip_change():
@@ -248,7 +249,7 @@ def scholar_requests(scholar_pages, url, restrict, chrome_version, scholar_resul
                     use_selenium = False
 
                 try:
-                    response = requests.get(res_url, headers=NetInfo.HEADERS, timeout=30)
+                    response = http_client.get(res_url, headers=NetInfo.HEADERS, timeout=30)
                     html = response.text
                 except requests.exceptions.RequestException as e:
                     print(f"HTTP request failed: {e}")
@@ -7,15 +7,23 @@ Improved with smart error handling and mirror-specific configuration.
 import time
 import json
 import os
+import concurrent.futures
+import copy
+import tempfile
+import threading
+from http.cookiejar import LWPCookieJar, LoadError
 from urllib.parse import urlparse
 import requests
 import urllib3
-from selenium.common.exceptions import TimeoutException
 
 # Use updated names if/when parsers.py is updated
-from extractors.parsers import getSchiHubPDF_xpath, is_scihub_paper_not_available, is_cloudflare_page
+from extractors.pdf_stream import PDFStream, open_pdf_stream, open_resumable
+from extractors.parsers import classify_scihub_page, SCIHUB_NOT_AVAILABLE, SCIHUB_CLOUDFLARE, SCIHUB_PDF_LINK
 from utils.net_info import NetInfo
-from utils.utils import URLjoin
+from utils.utils import URLjoin, get_cache_dir
+from utils import http_client
+from utils.concurrency import KeyedSemaphore
+from extractors.mirror_pool import MirrorPool, MAX_CONSECUTIVE_FAILURES
 
 # Disable SSL warnings (Sci-Hub uses intermediate certificates)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -52,17 +60,173 @@ FAKE_MARK_JSON = json.loads(r'''
 
 
 class SciHubDownloadError(Exception):
-    """Raised when a paper cannot be downloaded from Sci-Hub."""
-    pass
+    """
+    Raised when a paper cannot be downloaded from Sci-Hub. `reason` is the error type
+    shared by every mirror that was tried ('not_available', 'no_pdf_link', ...), or
+    'mixed' / 'mirrors_disabled'.
+    """
+
+    def __init__(self, message, reason=None):
+        super().__init__(message)
+        self.reason = reason
+
+
+# Messages for the error types of _download_via_http when every mirror failed
+ERROR_MESSAGES = {
+    'cloudflare': 'Blocked by Cloudflare',
+    'timeout': 'Request timeout',
+    'no_pdf_link': 'No PDF link found',
+    'invalid_pdf': 'Invalid PDF content',
+    'http_error': 'HTTP error',
+    'other': 'Unknown error'
+}
+
+
+def load_config(config_path="config.json"):
+    """Load the Sci-Hub configuration from config.json."""
+    if os.path.exists(config_path):
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            print("Warning: Failed to parse config.json. Using defaults.")
+
+    # Defaults if config is missing or invalid
+    return {
+        "scihub_mirrors": [
+            {"url": "https://sci-hub.mk", "method": "POST"},
+            {"url": "https://sci-hub.vg", "method": "POST"},
+            {"url": "https://sci-hub.al", "method": "POST"},
+            {"url": "https://sci-hub.shop", "method": "GET"}
+        ],
+        "http_timeout": 15,
+        "page_load_timeout": 20
+    }
+
+
+def mirror_configs(mirrors):
+    """Normalizes a list of mirror URLs and/or {"url", "method"} dicts to dicts."""
+    configs = []
+    for mirror in mirrors:
+        if isinstance(mirror, dict):
+            configs.append(mirror)
+        else:
+            # Determine method based on URL
+            method = "GET" if "shop" in mirror else "POST"
+            configs.append({"url": mirror, "method": method})
+    return configs
+
+
+def classify_mirror_page(status_code, content, page_url):
+    """
+    Interprets a mirror's answer to a DOI/URL request.
+    Returns (pdf_url, error_type, is_pdf) with error_type None, 'not_available', 'http_error',
+    'cloudflare' or 'no_pdf_link'. is_pdf is True when the answer already is the PDF
+    (pdf_url is then page_url); the caller saves `content` instead of fetching it again.
+    """
+    # 504 means the paper is not in the database
+    if status_code == 504:
+        return None, 'not_available', False
+    if status_code >= 400:
+        return None, 'http_error', False
+    page = classify_scihub_page(content, page_url)
+    if page.kind == SCIHUB_NOT_AVAILABLE:
+        return None, 'not_available', False
+    if page.kind == SCIHUB_CLOUDFLARE:
+        return None, 'cloudflare', False
+    if page.kind != SCIHUB_PDF_LINK:
+        return None, 'no_pdf_link', False
+    if page.is_pdf:
+        return page_url, None, True
+
+    pdf_url = page.pdf_url
+
+    # Normalize URL
+    if not urlparse(pdf_url).scheme:
+        base_url = urlparse(page_url)
+        pdf_url = "https:" + pdf_url if pdf_url.startswith('//') else f"{base_url.scheme}://{base_url.netloc}{pdf_url}"
+    return pdf_url, None, False
+
+
+def download_error(errors, identifier):
+    """SciHubDownloadError for a paper every tried mirror failed on (errors in try order)."""
+    first_error = errors[0] if errors else None
+    reason = first_error if len(set(errors)) == 1 else 'mixed'
+    return SciHubDownloadError(f"{ERROR_MESSAGES.get(first_error, 'Failed to download')}: {identifier}", reason=reason)
+
+
+def load_cookies(path, cookie_jar):
+    """Adds the unexpired cookies of the on-disk LWP jar at `path` to `cookie_jar`."""
+    jar = LWPCookieJar(path)
+    try:
+        jar.load(ignore_discard=True)
+    except (OSError, LoadError):
+        return
+    for cookie in jar:
+        cookie_jar.set_cookie(cookie)
+
+
+def save_cookies(path, cookies, ttl):
+    """
+    Writes cookies to the on-disk jar (temp file + rename). Session cookies, which have no
+    expiry of their own, are kept for `ttl` seconds.
+    """
+    expires = int(time.time() + ttl)
+    jar = LWPCookieJar()
+    for cookie in cookies:
+        if cookie.expires is None:
+            cookie = copy.copy(cookie)
+            cookie.expires = expires
+            cookie.discard = False
+        if not cookie.is_expired():
+            jar.set_cookie(cookie)
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.cookies', suffix='.tmp')
+        os.close(fd)
+        jar.save(tmp_path, ignore_discard=True)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def has_cookies(cookies, mirror_url):
+    """True if `cookies` holds an unexpired cookie for the mirror's host."""
+    host = urlparse(mirror_url).hostname or ''
+    return any(host.endswith(cookie.domain.lstrip('.')) and not cookie.is_expired() for cookie in cookies)
+
+
+def _close_stream(future):
+    """Done-callback for hedged requests that lost the race: drops their PDF stream."""
+    try:
+        pdf_stream = future.result()[0]
+    except Exception:
+        return
+    if pdf_stream:
+        pdf_stream.close()
 
 
 class SciHubClient:
-    def __init__(self, scihub_url=None, use_selenium=True, headless=True, selenium_driver=None, preferred_mirrors=None):
+    # Concurrent requests allowed per mirror when several download workers share the client
+    MAX_PER_MIRROR = 2
+    # A mirror failing this many times in a row has its circuit breaker opened (see MirrorPool)
+    MAX_CONSECUTIVE_FAILURES = MAX_CONSECUTIVE_FAILURES
+    # Hedged mode: the next mirror is asked once the current one is slower than this
+    # percentile of its recent latencies (or HEDGE_DEFAULT_DELAY seconds before it has any)
+    HEDGE_PERCENTILE = 90
+    HEDGE_DEFAULT_DELAY = 3.0
+    HEDGE_MIN_DELAY = 0.5
+    # DDOS-Guard cookies are kept on disk; cookies without an expiry are kept this long (seconds)
+    COOKIE_FILENAME = 'scihub_cookies.txt'
+    COOKIE_TTL = 12 * 3600
+
+    def __init__(self, scihub_url=None, use_selenium=True, headless=True, selenium_driver=None, preferred_mirrors=None,
+                 max_per_mirror=None, mirror_pool=None, hedge=False, cookie_path=None, url_cache=None):
         self.use_selenium = use_selenium
         self.headless = headless
         self.selenium_driver = selenium_driver
-        self.session = requests.Session()
-        self.session.headers.update({
+        # Own session (not the shared per-host one): it carries DDOS-Guard cookies and a browser UA
+        self.session = http_client.create_session(headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36'
         })
 
@@ -72,14 +236,7 @@ class SciHubClient:
         # Set up mirror configuration
         if preferred_mirrors:
             # Convert old-style list to new config format
-            self.mirrors = []
-            for mirror in preferred_mirrors:
-                if isinstance(mirror, dict):
-                    self.mirrors.append(mirror)
-                else:
-                    # Determine method based on URL
-                    method = "GET" if "shop" in mirror else "POST"
-                    self.mirrors.append({"url": mirror, "method": method})
+            self.mirrors = mirror_configs(preferred_mirrors)
         else:
             self.mirrors = self.config.get("scihub_mirrors", [])
 
@@ -90,31 +247,29 @@ class SciHubClient:
         self.http_timeout = self.config.get("http_timeout", 15)
         self.page_load_timeout = self.config.get("page_load_timeout", 20)
 
-        # Run DDOS-Guard bypass on first mirror only (quietly)
-        if self.mirrors:
-            self._ddos_guard_bypass(self.mirrors[0]["url"])
+        # Per-mirror concurrency caps and the health-scored pool that orders mirrors (shared by all workers)
+        self.mirror_slots = KeyedSemaphore(max_per_mirror or self.MAX_PER_MIRROR)
+        self.mirror_pool = mirror_pool or MirrorPool(max_failures=self.MAX_CONSECUTIVE_FAILURES)
+
+        # Race slow mirrors against the next one instead of waiting for a timeout
+        self.hedge = hedge
+
+        # PartialDownloads store; when set, PDF bodies are resumable across retries and runs
+        self.partials = None
+
+        # Optional PDFURLCache: papers fetched before skip the mirror page and go to the PDF URL
+        self.url_cache = url_cache
+
+        # DDOS-Guard bypass runs lazily, once per mirror, unless saved cookies are still valid
+        self.cookie_path = cookie_path or os.path.join(get_cache_dir(), self.COOKIE_FILENAME)
+        self._warmed = set()
+        self._warm_slots = KeyedSemaphore(1)
+        self._cookie_lock = threading.Lock()
+        self._load_cookies()
 
     def _load_config(self):
         """Load configuration from config.json."""
-        config_path = "config.json"
-        if os.path.exists(config_path):
-            try:
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                print("Warning: Failed to parse config.json. Using defaults.")
-        
-        # Defaults if config is missing or invalid
-        return {
-            "scihub_mirrors": [
-                {"url": "https://sci-hub.mk", "method": "POST"},
-                {"url": "https://sci-hub.vg", "method": "POST"},
-                {"url": "https://sci-hub.al", "method": "POST"},
-                {"url": "https://sci-hub.shop", "method": "GET"}
-            ],
-            "http_timeout": 15,
-            "page_load_timeout": 20
-        }
+        return load_config()
 
     def _ddos_guard_bypass(self, url):
         """Attempts to bypass DDOS-Guard by mimicking SciHubEVA's request sequence."""
@@ -139,18 +294,72 @@ class SciHubClient:
         except Exception:
             return False
 
+    def _load_cookies(self):
+        load_cookies(self.cookie_path, self.session.cookies)
+
+    def _save_cookies(self):
+        with self._cookie_lock:
+            save_cookies(self.cookie_path, self.session.cookies, self.COOKIE_TTL)
+
+    def _has_cookies(self, mirror_url):
+        return has_cookies(self.session.cookies, mirror_url)
+
+    def _ensure_warm(self, mirror_url):
+        """
+        Runs the DDOS-Guard bypass the first time a mirror is used, unless the cookie jar
+        (possibly filled by a background warm-up) already holds valid cookies for it.
+        """
+        if mirror_url in self._warmed:
+            return
+        with self._warm_slots.slot(mirror_url):
+            if mirror_url in self._warmed:
+                return
+            self._load_cookies()
+            if not self._has_cookies(mirror_url) and self._ddos_guard_bypass(mirror_url):
+                self._save_cookies()
+            self._warmed.add(mirror_url)
+
+    def warm_up(self):
+        """Warms every usable mirror, best first (see start_warm_up for the background variant)."""
+        for mirror_config in self._get_available_mirrors():
+            self.mirror_pool.release_probe(mirror_config["url"])
+            self._ensure_warm(mirror_config["url"])
+
     def _is_valid_pdf(self, content):
         if not content or len(content) < 4:
             return False
         return content[:4] == b'%PDF'
 
     def _get_available_mirrors(self):
-        return self.mirrors[:4]
+        """Mirrors to try for the next paper, best first; mirrors with an open breaker are left out."""
+        by_url = {m["url"]: m for m in self.mirrors}
+        ordered = self.mirror_pool.ordered(list(by_url))
+        for url in ordered[4:]:
+            self.mirror_pool.release_probe(url)
+        return [by_url[url] for url in ordered[:4]]
+
+    @property
+    def disabled_mirrors(self):
+        """Mirrors whose circuit breaker is currently open."""
+        return {m["url"] for m in self.mirrors if self.mirror_pool.is_open(m["url"])}
+
+    def all_mirrors_disabled(self):
+        return bool(self.mirrors) and len(self.disabled_mirrors) == len(self.mirrors)
+
+    def _record_mirror_result(self, mirror_url, error_type, latency=0.0):
+        """
+        Feeds one request's outcome to the mirror pool. A 'not_available' answer counts as
+        healthy: the mirror responded, it just does not have the paper.
+        """
+        if self.mirror_pool.record(mirror_url, error_type, latency):
+            print(f"  [Sci-Hub] {mirror_url} failed {self.MAX_CONSECUTIVE_FAILURES} times in a row, "
+                  f"pausing it (it is probed again after a cooldown).")
 
     def _download_via_http(self, identifier, mirror_config, is_doi=True, retry_on_cloudflare=True):
         """
         Attempt to download from a single mirror using its preferred method.
-        Returns: (pdf_content, source_url, error_type)
+        Returns: (pdf_stream, source_url, error_type); pdf_stream is an open PDFStream
+        that the caller saves (see downloader.save_file) or closes.
         error_type: None, 'not_available', 'cloudflare', 'timeout', 'not_found', 'no_pdf_link', 'other'
         """
         mirror_url = mirror_config["url"]
@@ -165,46 +374,23 @@ class SciHubClient:
                 url = URLjoin(mirror_url.rstrip('/'), identifier)
                 response = self.session.get(url, verify=False, timeout=self.http_timeout)
 
-            # Check for 504 (paper not in database)
-            if response.status_code == 504:
-                return None, None, 'not_available'
+            pdf_url, error_type, is_pdf = classify_mirror_page(response.status_code, response.content, response.url)
+            if error_type == 'cloudflare' and retry_on_cloudflare:
+                # Wait a moment and retry once
+                import sys
+                print(f"  [Sci-Hub] Cloudflare detected on {mirror_url}, retrying...", file=sys.stderr)
+                time.sleep(2)
+                return self._download_via_http(identifier, mirror_config, is_doi, retry_on_cloudflare=False)
+            if error_type:
+                return None, None, error_type
+            if is_pdf:
+                # The mirror answered with the PDF itself: save the body already received
+                return PDFStream(response, response.content, iter(())), pdf_url, None
+
+            pdf_stream = self._open_pdf(pdf_url)
+            if pdf_stream:
+                return pdf_stream, pdf_stream.url, None
 
-            response.raise_for_status()
-
-            # Check if paper is not available in database
-            if is_scihub_paper_not_available(response.content):
-                return None, None, 'not_available'
-
-            # Check for Cloudflare blocking
-            if is_cloudflare_page(response.content):
-                if retry_on_cloudflare:
-                    # Wait a moment and retry once
-                    import sys
-                    print(f"  [Sci-Hub] Cloudflare detected on {mirror_url}, retrying...", file=sys.stderr)
-                    time.sleep(2)
-                    return self._download_via_http(identifier, mirror_config, is_doi, retry_on_cloudflare=False)
-                
-                return None, None, 'cloudflare'
-
-            # Extract PDF URL using XPath
-            pdf_url = getSchiHubPDF_xpath(response.content)
-
-            if not pdf_url:
-                return None, None, 'no_pdf_link'
-
-            # Normalize URL
-            parsed_pdf_url = urlparse(pdf_url)
-            if not parsed_pdf_url.scheme:
-                base_url = urlparse(response.url)
-                pdf_url = "https:" + pdf_url if pdf_url.startswith('//') else f"{base_url.scheme}://{base_url.netloc}{pdf_url}"
-
-            # Download the actual PDF
-            pdf_response = self.session.get(pdf_url, verify=False, timeout=self.http_timeout)
-            pdf_response.raise_for_status()
-
-            if self._is_valid_pdf(pdf_response.content):
-                return pdf_response.content, pdf_response.url, None
-            
             return None, None, 'invalid_pdf'
 
         except requests.exceptions.Timeout:
@@ -216,45 +402,155 @@ class SciHubClient:
         except Exception:
             return None, None, 'other'
 
+    def _open_pdf(self, pdf_url):
+        """Streams the actual PDF; anything that does not start with %PDF is dropped unread (None)."""
+        if self.partials:
+            return open_resumable(self._get_pdf, pdf_url, self.partials)
+        return open_pdf_stream(self._get_pdf(pdf_url, stream=True))
+
+    def _download_cached(self, identifier, is_doi):
+        """
+        Fetches the PDF URL a mirror page gave for this paper before, skipping the page.
+        Returns (pdf_stream, source_url, mirror_url), or None (entry dropped) if the cached
+        URL is missing or no longer serves a PDF.
+        """
+        entry = self.url_cache.lookup(identifier, is_doi) if self.url_cache else None
+        if entry is None:
+            return None
+        try:
+            self._ensure_warm(entry['mirror'])
+            with self.mirror_slots.slot(entry['mirror']):
+                pdf_stream = self._open_pdf(entry['pdf_url'])
+        except Exception:
+            pdf_stream = None
+        if pdf_stream:
+            return pdf_stream, pdf_stream.url, entry['mirror']
+        self.url_cache.discard(identifier, is_doi)
+        return None
+
+    def _get_pdf(self, url, **kwargs):
+        """GET for PDF bodies; HTTP errors raise, except 416 which open_resumable handles."""
+        response = self.session.get(url, verify=False, timeout=self.http_timeout, **kwargs)
+        if response.status_code >= 400 and response.status_code != 416:
+            response.raise_for_status()
+        return response
+
     def _download_via_selenium(self, identifier, is_doi=True):
         # Selenium fallback disabled for now - HTTP method is sufficient
         return None, None, 'selenium_disabled'
 
-    def download(self, identifier, is_doi=True):
+    def _attempt(self, identifier, mirror_config, is_doi):
+        """One request to one mirror, inside the mirror's slot; the outcome feeds the mirror pool."""
+        self._ensure_warm(mirror_config["url"])
+        with self.mirror_slots.slot(mirror_config["url"]):
+            start = time.monotonic()
+            result = self._download_via_http(identifier, mirror_config, is_doi)
+        self._record_mirror_result(mirror_config["url"], result[2], time.monotonic() - start)
+        return result
+
+    def _hedge_delay(self, mirror_url):
+        delay = self.mirror_pool.latency_percentile(mirror_url, self.HEDGE_PERCENTILE)
+        return max(self.HEDGE_MIN_DELAY, delay if delay is not None else self.HEDGE_DEFAULT_DELAY)
+
+    def _download_sequential(self, identifier, mirrors, is_doi):
+        """Tries mirrors one after another. Returns (pdf_stream, source_url, mirror_url, errors)."""
+        errors = []
+        tried = 0
+        try:
+            for mirror_config in mirrors:
+                tried += 1
+                pdf_stream, source_url, error_type = self._attempt(identifier, mirror_config, is_doi)
+
+                if pdf_stream:
+                    return pdf_stream, source_url, mirror_config["url"], None
+
+                errors.append(error_type)
+
+                # Smart error handling: don't try other mirrors if paper is not available
+                if error_type == 'not_available':
+                    # Paper not in database, no point trying other mirrors
+                    raise SciHubDownloadError("Paper not available in Sci-Hub database", reason='not_available')
+        finally:
+            # Half-open probes handed to this call but not reached
+            for mirror_config in mirrors[tried:]:
+                self.mirror_pool.release_probe(mirror_config["url"])
+        return None, None, None, errors
+
+    def _download_hedged(self, identifier, mirrors, is_doi):
         """
-        Download a paper with smart mirror fallback.
-        Returns: (pdf_content, source_url, mirror_url)
-        Raises: SciHubDownloadError with specific error message
+        Races mirrors: the next mirror gets the same request when the current one has not
+        answered within its hedge delay, or right away when it fails. The first PDF wins;
+        PDFs from requests still in flight are closed as they arrive. A 'not available'
+        answer still ends the search. Returns (pdf_stream, source_url, mirror_url, errors).
         """
-        available_mirrors = self._get_available_mirrors()
-        first_error = None
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(mirrors))
+        pending = {}
+        launched = 0
+        errors = []
+
+        def launch():
+            nonlocal launched
+            mirror_config = mirrors[launched]
+            launched += 1
+            pending[executor.submit(self._attempt, identifier, mirror_config, is_doi)] = mirror_config
 
-        for mirror_config in available_mirrors:
-            pdf_content, source_url, error_type = self._download_via_http(identifier, mirror_config, is_doi)
+        try:
+            launch()
+            while pending:
+                delay = self._hedge_delay(mirrors[launched - 1]["url"]) if launched < len(mirrors) else None
+                done, _ = concurrent.futures.wait(pending, timeout=delay,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                if not done:
+                    launch()
+                    continue
+                results = [(pending.pop(future), future.result()) for future in done]
+                winners = [(mirror_config, result) for mirror_config, result in results if result[0]]
+                if winners:
+                    (mirror_config, (pdf_stream, source_url, _)), losers = winners[0], winners[1:]
+                    for _, result in losers:
+                        result[0].close()
+                    return pdf_stream, source_url, mirror_config["url"], None
+                for _, (_, _, error_type) in results:
+                    errors.append(error_type)
+                    if error_type == 'not_available':
+                        raise SciHubDownloadError("Paper not available in Sci-Hub database", reason='not_available')
+                    if launched < len(mirrors):
+                        launch()
+            return None, None, None, errors
+        finally:
+            for future in pending:
+                future.add_done_callback(_close_stream)
+            for mirror_config in mirrors[launched:]:
+                self.mirror_pool.release_probe(mirror_config["url"])
+            executor.shutdown(wait=False)
 
-            if pdf_content:
-                return pdf_content, source_url, mirror_config["url"]
+    def download(self, identifier, is_doi=True):
+        """
+        Download a paper with smart mirror fallback (or, with hedge, by racing mirrors).
+        A PDF URL cached from an earlier download is tried first, without the mirror page.
+        Returns: (pdf_stream, source_url, mirror_url)
+        Raises: SciHubDownloadError with specific error message
+        """
+        cached = self._download_cached(identifier, is_doi)
+        if cached:
+            return cached
 
-            # Remember first error
-            if first_error is None:
-                first_error = error_type
+        available_mirrors = self._get_available_mirrors()
+        if not available_mirrors:
+            raise SciHubDownloadError("All Sci-Hub mirrors disabled after repeated failures", reason='mirrors_disabled')
 
-            # Smart error handling: don't try other mirrors if paper is not available
-            if error_type == 'not_available':
-                # Paper not in database, no point trying other mirrors
-                raise SciHubDownloadError("Paper not available in Sci-Hub database")
+        if self.hedge and len(available_mirrors) > 1:
+            pdf_stream, source_url, mirror_url, errors = self._download_hedged(identifier, available_mirrors, is_doi)
+        else:
+            pdf_stream, source_url, mirror_url, errors = self._download_sequential(identifier, available_mirrors, is_doi)
+        if pdf_stream:
+            # A PDF posted back by the mirror's form endpoint has no URL of its own to reuse
+            if self.url_cache is not None and source_url.rstrip('/') != mirror_url.rstrip('/'):
+                self.url_cache.record(identifier, mirror_url, source_url, is_doi)
+            return pdf_stream, source_url, mirror_url
 
         # All mirrors failed
-        error_msg = {
-            'cloudflare': 'Blocked by Cloudflare',
-            'timeout': 'Request timeout',
-            'no_pdf_link': 'No PDF link found',
-            'invalid_pdf': 'Invalid PDF content',
-            'http_error': 'HTTP error',
-            'other': 'Unknown error'
-        }.get(first_error, 'Failed to download')
-
-        raise SciHubDownloadError(f"{error_msg}: {identifier}")
+        raise download_error(errors, identifier)
 
     def close(self):
         """Clean up resources gracefully."""
@@ -271,8 +567,35 @@ class SciHubClient:
                 # Ignore handle errors on Windows
                 pass
 
-        # Close requests session
+        # Keep the DDOS-Guard cookies for the next run, then close the requests session
+        if self._warmed:
+            self._save_cookies()
         try:
             self.session.close()
         except Exception:
             pass
+
+        self.mirror_pool.save()
+        if self.url_cache is not None:
+            self.url_cache.save()
+
+
+def start_warm_up(preferred_mirrors=None, cookie_path=None):
+    """
+    Warms Sci-Hub mirrors on a daemon thread (e.g. while the search and ranking run). The
+    cookies land in the on-disk jar, where the download phase's SciHubClient picks them up.
+    Returns the thread.
+    """
+    def run():
+        client = SciHubClient(use_selenium=False, preferred_mirrors=preferred_mirrors, cookie_path=cookie_path)
+        try:
+            client.warm_up()
+        finally:
+            try:
+                client.session.close()
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=run, name='scihub-warm-up', daemon=True)
+    thread.start()
+    return thread
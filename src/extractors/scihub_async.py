@@ -0,0 +1,281 @@
+"""
+Asyncio Sci-Hub client.
+
+AsyncSciHubClient has the same download(identifier, is_doi) contract and error taxonomy as
+SciHubClient ('not_available', 'cloudflare', 'timeout', 'no_pdf_link', 'invalid_pdf', ...,
+raised as SciHubDownloadError with the same reasons), but runs on one httpx.AsyncClient.
+With HTTP/2 (the optional h2 package) many DOI lookups are multiplexed over a single
+connection per mirror instead of one connection per worker thread.
+
+It shares the mirror pool, the DDOS-Guard cookie jar and the page classification with
+SciHubClient. httpx is optional: install it with `pip install "httpx[http2]"`. This is a
+library entry point only; the CLI and downloader still use the threaded SciHubClient.
+
+    async with AsyncSciHubClient(preferred_mirrors=mirrors) as client:
+        results = await download_all(client, [(doi, path), ...])
+"""
+import asyncio
+import os
+import tempfile
+import time
+from utils.utils import URLjoin, get_cache_dir
+from extractors.pdf_stream import CHUNK_SIZE, PDF_SIGNATURE
+from extractors.mirror_pool import MirrorPool, MAX_CONSECUTIVE_FAILURES
+from extractors.scihub import (SciHubClient, SciHubDownloadError, FAKE_MARK_JSON, load_config, mirror_configs,
+                               classify_mirror_page, download_error, load_cookies, save_cookies, has_cookies)
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (optional, enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+              'Chrome/96.0.4664.110 Safari/537.36')
+
+
+class AsyncPDFStream:
+    """Async iterable over a response body whose first bytes were checked to be a PDF."""
+
+    def __init__(self, response, head, chunks):
+        self.response = response
+        self.url = str(response.url)
+        self._head = head
+        self._chunks = chunks
+
+    async def __aiter__(self):
+        yield self._head
+        async for chunk in self._chunks:
+            if chunk:
+                yield chunk
+
+    async def aclose(self):
+        try:
+            await self.response.aclose()
+        except Exception:
+            pass
+
+
+async def _no_chunks():
+    return
+    yield
+
+
+async def open_pdf_stream_async(response, chunk_size=CHUNK_SIZE):
+    """Async counterpart of pdf_stream.open_pdf_stream: an AsyncPDFStream, or None if not a PDF."""
+    if response.status_code != 200:
+        await response.aclose()
+        return None
+    chunks = response.aiter_bytes(chunk_size)
+    head = b''
+    async for chunk in chunks:
+        head += chunk
+        if len(head) >= len(PDF_SIGNATURE):
+            break
+    if not head.startswith(PDF_SIGNATURE):
+        await response.aclose()
+        return None
+    return AsyncPDFStream(response, head, chunks)
+
+
+async def write_atomic_async(file_name, pdf_stream):
+    """Streams an AsyncPDFStream into `file_name` via a temp file and an atomic rename."""
+    directory = os.path.dirname(os.path.abspath(file_name))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.part')
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            async for chunk in pdf_stream:
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(tmp_path, file_name)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        await pdf_stream.aclose()
+    return size
+
+
+class AsyncSciHubClient:
+    # Concurrent lookups per mirror; with HTTP/2 they share one connection
+    MAX_PER_MIRROR = 8
+    MAX_CONSECUTIVE_FAILURES = MAX_CONSECUTIVE_FAILURES
+    COOKIE_TTL = SciHubClient.COOKIE_TTL
+
+    def __init__(self, preferred_mirrors=None, http_timeout=None, max_per_mirror=None, mirror_pool=None,
+                 cookie_path=None, http2=True, transport=None):
+        if httpx is None:
+            raise ImportError('AsyncSciHubClient needs httpx: pip install "httpx[http2]"')
+        config = load_config()
+        self.mirrors = mirror_configs(preferred_mirrors or config.get("scihub_mirrors", []))
+        self.http_timeout = http_timeout or config.get("http_timeout", 15)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.max_per_mirror = max_per_mirror or self.MAX_PER_MIRROR
+        self.mirror_pool = mirror_pool or MirrorPool(max_failures=self.MAX_CONSECUTIVE_FAILURES)
+        self.cookie_path = cookie_path or os.path.join(get_cache_dir(), SciHubClient.COOKIE_FILENAME)
+        # verify=False: Sci-Hub uses intermediate certificates (see SciHubClient)
+        self.client = httpx.AsyncClient(http2=self.http2, verify=False, timeout=self.http_timeout,
+                                        follow_redirects=True, headers={'User-Agent': USER_AGENT},
+                                        transport=transport)
+        load_cookies(self.cookie_path, self.client.cookies.jar)
+        self._semaphores = {}
+        self._warm_locks = {}
+        self._warmed = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _slot(self, mirror_url):
+        semaphore = self._semaphores.get(mirror_url)
+        if semaphore is None:
+            semaphore = self._semaphores[mirror_url] = asyncio.Semaphore(self.max_per_mirror)
+        return semaphore
+
+    async def _ddos_guard_bypass(self, url):
+        """Async version of SciHubClient._ddos_guard_bypass."""
+        try:
+            check_resp = await self.client.get(url)
+            if not (check_resp.status_code == 403 or 'ddos-guard' in check_resp.headers.get('server', '').lower()):
+                return True
+            await self.client.get(f'{url.rstrip("/")}/.well-known/ddos-guard/check?context=free_splash')
+            await self.client.post(f'{url.rstrip("/")}/.well-known/ddos-guard/mark/', json=FAKE_MARK_JSON)
+            final_check = await self.client.get(url)
+            return final_check.status_code != 403
+        except Exception:
+            return False
+
+    async def _ensure_warm(self, mirror_url):
+        """Runs the DDOS-Guard bypass once per mirror unless the cookie jar covers it."""
+        if mirror_url in self._warmed:
+            return
+        lock = self._warm_locks.setdefault(mirror_url, asyncio.Lock())
+        async with lock:
+            if mirror_url in self._warmed:
+                return
+            if not has_cookies(self.client.cookies.jar, mirror_url) and await self._ddos_guard_bypass(mirror_url):
+                save_cookies(self.cookie_path, self.client.cookies.jar, self.COOKIE_TTL)
+            self._warmed.add(mirror_url)
+
+    async def _download_via_http(self, identifier, mirror_config, retry_on_cloudflare=True):
+        """
+        Attempt to download from a single mirror. Returns (pdf_stream, source_url, error_type)
+        like SciHubClient._download_via_http; pdf_stream is an AsyncPDFStream.
+        """
+        mirror_url = mirror_config["url"]
+        try:
+            if mirror_config["method"] == "POST":
+                response = await self.client.post(mirror_url, data={'request': identifier})
+            else:
+                response = await self.client.get(URLjoin(mirror_url.rstrip('/'), identifier))
+
+            pdf_url, error_type, is_pdf = classify_mirror_page(response.status_code, response.content,
+                                                               str(response.url))
+            if error_type == 'cloudflare' and retry_on_cloudflare:
+                await asyncio.sleep(2)
+                return await self._download_via_http(identifier, mirror_config, retry_on_cloudflare=False)
+            if error_type:
+                return None, None, error_type
+            if is_pdf:
+                # The mirror answered with the PDF itself: save the body already received
+                return AsyncPDFStream(response, response.content, _no_chunks()), pdf_url, None
+
+            pdf_response = await self.client.send(self.client.build_request('GET', pdf_url), stream=True)
+            if pdf_response.status_code >= 400:
+                await pdf_response.aclose()
+                return None, None, 'http_error'
+            pdf_stream = await open_pdf_stream_async(pdf_response)
+            if pdf_stream:
+                return pdf_stream, pdf_stream.url, None
+            return None, None, 'invalid_pdf'
+
+        except httpx.TimeoutException:
+            return None, None, 'timeout'
+        except httpx.HTTPError:
+            return None, None, 'http_error'
+        except Exception:
+            return None, None, 'other'
+
+    async def download(self, identifier, is_doi=True):
+        """
+        Download a paper with mirror fallback, best mirror first.
+        Returns: (pdf_stream, source_url, mirror_url); pdf_stream is an AsyncPDFStream
+        to pass to write_atomic_async (or aclose).
+        Raises: SciHubDownloadError with the same reasons as SciHubClient.download
+        """
+        urls = self.mirror_pool.ordered([m["url"] for m in self.mirrors])
+        by_url = {m["url"]: m for m in self.mirrors}
+        available = [by_url[url] for url in urls[:4]]
+        for url in urls[4:]:
+            self.mirror_pool.release_probe(url)
+        if not available:
+            raise SciHubDownloadError("All Sci-Hub mirrors disabled after repeated failures", reason='mirrors_disabled')
+
+        errors = []
+        tried = 0
+        try:
+            for mirror_config in available:
+                tried += 1
+                await self._ensure_warm(mirror_config["url"])
+                async with self._slot(mirror_config["url"]):
+                    start = time.monotonic()
+                    pdf_stream, source_url, error_type = await self._download_via_http(identifier, mirror_config)
+                if self.mirror_pool.record(mirror_config["url"], error_type, time.monotonic() - start):
+                    print(f"  [Sci-Hub] {mirror_config['url']} failed {self.MAX_CONSECUTIVE_FAILURES} times in a row, "
+                          f"pausing it (it is probed again after a cooldown).")
+                if pdf_stream:
+                    return pdf_stream, source_url, mirror_config["url"]
+                errors.append(error_type)
+                if error_type == 'not_available':
+                    raise SciHubDownloadError("Paper not available in Sci-Hub database", reason='not_available')
+        finally:
+            for mirror_config in available[tried:]:
+                self.mirror_pool.release_probe(mirror_config["url"])
+
+        raise download_error(errors, identifier)
+
+    async def download_to(self, identifier, file_name, is_doi=True):
+        """Downloads a paper straight into `file_name`. Returns the mirror URL."""
+        pdf_stream, _, mirror_url = await self.download(identifier, is_doi)
+        await write_atomic_async(file_name, pdf_stream)
+        return mirror_url
+
+    async def close(self):
+        if self._warmed:
+            save_cookies(self.cookie_path, self.client.cookies.jar, self.COOKIE_TTL)
+        await self.client.aclose()
+        self.mirror_pool.save()
+
+
+async def download_all(client, jobs, concurrency=32):
+    """
+    Async download pipeline: runs `jobs` ((identifier, file_name) or
+    (identifier, file_name, is_doi) tuples) with at most `concurrency` in flight.
+    Returns one result per job, in order: the mirror URL, or the SciHubDownloadError.
+    Unexpected exceptions of one job are wrapped as SciHubDownloadError(reason='error')
+    so they do not abort the other downloads.
+    """
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run(job):
+        identifier, file_name, is_doi = (tuple(job) + (True,))[:3]
+        async with limit:
+            try:
+                return await client.download_to(identifier, file_name, is_doi)
+            except SciHubDownloadError as e:
+                return e
+            except Exception as e:
+                error = SciHubDownloadError(f"Failed to download: {identifier} ({e})", reason='error')
+                error.__cause__ = e
+                return error
+
+    return await asyncio.gather(*(run(job) for job in jobs))
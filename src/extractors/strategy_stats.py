@@ -0,0 +1,194 @@
+"""
+Per-host and per-DOI-prefix download strategy statistics persisted across runs.
+
+Every download attempt (direct link, open-access candidate, Scholar PDF link, Sci-Hub by
+DOI, Sci-Hub by Scholar link) with a definitive outcome (a PDF, not available, not a PDF)
+is recorded under the keys of the paper it was made for: its DOI prefix, and for the direct
+link attempt also the host of that link (Sci-Hub, open-access and Scholar attempts do not
+touch that host). Timeouts, unreachable hosts, disabled mirrors and download-limit cutoffs
+say nothing about the strategy and are not recorded. order() uses the numbers to run the
+attempts that are most likely to produce a PDF per second spent first, and skips attempt
+types that keep returning something other than a PDF for a host or prefix, apart from an
+occasional exploration attempt. "Not available" is a fact about one paper (the negative
+cache keeps it per DOI), so it lowers a strategy's success rate but never makes it skipped.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import urllib.parse
+from core.merge_index import normalize_doi
+from utils.utils import get_cache_dir, atomic_write_json
+
+DIRECT = 'direct'
+OPEN_ACCESS = 'open_access'
+SCHOLAR_PDF = 'scholar_pdf'
+SCIHUB_DOI = 'scihub_doi'
+SCIHUB_LINK = 'scihub_link'
+
+# Default attempt order with prior (success rate, seconds per attempt). The priors keep
+# this order until real numbers come in: success / seconds decreases along the list.
+PRIORS = {
+    DIRECT: (0.5, 2.0),
+    OPEN_ACCESS: (0.5, 3.0),
+    SCHOLAR_PDF: (0.4, 3.0),
+    SCIHUB_DOI: (0.6, 8.0),
+    SCIHUB_LINK: (0.3, 10.0),
+}
+STRATEGIES = tuple(PRIORS)
+
+# Definitive attempt outcomes, the only ones recorded
+SUCCESS = 'success'
+NOT_AVAILABLE = 'not_available'
+INVALID_PDF = 'invalid_pdf'
+DEFINITIVE_OUTCOMES = (SUCCESS, NOT_AVAILABLE, INVALID_PDF)
+
+STRATEGY_LABELS = {
+    DIRECT: "direct link",
+    OPEN_ACCESS: "open-access links",
+    SCHOLAR_PDF: "Scholar PDF link",
+    SCIHUB_DOI: "Sci-Hub (DOI)",
+    SCIHUB_LINK: "Sci-Hub (Scholar link)",
+}
+
+# Pseudo-attempts the prior is worth when blended with recorded attempts
+PRIOR_WEIGHT = 2
+# Weight of the newest attempt in the latency moving average
+EWMA_ALPHA = 0.3
+# Strategies whose outcomes are also recorded under the direct link's host key
+HOST_STRATEGIES = (DIRECT,)
+
+# A strategy is skipped for a key after this many invalid-PDF outcomes without a single success...
+SKIP_AFTER_FAILURES = 5
+# ...until it has not been tried there for this long
+RETRY_AFTER = 7 * 24 * 3600
+# Every this many skips, a skipped strategy is tried once more (last) to see if it recovered
+EXPLORE_EVERY = 10
+
+
+def _ewma(previous, value):
+    return value if previous is None else EWMA_ALPHA * value + (1 - EWMA_ALPHA) * previous
+
+
+def keys_for(keys, strategy):
+    """The statistics keys that apply to `strategy`: host keys only for HOST_STRATEGIES."""
+    if strategy in HOST_STRATEGIES:
+        return keys
+    return [key for key in keys if not key.startswith('host:')]
+
+
+def strategy_keys(paper):
+    """Statistics keys of a paper: 'host:<direct link host>' and 'prefix:<DOI prefix>'."""
+    keys = []
+    if paper.pdf_link:
+        host = urllib.parse.urlparse(paper.pdf_link).netloc.lower()
+        if host:
+            keys.append('host:' + host)
+    if paper.DOI:
+        keys.append('prefix:' + normalize_doi(paper.DOI).split('/', 1)[0])
+    return keys
+
+
+class StrategyStats:
+    FILENAME = 'download_strategies.json'
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_cache_dir(), self.FILENAME)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.keys = self._load()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f).get('keys', {})
+            except (json.JSONDecodeError, IOError, AttributeError):
+                logging.warning(f"Could not read download strategy stats {self.path}, starting fresh.")
+        return {}
+
+    def record(self, keys, strategy, outcome, latency):
+        """Records one attempt of `strategy` (a DEFINITIVE_OUTCOMES outcome) for a paper with statistics `keys`."""
+        with self._lock:
+            for key in keys_for(keys, strategy):
+                entry = self.keys.setdefault(key, {}).setdefault(strategy, {
+                    'attempts': 0, 'successes': 0, 'latency_ewma': None, 'last_attempt': None,
+                })
+                entry['attempts'] += 1
+                entry['successes'] += outcome == SUCCESS
+                entry['invalid'] = entry.get('invalid', 0) + (outcome == INVALID_PDF)
+                entry['latency_ewma'] = _ewma(entry['latency_ewma'], latency)
+                entry['last_attempt'] = time.time()
+            self._dirty = True
+
+    def estimate(self, keys, strategy):
+        """(success rate, seconds per attempt) for a strategy, blending the prior with the keys' numbers."""
+        prior_rate, prior_latency = PRIORS[strategy]
+        attempts = successes = 0
+        latencies = []
+        with self._lock:
+            for key in keys_for(keys, strategy):
+                entry = self.keys.get(key, {}).get(strategy)
+                if entry:
+                    attempts += entry['attempts']
+                    successes += entry['successes']
+                    if entry['latency_ewma'] is not None:
+                        latencies.append(entry['latency_ewma'])
+        rate = (successes + PRIOR_WEIGHT * prior_rate) / (attempts + PRIOR_WEIGHT)
+        latency = sum(latencies) / len(latencies) if latencies else prior_latency
+        return rate, max(latency, 0.05)
+
+    def failing_key(self, keys, strategy):
+        """The first key `strategy` has only ever returned non-PDFs for (recently), or None."""
+        now = time.time()
+        with self._lock:
+            for key in keys_for(keys, strategy):
+                entry = self.keys.get(key, {}).get(strategy)
+                if (entry and entry['successes'] == 0 and entry.get('invalid', 0) >= SKIP_AFTER_FAILURES
+                        and now - entry['last_attempt'] < RETRY_AFTER):
+                    return key
+        return None
+
+    def _explore(self, key, strategy):
+        """Counts a skip of `strategy` for `key`; True on every EXPLORE_EVERY-th one."""
+        with self._lock:
+            entry = self.keys[key][strategy]
+            entry['skips'] = entry.get('skips', 0) + 1
+            self._dirty = True
+            return entry['skips'] % EXPLORE_EVERY == 0
+
+    def order(self, keys, strategies):
+        """
+        Orders the applicable `strategies` for a paper to minimize the expected time to a PDF
+        (highest success rate per second first). Returns (ordered, skipped) where skipped
+        maps each learned failure to the key it failed for. A learned failure that is due
+        for exploration is not skipped but put last.
+        """
+        skipped = {}
+        explored = []
+        for strategy in strategies:
+            key = self.failing_key(keys, strategy)
+            if key:
+                if self._explore(key, strategy):
+                    explored.append(strategy)
+                else:
+                    skipped[strategy] = key
+
+        def value(strategy):
+            rate, latency = self.estimate(keys, strategy)
+            return rate / latency
+
+        remaining = [s for s in strategies if s not in skipped and s not in explored]
+        return sorted(remaining, key=value, reverse=True) + explored, skipped
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'version': 1, 'keys': self.keys}
+            self._dirty = False
+            try:
+                atomic_write_json(self.path, data)
+            except OSError as e:
+                logging.warning(f"Could not save download strategy stats {self.path}: {e}")
@@ -0,0 +1,201 @@
+"""
+Cheap PDF URL probing.
+
+Before a direct link is downloaded, URLProber asks for its first KB only (a
+`Range: bytes=0-1023` GET, read no further even if the server ignores the range) and
+classifies the answer: a PDF, an HTML landing page, a paywall, a PDF larger than the
+size limit, or a dead link. Verdicts are cached per URL across runs, and per host
+pattern (host plus first path segment): a pattern that never served a PDF in
+PATTERN_MIN_SAMPLES probes is predicted without any request. Only URLs judged to be
+PDFs are downloaded in full.
+"""
+import concurrent.futures
+import json
+import logging
+import os
+import threading
+import time
+import urllib.parse
+from utils import http_client
+from utils.concurrency import KeyedSemaphore
+from utils.utils import get_cache_dir, atomic_write_json
+from extractors.pdf_stream import PDF_SIGNATURE
+
+DAY = 24 * 3600
+
+PDF = 'pdf'
+LANDING_PAGE = 'landing_page'
+PAYWALL = 'paywall'
+TOO_LARGE = 'too_large'
+BROKEN = 'broken'
+# Timeouts, connection errors, 5xx: says nothing about the URL, never cached
+UNREACHABLE = 'unreachable'
+
+VERDICT_LABELS = {
+    PDF: "PDF",
+    LANDING_PAGE: "HTML landing page",
+    PAYWALL: "paywall",
+    TOO_LARGE: "PDF over the size limit",
+    BROKEN: "dead link",
+    UNREACHABLE: "unreachable",
+}
+
+# Seconds a verdict is remembered per URL
+VERDICT_TTLS = {
+    PDF: 30 * DAY,
+    LANDING_PAGE: 7 * DAY,
+    PAYWALL: 7 * DAY,
+    TOO_LARGE: 30 * DAY,
+    BROKEN: 3 * DAY,
+}
+
+PROBE_BYTES = 1024
+MAX_PDF_BYTES = 200 * 1024 * 1024
+PAYWALL_STATUSES = {401, 402, 403}
+BROKEN_STATUSES = {404, 410}
+PAYWALL_MARKERS = (b'purchase this article', b'buy this article', b'rent this article', b'subscribe to',
+                   b'access through your institution', b'get access', b'log in to access')
+
+# A host pattern is predicted after this many probes without a single PDF
+PATTERN_MIN_SAMPLES = 5
+# Pattern counts are halved past this total so hosts that change are relearned
+PATTERN_MAX_SAMPLES = 50
+
+
+def host_pattern(url):
+    """'host/first-path-segment' of a URL, the unit verdicts are generalized over."""
+    parsed = urllib.parse.urlparse(url)
+    segment = parsed.path.strip('/').split('/', 1)[0]
+    return f"{parsed.netloc.lower()}/{segment}"
+
+
+def body_length(response):
+    """Full body size from Content-Range (206) or Content-Length (200), if known."""
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range and not content_range.endswith('/*'):
+        total = content_range.rsplit('/', 1)[1]
+        return int(total) if total.isdigit() else None
+    if response.status_code == 200:
+        length = response.headers.get('Content-Length', '')
+        return int(length) if length.isdigit() else None
+    return None
+
+
+def classify_probe(status_code, head, total_length=None, max_bytes=MAX_PDF_BYTES):
+    """Verdict for a probe response given its status, first bytes and full length."""
+    if status_code in PAYWALL_STATUSES:
+        return PAYWALL
+    if status_code in BROKEN_STATUSES:
+        return BROKEN
+    if status_code not in (200, 206):
+        return UNREACHABLE
+    if head.startswith(PDF_SIGNATURE):
+        return TOO_LARGE if total_length and total_length > max_bytes else PDF
+    lowered = head.lower()
+    if any(marker in lowered for marker in PAYWALL_MARKERS):
+        return PAYWALL
+    return LANDING_PAGE
+
+
+class URLProber:
+    FILENAME = 'url_verdicts.json'
+
+    def __init__(self, path=None, max_bytes=MAX_PDF_BYTES, timeout=10, max_workers=16, host_slots=None):
+        self.path = path or os.path.join(get_cache_dir(), self.FILENAME)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.host_slots = host_slots or KeyedSemaphore(2)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.urls, self.patterns = self._load()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                return data.get('urls', {}), data.get('patterns', {})
+            except (json.JSONDecodeError, IOError, AttributeError):
+                logging.warning(f"Could not read URL verdict cache {self.path}, starting fresh.")
+        return {}, {}
+
+    def cached(self, url):
+        """The remembered verdict for a URL, or the predicted one for its host pattern, else None."""
+        with self._lock:
+            entry = self.urls.get(url)
+            if entry and time.time() - entry['at'] < VERDICT_TTLS.get(entry['verdict'], 0):
+                return entry['verdict']
+            counts = self.patterns.get(host_pattern(url), {})
+        if sum(counts.values()) >= PATTERN_MIN_SAMPLES and not counts.get(PDF):
+            return max(counts, key=counts.get)
+        return None
+
+    def _record(self, url, verdict):
+        if verdict not in VERDICT_TTLS:
+            return
+        with self._lock:
+            self.urls[url] = {'verdict': verdict, 'at': time.time()}
+            counts = self.patterns.setdefault(host_pattern(url), {})
+            counts[verdict] = counts.get(verdict, 0) + 1
+            if sum(counts.values()) > PATTERN_MAX_SAMPLES:
+                self.patterns[host_pattern(url)] = {v: n // 2 for v, n in counts.items() if n // 2}
+            self._dirty = True
+
+    def forget(self, url):
+        """Drops a URL's verdict (e.g. a 'PDF' that turned out not to be one)."""
+        with self._lock:
+            if self.urls.pop(url, None) is not None:
+                self._dirty = True
+
+    def _fetch_head(self, url, headers=None, timeout=None):
+        """Ranged GET of the first PROBE_BYTES; the connection is closed without reading on."""
+        headers = dict(headers or {}, Range=f'bytes=0-{PROBE_BYTES - 1}')
+        with self.host_slots.slot(urllib.parse.urlparse(url).netloc.lower()):
+            response = http_client.get(url, headers=headers, timeout=timeout or self.timeout, stream=True)
+            try:
+                head = b''
+                if response.status_code in (200, 206):
+                    for chunk in response.iter_content(chunk_size=PROBE_BYTES):
+                        head += chunk
+                        if len(head) >= PROBE_BYTES:
+                            break
+                return response.status_code, head, body_length(response)
+            finally:
+                response.close()
+
+    def probe(self, url, headers=None, timeout=None):
+        """Verdict for `url`, from the cache or a ranged GET (`timeout` overrides self.timeout)."""
+        verdict = self.cached(url)
+        if verdict:
+            return verdict
+        try:
+            status_code, head, total_length = self._fetch_head(url, headers, timeout)
+            verdict = classify_probe(status_code, head, total_length, self.max_bytes)
+        except Exception as e:
+            logging.debug(f"Probe of {url} failed: {e}")
+            verdict = UNREACHABLE
+        self._record(url, verdict)
+        return verdict
+
+    def probe_all(self, urls, headers=None):
+        """Probes URLs concurrently (per-host capped). Returns {url: verdict}."""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            verdicts = executor.map(lambda url: self.probe(url, headers), urls)
+            return dict(zip(urls, verdicts))
+
+    def save(self):
+        """Writes the cache (dropping expired URL verdicts) if anything changed."""
+        now = time.time()
+        with self._lock:
+            if not self._dirty:
+                return
+            self.urls = {url: e for url, e in self.urls.items()
+                         if now - e['at'] < VERDICT_TTLS.get(e['verdict'], 0)}
+            data = {'version': 1, 'urls': dict(self.urls), 'patterns': dict(self.patterns)}
+            self._dirty = False
+        try:
+            atomic_write_json(self.path, data)
+        except OSError as e:
+            logging.warning(f"Could not save URL verdict cache {self.path}: {e}")
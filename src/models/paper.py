@@ -29,6 +29,7 @@ class Paper:
         self.semantic_scholar_id = None
         self.arxiv_id = None
         self.core_id = None
+        self.pmid = None
         
         # --- Metrics for Ranking ---
         self.citation_count = 0 # Raw citations (highest found across sources)
@@ -54,7 +55,8 @@ class Paper:
         self.downloaded = False
         self.downloadedFrom = 0  # 1-SciHub 2-scholar
         self.download_source = ""
-        self.use_doi_as_filename = False 
+        self.use_doi_as_filename = False
+        self.oa_links = []  # [(label, PDF URL)] from extractors.oa_resolver, tried before Sci-Hub
 
     def getFileName(self):
         try:
@@ -83,8 +85,34 @@ class Paper:
         except Exception:
             pass
 
+    def toDict(self):
+        """Compact JSON-serializable summary, used for NDJSON output."""
+        sjr = None
+        if self.journal_metrics:
+            sjr = self.journal_metrics.get('SJR')
+            if hasattr(sjr, 'item'):  # numpy scalar
+                sjr = sjr.item()
+        return {
+            "title": self.title,
+            "year": self.year,
+            "authors": self.authors,
+            "journal": self.jurnal,
+            "doi": self.DOI,
+            "pdf_link": self.pdf_link,
+            "sources": sorted(self.sources),
+            "citation_count": self.citation_count,
+            "openalex_id": self.openalex_id,
+            "semantic_scholar_id": self.semantic_scholar_id,
+            "arxiv_id": self.arxiv_id,
+            "score": round(self.composite_score, 2),
+            "sjr": sjr,
+            "downloaded": self.downloaded,
+            "download_source": self.download_source,
+        }
+
     def canBeDownloaded(self):
-        return self.DOI is not None or self.scholar_link is not None or self.pdf_link is not None
+        return (self.DOI is not None or self.scholar_link is not None or self.pdf_link is not None
+                or self.arxiv_id is not None or self.pmid is not None)
 
     @staticmethod
     def generateReport(papers, path):
@@ -1,11 +1,12 @@
 import logging
-import requests
+from utils import http_client
 import xml.etree.ElementTree as ET
 from typing import List
 from models.paper import Paper
 from sources.base import BaseSource
 
 class ArxivSource(BaseSource):
+    name = "arxiv"
     BASE_URL = "http://export.arxiv.org/api/query"
     NS = {'atom': 'http://www.w3.org/2005/Atom', 'arxiv': 'http://arxiv.org/schemas/atom'}
 
@@ -17,7 +18,7 @@ class ArxivSource(BaseSource):
             'max_results': limit
         }
         try:
-            resp = requests.get(self.BASE_URL, params=params, timeout=15)
+            resp = http_client.get(self.BASE_URL, params=params, timeout=15)
             if resp.status_code == 200:
                 return self._parse_xml(resp.content)
             else:
@@ -1,10 +1,29 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Iterator, List
 from models.paper import Paper
 
+
+class SourceError(Exception):
+    """
+    Raised by iter_pages when a source fails part-way through a harvest. Pages yielded
+    before it stay valid, but the search is incomplete and is reported as an error.
+    """
+
+
 class BaseSource(ABC):
     """Abstract base class for a paper source (Scholar, OpenAlex, etc.)"""
+    # Short identifier, matches the tag added to Paper.sources and preset source lists
+    name = "base"
+
     @abstractmethod
     def search(self, query: str, limit: int) -> List[Paper]:
         pass
 
+
+    def iter_pages(self, query: str, limit: int) -> Iterator[List[Paper]]:
+        """
+        Yields results page by page, up to limit papers in total.
+        Sources with deep pagination override this; the default is a single search() page.
+        A page that cannot be fetched raises SourceError instead of ending the iteration.
+        """
+        yield self.search(query, limit)
@@ -1,5 +1,5 @@
 import logging
-import requests
+from utils import http_client
 import time
 from typing import List
 from models.paper import Paper
@@ -9,6 +9,7 @@ class CoreSource(BaseSource):
     """
     Source implementation for CORE API (https://api.core.ac.uk/).
     """
+    name = "core"
     BASE_URL = "https://api.core.ac.uk/v3/search/works"
     
     def __init__(self, api_key=None):
@@ -34,7 +35,7 @@ class CoreSource(BaseSource):
         try:
             # According to documentation, unauthenticated access is allowed but rate limited.
             # However, if it fails with 500/403, we should handle it.
-            resp = requests.post(self.BASE_URL, json=payload, headers=headers, timeout=15)
+            resp = http_client.post(self.BASE_URL, json=payload, headers=headers, timeout=15)
             
             if resp.status_code == 200:
                 data = resp.json()
@@ -5,6 +5,8 @@ from extractors.scholar import get_scholar_papers_info
 from sources.base import BaseSource
 
 class GoogleScholarSource(BaseSource):
+    name = "google_scholar"
+
     def __init__(self, headless=False):
         self.headless = headless
 
@@ -1,16 +1,30 @@
 import logging
-import requests
-from typing import List
+from utils import http_client
+from typing import Iterator, List
 from models.paper import Paper
-from sources.base import BaseSource
+from sources.base import BaseSource, SourceError
+from analysis.doi_resolver import get_doi_resolver
 
 class OpenAlexSource(BaseSource):
+    name = "openalex"
     BASE_URL = "https://api.openalex.org/works"
+    MAX_PER_PAGE = 200
+    # Only the fields _convert_to_paper reads, keeps deep harvests light
+    SELECT_FIELDS = 'id,doi,title,publication_year,authorships,primary_location,best_oa_location,cited_by_count'
     
     def __init__(self, email="mail@example.com"):
         self.email = email
 
     def search(self, query: str, limit: int) -> List[Paper]:
+        if limit > self.MAX_PER_PAGE:
+            papers = []
+            try:
+                for page in self.iter_pages(query, limit):
+                    papers.extend(page)
+            except SourceError as e:
+                logging.error(f"{e}; returning the {len(papers)} works fetched so far.")
+            return papers
+
         logging.info(f"Searching OpenAlex for '{query}'...")
         params = {
             'search': query,
@@ -18,7 +32,7 @@ class OpenAlexSource(BaseSource):
             'mailto': self.email
         }
         try:
-            resp = requests.get(self.BASE_URL, params=params, timeout=15)
+            resp = http_client.get(self.BASE_URL, params=params, timeout=15)
             if resp.status_code == 200:
                 data = resp.json()
                 results = data.get('results', [])
@@ -36,23 +50,62 @@ class OpenAlexSource(BaseSource):
             logging.error(f"OpenAlex connection failed: {e}")
             return []
 
-    def get_doi_from_title(self, title):
-        """Helper to find DOI for a title."""
-        if not title: return None
-        params = {'filter': f'title.search:{title}', 'per-page': 1, 'mailto': self.email}
+    def iter_pages(self, query: str, limit: int) -> Iterator[List[Paper]]:
+        """
+        Harvests up to `limit` works with OpenAlex cursor paging (cursor=*), one page at a time.
+        Only one page is held in memory; the caller (e.g. the aggregator) merges a page
+        while the next one is being fetched. Pages are paced by the shared OpenAlex rate
+        limiter. Limits of one page or less use a single request. A page that fails raises
+        SourceError, so a truncated harvest is not reported as complete.
+        """
+        if limit <= self.MAX_PER_PAGE:
+            yield self.search(query, limit)
+            return
+
+        logging.info(f"Harvesting up to {limit} OpenAlex works for '{query}'...")
+        cursor = '*'
+        fetched = 0
+        page = 0
+        while cursor and fetched < limit:
+            params = {
+                'search': query,
+                'per-page': min(self.MAX_PER_PAGE, limit - fetched),
+                'cursor': cursor,
+                'select': self.SELECT_FIELDS,
+                'mailto': self.email
+            }
+            data = self._get_page(params)
+            if data is None:
+                raise SourceError(f"OpenAlex harvest for '{query}' failed on page {page} "
+                                  f"after {fetched} works")
+            page += 1
+
+            results = data.get('results', [])
+            if not results:
+                break
+            papers = [p for p in (self._convert_to_paper(item) for item in results) if p]
+            fetched += len(results)
+            cursor = data.get('meta', {}).get('next_cursor')
+            yield papers
+
+        logging.info(f"OpenAlex harvest returned {fetched} works.")
+
+    def _get_page(self, params):
+        """GET one page (throttling retries happen in http_client). Returns the JSON body or None."""
         try:
-            resp = requests.get(self.BASE_URL, params=params, timeout=5)
+            resp = http_client.get(self.BASE_URL, params=params, timeout=30)
             if resp.status_code == 200:
-                results = resp.json().get('results', [])
-                if results:
-                    item = results[0]
-                    doi = item.get('doi')
-                    if doi:
-                        return doi.replace('https://doi.org/', '')
-        except:
-            pass
+                return resp.json()
+            logging.error(f"OpenAlex API error: {resp.status_code}")
+        except Exception as e:
+            logging.error(f"OpenAlex connection failed: {e}")
         return None
 
+    def get_doi_from_title(self, title):
+        """Helper to find DOI for a title (shared, cached resolver)."""
+        if not title: return None
+        return get_doi_resolver().resolve(title)
+
     def _convert_to_paper(self, item):
         title = item.get('title')
         if not title: return None
@@ -1,13 +1,27 @@
 import logging
-import requests
+import os
+from utils import http_client
+from utils import rate_limit
 import xml.etree.ElementTree as ET
 from typing import List
 from models.paper import Paper
 from sources.base import BaseSource
 
 class PubMedSource(BaseSource):
+    name = "pubmed"
     ESEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
     ESUMMARY_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
+
+    def __init__(self, api_key=None):
+        # An NCBI API key raises the E-utilities limit from 3 to 10 requests per second
+        self.api_key = api_key or os.environ.get('NCBI_API_KEY')
+        if self.api_key:
+            rate_limit.configure('eutils.ncbi.nlm.nih.gov', 10)
+
+    def _with_key(self, params):
+        if self.api_key:
+            params['api_key'] = self.api_key
+        return params
     
     def search(self, query: str, limit: int) -> List[Paper]:
         logging.info(f"Searching PubMed for '{query}'...")
@@ -20,7 +34,7 @@ class PubMedSource(BaseSource):
             'retmode': 'json'
         }
         try:
-            resp = requests.get(self.ESEARCH_URL, params=search_params, timeout=15)
+            resp = http_client.get(self.ESEARCH_URL, params=self._with_key(search_params), timeout=15)
             if resp.status_code != 200:
                 logging.error(f"PubMed ESearch failed: {resp.status_code}")
                 return []
@@ -49,7 +63,7 @@ class PubMedSource(BaseSource):
         }
         
         try:
-            resp = requests.get(self.ESUMMARY_URL, params=summary_params, timeout=15)
+            resp = http_client.get(self.ESUMMARY_URL, params=self._with_key(summary_params), timeout=15)
             if resp.status_code != 200:
                 return []
             
@@ -114,6 +128,7 @@ class PubMedSource(BaseSource):
                     break
 
         p = Paper(title=title, year=year, authors=author_str, DOI=doi, jurnal=journal)
+        p.pmid = doc.get("uid")
         p.sources.add('pubmed')
         return p
 
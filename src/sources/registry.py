@@ -0,0 +1,76 @@
+"""
+Source registry.
+
+Maps source names (the same identifiers used in Paper.sources and the "sources" lists
+of config/presets.json) to their classes. Modules are imported only when a source is
+instantiated, so a run that does not use Google Scholar never imports selenium or
+undetected_chromedriver.
+"""
+import importlib
+import json
+import logging
+import os
+
+# name -> (module, class, constructor kwargs)
+SOURCES = {
+    'google_scholar': ('sources.google_scholar', 'GoogleScholarSource', {'headless': False}),
+    'openalex': ('sources.openalex', 'OpenAlexSource', {}),
+    'semantic_scholar': ('sources.semanticscholar', 'SemanticScholarSource', {}),
+    'arxiv': ('sources.arxiv', 'ArxivSource', {}),
+    'pubmed': ('sources.pubmed', 'PubMedSource', {}),
+    'core': ('sources.core', 'CoreSource', {}),
+}
+
+DEFAULT_PRESETS_PATH = 'config/presets.json'
+
+
+def available_sources():
+    """Names of every registered source, in default query order."""
+    return list(SOURCES)
+
+
+def get_source_class(name):
+    """Imports and returns the class for a source name."""
+    if name not in SOURCES:
+        raise ValueError(f"Unknown source '{name}'. Available: {', '.join(SOURCES)}")
+    module_name, class_name, _ = SOURCES[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_sources(names=None):
+    """
+    Instantiates the named sources (all registered sources if names is None).
+    Unknown names raise ValueError before anything is imported.
+    """
+    names = available_sources() if names is None else list(dict.fromkeys(names))
+    unknown = [n for n in names if n not in SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown source(s): {', '.join(unknown)}. Available: {', '.join(SOURCES)}")
+    return [get_source_class(name)(**SOURCES[name][2]) for name in names]
+
+
+def preset_sources(preset_name, presets_path=DEFAULT_PRESETS_PATH):
+    """
+    Source names listed by a preset in config/presets.json.
+    Returns None (use every source) if the file or the preset's "sources" list is missing.
+    """
+    if not os.path.exists(presets_path):
+        return None
+    with open(presets_path, 'r') as f:
+        presets = json.load(f)
+    names = presets.get(preset_name, {}).get('sources')
+    if not names:
+        return None
+    unknown = [n for n in names if n not in SOURCES]
+    if unknown:
+        logging.warning(f"Preset '{preset_name}' lists unknown source(s) {', '.join(unknown)}; ignoring them.")
+    return [n for n in names if n in SOURCES]
+
+
+def parse_source_list(value):
+    """Parses a comma-separated --sources value, validating every name."""
+    names = [n.strip() for n in value.split(',') if n.strip()]
+    unknown = [n for n in names if n not in SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown source(s): {', '.join(unknown)}. Available: {', '.join(SOURCES)}")
+    return names
@@ -1,11 +1,11 @@
 import logging
-import requests
-import time
+from utils import http_client
 from typing import List
 from models.paper import Paper
 from sources.base import BaseSource
 
 class SemanticScholarSource(BaseSource):
+    name = "semantic_scholar"
     BASE_URL = "https://api.semanticscholar.org/graph/v1/paper/search"
     
     def search(self, query: str, limit: int) -> List[Paper]:
@@ -16,7 +16,7 @@ class SemanticScholarSource(BaseSource):
             'fields': 'title,year,authors,venue,externalIds,citationCount,influentialCitationCount,openAccessPdf'
         }
         try:
-            resp = requests.get(self.BASE_URL, params=params, timeout=15)
+            resp = http_client.get(self.BASE_URL, params=params, timeout=15)
             if resp.status_code == 200:
                 data = resp.json()
                 results = data.get('data', [])
@@ -29,23 +29,8 @@ class SemanticScholarSource(BaseSource):
                 logging.info(f"Semantic Scholar returned {len(papers)} papers.")
                 return papers
             elif resp.status_code == 429:
-                logging.warning("Semantic Scholar Rate Limit Hit. Waiting 2 seconds...")
-                time.sleep(2)
-                try:
-                    resp = requests.get(self.BASE_URL, params=params, timeout=15)
-                    if resp.status_code == 200:
-                         data = resp.json()
-                         results = data.get('data', [])
-                         papers = []
-                         if results:
-                             for item in results:
-                                 p = self._convert_to_paper(item)
-                                 if p:
-                                     papers.append(p)
-                         logging.info(f"Semantic Scholar returned {len(papers)} papers (after retry).")
-                         return papers
-                except:
-                    pass
+                # http_client already backed off and retried per Retry-After
+                logging.warning("Semantic Scholar Rate Limit Hit, giving up on this query.")
                 return []
             else:
                 logging.error(f"Semantic Scholar API error: {resp.status_code}")
@@ -0,0 +1,37 @@
+"""
+Concurrency helpers shared by the download workers.
+"""
+import threading
+from contextlib import contextmanager
+
+
+class KeyedSemaphore:
+    """
+    One bounded semaphore per key (a host or a mirror URL), created on first use.
+    Caps how many workers talk to the same server at once while different servers
+    proceed in parallel.
+    """
+
+    def __init__(self, default_limit, limits=None):
+        self.default_limit = default_limit
+        self.limits = dict(limits or {})
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            semaphore = self._semaphores.get(key)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.limits.get(key, self.default_limit))
+                self._semaphores[key] = semaphore
+            return semaphore
+
+    @contextmanager
+    def slot(self, key):
+        """Holds one of `key`'s slots for the duration of the block."""
+        semaphore = self._get(key)
+        semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
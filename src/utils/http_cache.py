@@ -0,0 +1,175 @@
+"""
+Persistent on-disk cache for metadata API responses.
+
+Responses from the metadata APIs (OpenAlex, Crossref, PubMed, arXiv, Semantic Scholar,
+CORE) are stored in a SQLite database keyed by method, normalized URL, query params
+and JSON body. Each endpoint has its own TTL, bodies are zlib-compressed, and the
+least recently used entries are evicted once the database grows past its size cap.
+The total size is summed once per process and then kept as a running count, so a write
+does not scan the table; writes by other processes are picked up at the next eviction.
+The database runs in WAL mode with a busy timeout, so several CLI processes can share it.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlparse, parse_qsl, urlencode
+import requests
+from requests.structures import CaseInsensitiveDict
+from utils.utils import get_cache_dir
+
+DAY = 24 * 3600
+
+# (host, path prefix, TTL in seconds). First match wins; hosts not listed are never cached.
+ENDPOINT_TTLS = [
+    ('api.openalex.org', '/authors', 30 * DAY),
+    ('api.openalex.org', '/works', 7 * DAY),
+    ('api.crossref.org', '/works', 30 * DAY),
+    ('eutils.ncbi.nlm.nih.gov', '/entrez/eutils/esummary', 30 * DAY),
+    ('eutils.ncbi.nlm.nih.gov', '/entrez/eutils/esearch', 1 * DAY),
+    ('export.arxiv.org', '/api/query', 1 * DAY),
+    ('api.semanticscholar.org', '/graph/v1', 1 * DAY),
+    ('api.core.ac.uk', '/v3/search', 1 * DAY),
+    ('api.unpaywall.org', '/v2/', 7 * DAY),
+]
+
+# Params that identify the caller rather than the query; left out of the cache key
+IGNORED_PARAMS = {'mailto', 'email', 'api_key'}
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+def get_ttl(url):
+    """TTL for a URL, or None if its endpoint is not cacheable."""
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    for rule_host, prefix, ttl in ENDPOINT_TTLS:
+        if host == rule_host and parsed.path.startswith(prefix):
+            return ttl
+    return None
+
+
+def make_key(method, url, params=None, json_body=None):
+    """Normalized cache key: method, lowercase scheme/host, path, sorted params, JSON body."""
+    parsed = urlparse(url)
+    query = parse_qsl(parsed.query, keep_blank_values=True)
+    if params:
+        query.extend((str(k), str(v)) for k, v in dict(params).items() if v is not None)
+    query = sorted((k, v) for k, v in query if k not in IGNORED_PARAMS)
+    key = f"{method.upper()} {parsed.scheme.lower()}://{parsed.netloc.lower()}{parsed.path}?{urlencode(query)}"
+    if json_body is not None:
+        key += " " + json.dumps(json_body, sort_keys=True)
+    return key
+
+
+class HttpCache:
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or os.path.join(get_cache_dir(), 'http_cache.sqlite3')
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._total = None  # running size of all bodies, summed on the first write
+        self._total_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        """One connection per thread (sqlite3 connections are not shareable)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA busy_timeout=10000')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Returns a cached requests.Response, or None if missing or expired."""
+        try:
+            conn = self._connect()
+            row = conn.execute('SELECT url, status, headers, body, expires FROM responses WHERE key = ?',
+                               (key,)).fetchone()
+            if row is None:
+                return None
+            url, status, headers, body, expires = row
+            now = time.time()
+            if expires < now:
+                with conn:
+                    conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                return None
+            with conn:
+                conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+        except sqlite3.Error as e:
+            logging.debug(f"HTTP cache read failed: {e}")
+            return None
+
+        response = requests.Response()
+        response.status_code = status
+        response.url = url
+        response.headers = CaseInsensitiveDict(json.loads(headers))
+        response._content = zlib.decompress(body)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or 'utf-8'
+        response.from_cache = True
+        return response
+
+    def set(self, key, response, ttl):
+        """Stores a successful response for `ttl` seconds, evicting LRU entries if over the cap."""
+        body = zlib.compress(response.content)
+        headers = {k: v for k, v in response.headers.items()
+                   if k.lower() in ('content-type', 'etag', 'last-modified')}
+        now = time.time()
+        try:
+            conn = self._connect()
+            with conn:
+                old = conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+                conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                             (key, response.url, response.status_code, json.dumps(headers), body,
+                              len(body), now + ttl, now))
+            with self._total_lock:
+                if self._total is None:
+                    self._total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+                else:
+                    self._total += len(body) - (old[0] if old else 0)
+                over = self._total > self.max_bytes
+            if over:
+                self._evict(conn)
+        except sqlite3.Error as e:
+            logging.debug(f"HTTP cache write failed: {e}")
+
+    def _evict(self, conn):
+        """Drops expired entries, then least recently used ones down to 90% of the cap."""
+        target = int(self.max_bytes * 0.9)
+        with conn:
+            conn.execute('DELETE FROM responses WHERE expires < ?', (time.time(),))
+            rows = conn.execute('SELECT key, size FROM responses ORDER BY last_access').fetchall()
+            total = sum(size for _, size in rows)
+            for key, size in rows:
+                if total <= target:
+                    break
+                conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                total -= size
+        with self._total_lock:
+            self._total = total
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM responses')
+        with self._total_lock:
+            self._total = 0
@@ -0,0 +1,195 @@
+"""
+Shared HTTP client registry.
+
+Every API client and downloader goes through here instead of bare requests.get/post,
+so connections are kept alive and reused: one requests.Session (with its own
+keep-alive pool) per host, shared default headers, and compressed responses.
+Metadata APIs (API_HOSTS) get the polite AcademicArchiver User-Agent with a contact
+address; every other host (Google Scholar, publishers, repositories) keeps the browser
+User-Agent from NetInfo. Requests are paced by the per-host limiter in utils.rate_limit,
+and throttled API responses (429/503) are retried after Retry-After instead of being
+dropped. Other hosts are never retried: a 503 from a bot wall is returned as-is.
+Metadata API responses are served from the on-disk cache in utils.http_cache when fresh.
+"""
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from utils import rate_limit
+from utils import http_cache
+from utils.net_info import NetInfo
+
+try:
+    import brotli  # noqa: F401  (optional, lets servers send br-compressed bodies)
+    _ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    _ACCEPT_ENCODING = 'gzip, deflate'
+
+CONTACT_EMAIL = "pypaperbot@example.com"
+
+DEFAULT_HEADERS = {
+    'User-Agent': NetInfo.HEADERS['User-Agent'],
+    'Accept-Encoding': _ACCEPT_ENCODING,
+}
+
+# Metadata APIs that ask clients to identify themselves, and whose 429/503 answers are
+# retried. Scholar, publishers and Sci-Hub mirrors are deliberately not listed.
+API_HOSTS = {
+    'api.openalex.org',
+    'api.crossref.org',
+    'api.semanticscholar.org',
+    'api.unpaywall.org',
+    'export.arxiv.org',
+    'eutils.ncbi.nlm.nih.gov',
+    'api.core.ac.uk',
+}
+API_HEADERS = {
+    'User-Agent': f'AcademicArchiver/2.0.0 (mailto:{CONTACT_EMAIL})',
+}
+
+# Connections kept open per host. Concurrent callers beyond this block for a free connection.
+DEFAULT_POOL_MAXSIZE = 10
+HOST_POOL_MAXSIZE = {
+    'api.openalex.org': 16,
+}
+
+# Throttling responses that are retried after backing off
+RETRY_STATUSES = {429, 503}
+MAX_RETRIES = 3
+
+# Persistent response cache for metadata APIs (see utils.http_cache.ENDPOINT_TTLS)
+CACHE_ENABLED = True
+CACHED_METHODS = {'GET', 'POST'}
+
+_sessions = {}
+_cache = None
+_lock = threading.Lock()
+
+
+def _host_of(url):
+    return urlparse(url).netloc.lower() if '://' in url else url.lower()
+
+
+def create_session(headers=None, pool_maxsize=None):
+    """
+    Builds a new pooled session with the shared defaults.
+    Use this for clients that keep their own cookie state (e.g. SciHubClient);
+    everything else should use get_session().
+    """
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    if headers:
+        session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize or DEFAULT_POOL_MAXSIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(url):
+    """Returns the shared keep-alive session for the host of `url` (a URL or a bare host)."""
+    host = _host_of(url)
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = create_session(headers=API_HEADERS if host in API_HOSTS else None,
+                                     pool_maxsize=HOST_POOL_MAXSIZE.get(host))
+            _sessions[host] = session
+        return session
+
+
+def get_cache():
+    """Returns the shared response cache, or None when caching is disabled or unavailable."""
+    global _cache, CACHE_ENABLED
+    if not CACHE_ENABLED:
+        return None
+    with _lock:
+        if _cache is None:
+            try:
+                _cache = http_cache.HttpCache()
+            except Exception as e:
+                logging.warning(f"HTTP cache unavailable, continuing without it: {e}")
+                CACHE_ENABLED = False
+        return _cache
+
+
+def configure(pool_maxsize=None, host_pool_maxsize=None, headers=None, cache=None):
+    """
+    Tunes pool sizes, default headers and the response cache (True/False, or an HttpCache).
+    Applies to sessions created afterwards, so call it before the first request.
+    """
+    global DEFAULT_POOL_MAXSIZE, CACHE_ENABLED, _cache
+    if cache is not None:
+        CACHE_ENABLED = bool(cache)
+        _cache = cache if isinstance(cache, http_cache.HttpCache) else None
+    if pool_maxsize:
+        DEFAULT_POOL_MAXSIZE = pool_maxsize
+    if host_pool_maxsize:
+        HOST_POOL_MAXSIZE.update(host_pool_maxsize)
+    if headers:
+        DEFAULT_HEADERS.update(headers)
+
+
+def request(method, url, retries=MAX_RETRIES, cache=True, **kwargs):
+    """
+    Sends a request on the host's shared session, waiting for the host's rate limiter.
+    For API_HOSTS, 429/503 responses pause the whole host for Retry-After (or an
+    exponential backoff) and are retried up to `retries` times; the last response is
+    returned as-is. Responses from other hosts are returned on the first answer.
+
+    Fresh cached responses for metadata endpoints are returned without touching the
+    network (response.from_cache is True); pass cache=False to force a live request.
+    """
+    host = _host_of(url)
+    cacheable = cache and method.upper() in CACHED_METHODS and not kwargs.get('stream')
+    ttl = http_cache.get_ttl(url) if cacheable else None
+    store = get_cache() if ttl else None
+    if store:
+        key = http_cache.make_key(method, url, kwargs.get('params'), kwargs.get('json'))
+        cached = store.get(key)
+        if cached is not None:
+            return cached
+
+    limiter = rate_limit.get_limiter(host)
+    session = get_session(url)
+    if host not in API_HOSTS:
+        retries = 0
+    for attempt in range(retries + 1):
+        if limiter:
+            limiter.acquire()
+        response = session.request(method, url, **kwargs)
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            if store and response.status_code == 200:
+                store.set(key, response, ttl)
+            return response
+
+        delay = rate_limit.parse_retry_after(response.headers.get('Retry-After'))
+        if delay is None:
+            delay = 2 ** attempt
+        logging.warning(f"{host} returned {response.status_code}, retrying in {delay:.0f}s...")
+        if limiter:
+            limiter.pause(delay)
+        else:
+            time.sleep(delay)
+    return response
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def close_all():
+    """Closes every pooled session (end of run)."""
+    with _lock:
+        for session in _sessions.values():
+            try:
+                session.close()
+            except Exception:
+                pass
+        _sessions.clear()
@@ -0,0 +1,111 @@
+"""
+Per-host token-bucket rate limiting shared by every HTTP caller.
+
+utils.http_client acquires a token before each request and pauses the host's bucket
+when a server answers 429/503 with Retry-After, so concurrent callers run at the
+allowed throughput instead of sleeping for fixed intervals. Buckets are safe to use
+from threads (acquire) and from asyncio code (acquire_async).
+"""
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Sustained requests per second allowed per host
+HOST_RATES = {
+    'api.openalex.org': 10,          # Polite pool (mailto)
+    'eutils.ncbi.nlm.nih.gov': 3,    # 10 with an NCBI API key
+    'export.arxiv.org': 1 / 3,       # arXiv asks for one request every 3 seconds
+    'api.semanticscholar.org': 1,    # Unauthenticated shared pool
+    'api.crossref.org': 10,
+    'api.core.ac.uk': 1,
+    'api.unpaywall.org': 10,         # Asks for under 100k calls a day
+}
+
+# Longest Retry-After honored, so one misbehaving server cannot stall a run
+MAX_RETRY_AFTER = 60
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` requests per second with bursts of up to `capacity`.
+
+    Callers reserve a token under a short lock and sleep outside it, so waiting threads
+    and coroutines are served in arrival order without busy polling.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self):
+        """Takes one token (possibly going into debt) and returns how long to wait for it."""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self):
+        """Blocks the calling thread until a request may be sent."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Awaits until a request may be sent without blocking the event loop."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        Holds every caller for `seconds` (server asked us to back off).
+        Implemented as token debt, so queued callers resume one by one at the normal rate.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+_buckets = {}
+_lock = threading.Lock()
+
+
+def configure(host, rate, capacity=1):
+    """Sets (or replaces) the rate for a host, e.g. when an API key raises the limit."""
+    with _lock:
+        HOST_RATES[host] = rate
+        _buckets[host] = TokenBucket(rate, capacity)
+
+
+def get_limiter(host):
+    """Returns the shared bucket for a host, or None if the host is not rate limited."""
+    with _lock:
+        bucket = _buckets.get(host)
+        if bucket is None and host in HOST_RATES:
+            bucket = TokenBucket(HOST_RATES[host])
+            _buckets[host] = bucket
+        return bucket
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
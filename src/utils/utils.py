@@ -1,6 +1,41 @@
+import json
+import os
+import tempfile
+
+
 def URLjoin(*args):
     """
     Join parts of a URL ensuring correct slashes.
     Kept as CamelCase URLjoin for compatibility, or updated to snake_case if references are updated.
     """
     return "/".join(map(lambda x: str(x).rstrip('/'), args))
+
+
+def get_cache_dir():
+    """
+    Directory for persistent caches shared across runs (HTTP responses, stats, ...).
+    Defaults to ~/.cache/academicarchiver; override with ACADEMICARCHIVER_CACHE_DIR.
+    """
+    path = os.environ.get('ACADEMICARCHIVER_CACHE_DIR') or os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+        'academicarchiver')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def atomic_write_json(path, data):
+    """
+    Writes JSON to a temp file in the same directory and renames it over `path`,
+    so readers (including other processes) never see a half-written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,83 @@
+"""
+Benchmark for Aggregator._merge_paper on synthetic records.
+
+Usage (from repo root):
+    python tests/benchmarks/bench_merge.py
+    python tests/benchmarks/bench_merge.py 10000 100000
+
+Roughly a third of the records are duplicates of earlier ones (same title with a DOI,
+or same DOI), which exercises both the title lookup and the title -> DOI re-key path.
+The legacy linear-scan merge is timed on a small sample for comparison.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+
+from core.aggregator import Aggregator
+from core.merge_index import MergeIndex, normalize_title
+from models.paper import Paper
+
+
+def make_records(n, seed=42):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        if i > 10 and rng.random() < 0.33:
+            j = rng.randrange(i)
+            # Duplicate of an earlier record, sometimes bringing the DOI along
+            p = Paper(title=f"Synthetic Paper Number {j}: A Study",
+                      DOI=f"10.5555/bench.{j}" if rng.random() < 0.5 else None)
+        else:
+            p = Paper(title=f"Synthetic Paper Number {i}: A Study",
+                      DOI=f"10.5555/bench.{i}" if rng.random() < 0.4 else None)
+        p.sources.add(rng.choice(['google_scholar', 'openalex', 'semantic_scholar', 'arxiv']))
+        records.append(p)
+    return records
+
+
+def legacy_merge(unique_papers, new_paper):
+    """The pre-index merge: linear scan re-normalizing every existing title."""
+    if new_paper.DOI and new_paper.DOI in unique_papers:
+        return
+    norm_title = normalize_title(new_paper.title)
+    for key, existing in unique_papers.items():
+        if normalize_title(existing.title) == norm_title:
+            return
+    unique_papers[new_paper.DOI or norm_title] = new_paper
+
+
+def bench_index(n):
+    agg = Aggregator(sources=[])
+    records = make_records(n)
+    index = MergeIndex()
+    start = time.perf_counter()
+    for p in records:
+        agg._merge_paper(index, p)
+    return time.perf_counter() - start, len(index)
+
+
+def bench_legacy(n):
+    records = make_records(n)
+    papers = {}
+    start = time.perf_counter()
+    for p in records:
+        legacy_merge(papers, p)
+    return time.perf_counter() - start, len(papers)
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+
+    print(f"{'records':>10} | {'merge':>8} | {'unique':>8} | {'us/record':>9}")
+    print("-" * 46)
+    for n in sizes:
+        elapsed, unique = bench_index(n)
+        print(f"{n:>10} | {elapsed:>7.3f}s | {unique:>8} | {elapsed / n * 1e6:>9.2f}")
+
+    n = 2_000
+    elapsed, unique = bench_legacy(n)
+    print(f"\nLegacy linear scan at {n} records: {elapsed:.3f}s ({unique} unique)")
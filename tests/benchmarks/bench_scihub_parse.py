@@ -0,0 +1,69 @@
+"""
+Micro-benchmark for Sci-Hub response analysis on saved mirror pages.
+
+Usage (from repo root):
+    python tests/benchmarks/bench_scihub_parse.py
+    python tests/benchmarks/bench_scihub_parse.py 2000
+
+Times, per page in tests/archive/scihub_pages (plus a synthetic 256 KB PDF body), the old
+three-step analysis (is_scihub_paper_not_available, is_cloudflare_page, getSchiHubPDF_xpath,
+each parsing on its own) against the single-parse classify_scihub_page.
+"""
+import glob
+import logging
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+
+from extractors.parsers import (classify_scihub_page, getSchiHubPDF_xpath, is_cloudflare_page,
+                                is_scihub_paper_not_available)
+
+PAGES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../archive/scihub_pages'))
+
+
+def load_pages():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, '*.html'))):
+        with open(path, 'rb') as f:
+            pages[os.path.basename(path)] = f.read()
+    pages['body.pdf (synthetic)'] = b'%PDF-1.5\n' + os.urandom(256 * 1024)
+    return pages
+
+
+def three_step(content):
+    """The analysis classify_mirror_page did before classify_scihub_page."""
+    if is_scihub_paper_not_available(content):
+        return 'not_available'
+    if is_cloudflare_page(content):
+        return 'cloudflare'
+    return getSchiHubPDF_xpath(content)
+
+
+def bench(func, content, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(content)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    # BeautifulSoup complains about every binary body it is handed
+    warnings.simplefilter('ignore')
+    logging.disable(logging.WARNING)
+    pages = load_pages()
+    print(f"{len(pages)} pages, {rounds} rounds each\n")
+    print(f"{'Page':<24}{'Result':<14}{'3 parses':>12}{'1 parse':>12}{'Speed-up':>10}")
+    for name, content in pages.items():
+        old = bench(three_step, content, rounds)
+        new = bench(classify_scihub_page, content, rounds)
+        kind = classify_scihub_page(content).kind
+        print(f"{name:<24}{kind:<14}{old:>10.1f}us{new:>10.1f}us{old / new:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Shared pytest fixtures.
+
+Every test runs against a throwaway cache directory, so response caches, learned download
+strategies, mirror stats and other persistent state never touch the user's real cache.
+"""
+import os
+import tempfile
+
+import pytest
+
+from utils import http_client
+
+_session_cache = None
+
+
+def pytest_configure(config):
+    # Covers the manual scripts under tests/ that hit the network at import (collection) time
+    global _session_cache
+    _session_cache = tempfile.TemporaryDirectory()
+    os.environ['ACADEMICARCHIVER_CACHE_DIR'] = _session_cache.name
+
+
+def pytest_unconfigure(config):
+    http_client.configure(cache=False)
+    if _session_cache is not None:
+        _session_cache.cleanup()
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        monkeypatch.setenv('ACADEMICARCHIVER_CACHE_DIR', tmp)
+        # Drop any response cache opened under the previous directory
+        http_client.configure(cache=False)
+        yield tmp
+        http_client.configure(cache=False)
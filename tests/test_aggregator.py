@@ -0,0 +1,181 @@
+"""
+Unit tests for the Aggregator source fan-out and merge logic.
+"""
+
+import time
+import unittest
+
+from core.aggregator import Aggregator
+from core.merge_index import MergeIndex
+from models.paper import Paper
+from sources.base import BaseSource
+
+
+class FakeSource(BaseSource):
+    """Source stub that sleeps for a fixed delay and returns canned papers."""
+
+    def __init__(self, name, papers, delay=0.0, error=None):
+        self.name = name
+        self.papers = papers
+        self.delay = delay
+        self.error = error
+
+    def search(self, query, limit):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.papers
+
+
+def make_paper(title, doi=None, source='fake'):
+    p = Paper(title=title, DOI=doi)
+    p.sources.add(source)
+    return p
+
+
+class TestAggregatorFanOut(unittest.TestCase):
+
+    def setUp(self):
+        self.agg = Aggregator(source_timeout=1.0, total_timeout=2.0, sources=[])
+        # No DOI rescue network calls in unit tests
+        self.agg._rescue_missing_dois = lambda papers: None
+
+    def test_sources_run_concurrently(self):
+        """Wall time should track the slowest source, not the sum."""
+        self.agg.sources = [
+            FakeSource('a', [make_paper("Paper A", "10.1/a")], delay=0.3),
+            FakeSource('b', [make_paper("Paper B", "10.1/b")], delay=0.3),
+            FakeSource('c', [make_paper("Paper C", "10.1/c")], delay=0.3),
+        ]
+        start = time.monotonic()
+        results = self.agg.search_all("query")
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(len(results), 3)
+        self.assertLess(elapsed, 0.8)
+        self.assertEqual(self.agg.source_status, {'a': 'ok', 'b': 'ok', 'c': 'ok'})
+
+    def test_slow_source_reported_as_partial(self):
+        """A source past its deadline is skipped without blocking the merge."""
+        self.agg.source_timeouts['slow'] = 0.2
+        self.agg.sources = [
+            FakeSource('fast', [make_paper("Fast Paper", "10.1/fast")]),
+            FakeSource('slow', [make_paper("Slow Paper", "10.1/slow")], delay=1.5),
+        ]
+        start = time.monotonic()
+        results = self.agg.search_all("query")
+        elapsed = time.monotonic() - start
+
+        self.assertIn("10.1/fast", results)
+        self.assertNotIn("10.1/slow", results)
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(self.agg.partial_sources, ['slow'])
+        self.assertEqual(self.agg.source_status['slow'], 'timeout')
+
+    def test_failing_source_does_not_break_search(self):
+        self.agg.sources = [
+            FakeSource('ok', [make_paper("Good Paper", "10.1/good")]),
+            FakeSource('broken', [], error=RuntimeError("boom")),
+        ]
+        results = self.agg.search_all("query")
+
+        self.assertIn("10.1/good", results)
+        self.assertEqual(self.agg.source_status['broken'], 'error')
+        self.assertEqual(self.agg.partial_sources, [])
+
+    def test_iter_search_streams_in_completion_order(self):
+        """Fast sources are yielded before slow ones finish."""
+        self.agg.sources = [
+            FakeSource('slow', [make_paper("Shared Title", "10.1/shared", source='slow')], delay=0.3),
+            FakeSource('fast', [make_paper("Shared Title", source='fast')]),
+        ]
+        stream = self.agg.iter_search("query")
+
+        start = time.monotonic()
+        name, papers = next(stream)
+        self.assertEqual(name, 'fast')
+        self.assertLess(time.monotonic() - start, 0.25)
+        first = papers[0]
+
+        name, papers = next(stream)
+        self.assertEqual(name, 'slow')
+        # The merged object is updated in place and re-keyed to the DOI
+        self.assertIs(papers[0], first)
+        self.assertEqual(first.DOI, "10.1/shared")
+        self.assertEqual(list(self.agg.results.papers.keys()), ["10.1/shared"])
+        self.assertEqual(list(stream), [])
+
+    def test_paged_source_streams_each_page(self):
+        """Deep-paging sources are merged page by page."""
+        class PagedSource(FakeSource):
+            def iter_pages(self, query, limit):
+                for page in range(3):
+                    yield [make_paper(f"Paper {page}-{i}", f"10.1/{page}.{i}") for i in range(5)]
+
+        self.agg.sources = [PagedSource('paged', [])]
+        batches = list(self.agg.iter_search("query"))
+
+        self.assertEqual([(name, len(papers)) for name, papers in batches], [('paged', 5)] * 3)
+        self.assertEqual(len(self.agg.results), 15)
+        self.assertEqual(self.agg.source_status, {'paged': 'ok'})
+
+
+class TestAggregatorMerge(unittest.TestCase):
+
+    def setUp(self):
+        self.agg = Aggregator(sources=[])
+        self.index = MergeIndex()
+
+    def test_title_match_rekeys_to_doi(self):
+        """Same title from two sources merges and re-keys to the DOI."""
+        self.agg._merge_paper(self.index, make_paper("Attention Is All You Need", source='google_scholar'))
+        self.agg._merge_paper(self.index, make_paper("Attention is all you need.", "10.1/attn", source='openalex'))
+
+        self.assertEqual(list(self.index.papers.keys()), ["10.1/attn"])
+        self.assertEqual(self.index["10.1/attn"].sources, {'google_scholar', 'openalex'})
+
+    def test_doi_match_is_case_insensitive(self):
+        self.agg._merge_paper(self.index, make_paper("Paper", "10.1/ABC"))
+        self.agg._merge_paper(self.index, make_paper("Paper (preprint)", "10.1/abc", source='other'))
+
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(self.index["10.1/ABC"].sources, {'fake', 'other'})
+
+    def test_merge_by_arxiv_id(self):
+        first = make_paper("Deep Residual Learning", source='arxiv')
+        first.arxiv_id = "1512.03385v1"
+        second = make_paper("Deep residual learning for image recognition", source='semantic_scholar')
+        second.arxiv_id = "1512.03385v1"
+        self.agg._merge_paper(self.index, first)
+        self.agg._merge_paper(self.index, second)
+
+        self.assertEqual(len(self.index), 1)
+
+    def test_conflicting_dois_keep_existing(self):
+        self.agg._merge_paper(self.index, make_paper("Same Title", "10.1/first"))
+        self.agg._merge_paper(self.index, make_paper("Same Title", "10.1/second"))
+
+        self.assertEqual(list(self.index.papers.keys()), ["10.1/first"])
+
+    def test_rescued_doi_folds_into_existing_entry(self):
+        scholar = make_paper("Scholar Only Title", source='google_scholar')
+        openalex = make_paper("Different Title Entirely", "10.1/x", source='openalex')
+        self.agg._merge_paper(self.index, scholar)
+        self.agg._merge_paper(self.index, openalex)
+
+        self.agg._apply_rescued_doi(self.index, scholar, "10.1/x")
+
+        self.assertEqual(list(self.index.papers.keys()), ["10.1/x"])
+        self.assertEqual(self.index["10.1/x"].sources, {'google_scholar', 'openalex'})
+
+    def test_untitled_papers_without_ids_stay_separate(self):
+        self.agg._merge_paper(self.index, make_paper("", source='google_scholar'))
+        self.agg._merge_paper(self.index, make_paper("  ?! ", source='openalex'))
+
+        self.assertEqual(len(self.index), 2)
+        self.assertNotIn("", self.index)
+        self.assertEqual(self.index.by_title, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -30,6 +30,7 @@ class TestCLISmoke(unittest.TestCase):
         # Check for new name
         self.assertIn("AcademicArchiver", result.stdout)
         self.assertIn("--expand-network", result.stdout)
+        self.assertIn("ndjson", result.stdout)
 
     def test_missing_args_exit(self):
         """Test that running without args exits gracefully with help."""
@@ -0,0 +1,75 @@
+"""
+Unit tests for the shared title -> DOI resolver.
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from analysis.doi_resolver import DOIResolver
+
+
+def openalex_response(doi=None, status=200):
+    resp = Mock()
+    resp.status_code = status
+    resp.json.return_value = {'results': [{'doi': f'https://doi.org/{doi}', 'title': 'x'}] if doi else []}
+    return resp
+
+
+class TestDOIResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.resolver = DOIResolver()
+
+    def test_resolves_and_caches_hits_and_misses(self):
+        def fake_get(url, params=None, timeout=None):
+            return openalex_response('10.1/found' if 'Known' in params['filter'] else None)
+
+        with patch('analysis.doi_resolver.http_client.get', side_effect=fake_get) as mock_get:
+            first = self.resolver.resolve_many(["Known Paper", "Unknown Paper"])
+            second = self.resolver.resolve_many(["known paper!", "Unknown Paper"])
+
+        self.assertEqual(first, {"Known Paper": "10.1/found", "Unknown Paper": None})
+        self.assertEqual(second, {"known paper!": "10.1/found", "Unknown Paper": None})
+        # Second batch is served entirely from cache (keyed by normalized title)
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_duplicate_titles_looked_up_once(self):
+        with patch('analysis.doi_resolver.http_client.get', return_value=openalex_response('10.1/a')) as mock_get:
+            result = self.resolver.resolve_many(["Same Title", "Same  Title", "same title"])
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(set(result.values()), {'10.1/a'})
+
+    def test_errors_are_not_cached(self):
+        with patch('analysis.doi_resolver.http_client.get', return_value=openalex_response(status=503)):
+            self.assertIsNone(self.resolver.resolve("Flaky Paper"))
+        with patch('analysis.doi_resolver.http_client.get', return_value=openalex_response('10.1/ok')):
+            self.assertEqual(self.resolver.resolve("Flaky Paper"), '10.1/ok')
+
+    def test_lookups_run_concurrently(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_get(url, params=None, timeout=None):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+            return openalex_response(None)
+
+        with patch('analysis.doi_resolver.http_client.get', side_effect=slow_get):
+            start = time.monotonic()
+            self.resolver.resolve_many([f"Title {i}" for i in range(16)])
+            elapsed = time.monotonic() - start
+
+        self.assertGreater(max(peak), 1)
+        self.assertLess(elapsed, 16 * 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,471 @@
+"""
+Unit tests for the concurrent download scheduler.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+import requests
+
+from extractors import downloader
+from extractors.manifest import DownloadManifest
+from extractors.mirror_pool import MirrorPool
+from extractors.negative_cache import NegativeCache
+from extractors.pdf_store import PDFStore
+from extractors.scihub import SciHubClient, SciHubDownloadError
+from models.paper import Paper
+
+
+def streamed(body, status=200):
+    response = Mock(status_code=status, url="https://example.org/x.pdf", headers={})
+    response.iter_content.return_value = iter([body[:3], body[3:]])
+    return response
+
+
+def pdf_response(delay=0.0):
+    def fake_get(url, headers=None, timeout=None, stream=False):
+        time.sleep(delay)
+        return streamed(b'%PDF-1.4 ' + url.encode())
+    return fake_get
+
+
+class TestDownloadScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def make_papers(self, n, host="example.org"):
+        return [Paper(title=f"Paper {i}", link_pdf=f"https://{host}/{i}.pdf") for i in range(n)]
+
+    def pdfs(self):
+        return sorted(f for f in os.listdir(self.tmp) if f.endswith('.pdf'))
+
+    def download(self, papers, num_limit=None, **kwargs):
+        kwargs.setdefault('scihub_mode', 'http')  # no Sci-Hub client
+        kwargs.setdefault('resolve_oa', False)  # OA lookups are covered in test_oa_resolver
+        kwargs.setdefault('probe_links', False)  # probing is covered in test_url_probe
+        kwargs.setdefault('learn_order', False)
+        downloader.download_papers(papers, self.tmp, num_limit, **kwargs)
+
+    def test_papers_download_in_parallel(self):
+        papers = [Paper(title=f"Paper {i}", link_pdf=f"https://host{i}.org/x.pdf") for i in range(8)]
+        active, peak = [0], [0]
+        lock = threading.Lock()
+        all_in_flight = threading.Event()
+
+        def counting_get(url, headers=None, timeout=None, stream=False):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+                if peak[0] == len(papers):
+                    all_in_flight.set()
+            # Hold each request until every worker has one in flight (the timeout only bounds a failure)
+            all_in_flight.wait(5)
+            with lock:
+                active[0] -= 1
+            return streamed(b'%PDF-1.4 ' + url.encode())
+
+        with patch('extractors.downloader.http_client.get', side_effect=counting_get):
+            self.download(papers, workers=8)
+
+        self.assertEqual(peak[0], 8)
+        self.assertTrue(all(p.downloaded for p in papers))
+        self.assertEqual(len(self.pdfs()), 8)
+
+    def test_per_host_cap(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def counting_get(url, headers=None, timeout=None, stream=False):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return streamed(b'%PDF-1.4')
+
+        with patch('extractors.downloader.http_client.get', side_effect=counting_get):
+            self.download(self.make_papers(8), workers=8, max_per_host=2)
+
+        self.assertEqual(peak[0], 2)
+
+    def test_results_reported_in_paper_order(self):
+        papers = [Paper(title="Slow", link_pdf="https://a.org/slow.pdf"),
+                  Paper(title="Fast", link_pdf="https://b.org/fast.pdf")]
+
+        def get(url, headers=None, timeout=None, stream=False):
+            time.sleep(0.2 if 'slow' in url else 0)
+            return streamed(b'%PDF-1.4')
+
+        with patch('extractors.downloader.http_client.get', side_effect=get), \
+                patch('extractors.downloader.safe_print') as mock_print:
+            self.download(papers, workers=2)
+
+        headers = [c.args[0] for c in mock_print.call_args_list if c.args[0].startswith("Download ")]
+        self.assertEqual(headers, ["Download 1 of 2 -> Slow", "Download 2 of 2 -> Fast"])
+        self.assertEqual(papers[0].download_source, "Direct Link")
+
+    def test_download_limit_is_exact(self):
+        papers = self.make_papers(10)
+        with patch('extractors.downloader.http_client.get', side_effect=pdf_response(0.01)):
+            self.download(papers, num_limit=3, workers=4, max_per_host=4)
+
+        self.assertEqual(sum(1 for p in papers if p.downloaded), 3)
+        self.assertEqual(len(self.pdfs()), 3)
+
+    def test_same_title_gets_distinct_files(self):
+        papers = [Paper(title="Same", link_pdf=f"https://h{i}.org/x.pdf", DOI=f"10.1/{i}") for i in range(4)]
+        with patch('extractors.downloader.http_client.get', side_effect=pdf_response()):
+            self.download(papers, workers=4)
+
+        self.assertEqual(len(self.pdfs()), 4)
+
+    def test_streamed_to_disk_and_html_rejected(self):
+        papers = [Paper(title="Good", link_pdf="https://a.org/good.pdf"),
+                  Paper(title="Html", link_pdf="https://b.org/html.pdf")]
+        html = streamed(b'<html>login</html>')
+
+        def get(url, headers=None, timeout=None, stream=False):
+            self.assertTrue(stream)
+            return streamed(b'%PDF-1.7 body') if 'good' in url else html
+
+        with patch('extractors.downloader.http_client.get', side_effect=get):
+            self.download(papers)
+
+        self.assertTrue(papers[0].downloaded)
+        self.assertFalse(papers[1].downloaded)
+        html.close.assert_called()
+        self.assertEqual(self.pdfs(), ['Good.pdf'])
+        with open(os.path.join(self.tmp, 'Good.pdf'), 'rb') as f:
+            self.assertEqual(f.read(), b'%PDF-1.7 body')
+
+    def test_manifest_skips_verified_papers(self):
+        papers = [Paper(title="One", link_pdf="https://a.org/1.pdf", DOI="10.1/One"),
+                  Paper(title="Two", link_pdf="https://b.org/2.pdf")]
+        with patch('extractors.downloader.http_client.get', side_effect=pdf_response()) as mock_get:
+            self.download(papers)
+        self.assertEqual(mock_get.call_count, 2)
+
+        manifest = DownloadManifest(self.tmp)
+        record = manifest.lookup(Paper(title="Whatever", DOI="10.1/one"))
+        self.assertEqual(record['path'], 'One.pdf')
+        self.assertEqual(record['source'], 'Direct Link')
+        self.assertEqual(len(record['sha256']), 64)
+
+        # Second run: nothing is fetched, nothing is duplicated
+        again = [Paper(title="One", link_pdf="https://a.org/1.pdf", DOI="10.1/one"),
+                 Paper(title="Two", link_pdf="https://b.org/2.pdf")]
+        with patch('extractors.downloader.http_client.get', side_effect=pdf_response()) as mock_get:
+            self.download(again)
+        mock_get.assert_not_called()
+        self.assertTrue(all(p.downloaded for p in again))
+        self.assertEqual(self.pdfs(), ['One.pdf', 'Two.pdf'])
+
+        # A file that no longer matches the manifest is fetched again
+        os.remove(os.path.join(self.tmp, 'Two.pdf'))
+        with patch('extractors.downloader.http_client.get', side_effect=pdf_response()) as mock_get:
+            self.download([Paper(title="Two", link_pdf="https://b.org/2.pdf")])
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_refresh_refetches_in_place(self):
+        paper = Paper(title="One", link_pdf="https://a.org/1.pdf", DOI="10.1/one")
+        with patch('extractors.downloader.http_client.get', side_effect=pdf_response()):
+            self.download([paper])
+            self.download([paper], refresh=True)
+
+        self.assertEqual(self.pdfs(), ['One.pdf'])
+
+    def test_interrupted_stream_leaves_no_file(self):
+        broken = Mock(status_code=200, url="https://a.org/x.pdf", headers={})
+
+        def chunks(chunk_size):
+            yield b'%PDF-1.4'
+            raise requests.exceptions.ChunkedEncodingError("connection reset")
+
+        broken.iter_content.side_effect = chunks
+        paper = Paper(title="Broken", link_pdf="https://a.org/x.pdf")
+        with patch('extractors.downloader.http_client.get', return_value=broken):
+            self.download([paper])
+
+        self.assertFalse(paper.downloaded)
+        self.assertEqual(self.pdfs(), [])
+
+
+class TestPDFStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store = PDFStore(os.path.join(self.tmp, 'store'))
+        self.project_a = os.path.join(self.tmp, 'a')
+        self.project_b = os.path.join(self.tmp, 'b')
+        os.makedirs(self.project_a)
+        os.makedirs(self.project_b)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def download(self, papers, folder, **kwargs):
+        kwargs.setdefault('resolve_oa', False)
+        kwargs.setdefault('probe_links', False)
+        kwargs.setdefault('learn_order', False)
+        downloader.download_papers(papers, folder, None, scihub_mode='http', store=self.store, **kwargs)
+
+    def test_second_project_links_without_network(self):
+        with patch('extractors.downloader.http_client.get', side_effect=pdf_response()):
+            self.download([Paper(title="One", link_pdf="https://a.org/1.pdf", DOI="10.1/one")], self.project_a)
+
+        paper = Paper(title="One again", link_pdf="https://a.org/1.pdf", DOI="10.1/ONE")
+        with patch('extractors.downloader.http_client.get', side_effect=pdf_response()) as mock_get:
+            self.download([paper], self.project_b)
+        mock_get.assert_not_called()
+
+        self.assertTrue(paper.downloaded)
+        self.assertEqual(paper.download_source, "Direct Link")
+        first = os.path.join(self.project_a, 'One.pdf')
+        second = os.path.join(self.project_b, 'One again.pdf')
+        self.assertTrue(os.path.samefile(first, second))
+        self.assertEqual(DownloadManifest(self.project_b).lookup(paper)['path'], 'One again.pdf')
+
+    def test_deleted_file_restored_by_hash(self):
+        paper = Paper(title="Two", link_pdf="https://b.org/2.pdf")
+        with patch('extractors.downloader.http_client.get', side_effect=pdf_response()):
+            self.download([paper], self.project_a)
+        os.remove(os.path.join(self.project_a, 'Two.pdf'))
+
+        with patch('extractors.downloader.http_client.get', side_effect=pdf_response()) as mock_get:
+            self.download([Paper(title="Two", link_pdf="https://b.org/2.pdf")], self.project_a)
+        mock_get.assert_not_called()
+        with open(os.path.join(self.project_a, 'Two.pdf'), 'rb') as f:
+            self.assertEqual(f.read(), b'%PDF-1.4 https://b.org/2.pdf')
+
+    def test_identical_pdfs_share_one_blob(self):
+        papers = [Paper(title=f"Copy {i}", link_pdf="https://a.org/same.pdf", DOI=f"10.1/{i}") for i in range(2)]
+        with patch('extractors.downloader.http_client.get', side_effect=pdf_response()):
+            self.download(papers, self.project_a, workers=1)
+
+        blobs = [f for _, _, files in os.walk(os.path.join(self.store.root, 'objects')) for f in files]
+        self.assertEqual(len(blobs), 1)
+        self.assertTrue(os.path.samefile(os.path.join(self.project_a, 'Copy 0.pdf'),
+                                         os.path.join(self.project_a, 'Copy 1.pdf')))
+
+    def test_editing_a_linked_copy_leaves_blob_and_other_folders_alone(self):
+        source = os.path.join(self.tmp, 'x.pdf')
+        with open(source, 'wb') as f:
+            f.write(b'%PDF-1.4 x')
+        sha256 = self.store.add(source, ['doi:10.1/x'])
+        first = os.path.join(self.project_a, 'X.pdf')
+        second = os.path.join(self.project_b, 'X.pdf')
+        self.store.link(sha256, first)
+        self.store.link(sha256, second)
+
+        # The caller's own file is not the blob, and blobs are read-only
+        with open(source, 'ab') as f:
+            f.write(b' edited')
+        self.assertFalse(os.stat(self.store.blob_path(sha256)).st_mode & 0o222)
+        # Viewers save annotations to a new file renamed over the (read-only) original
+        tmp = first + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(b'%PDF-1.4 x annotated')
+        os.replace(tmp, first)
+
+        for path in (self.store.blob_path(sha256), second):
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), b'%PDF-1.4 x')
+        self.assertEqual(self.store.find(['doi:10.1/x'])[0], sha256)
+
+    def test_modified_blob_is_not_reused(self):
+        source = os.path.join(self.tmp, 'x.pdf')
+        with open(source, 'wb') as f:
+            f.write(b'%PDF-1.4 x')
+        sha256 = self.store.add(source, ['doi:10.1/x'])
+        blob = self.store.blob_path(sha256)
+        os.chmod(blob, 0o644)
+        with open(blob, 'ab') as f:
+            f.write(b' changed in place')
+
+        self.assertIsNone(self.store.find(['doi:10.1/x']))
+        with self.assertRaises(OSError):
+            self.store.link(sha256, os.path.join(self.project_a, 'X.pdf'))
+        # Adding the original again restores a good blob
+        self.assertEqual(self.store.add(source, ['doi:10.1/x']), sha256)
+        self.assertEqual(self.store.find(['doi:10.1/x'])[0], sha256)
+
+    def test_symlink_mode(self):
+        store = PDFStore(os.path.join(self.tmp, 'store'), link_mode='symlink')
+        source = os.path.join(self.tmp, 'x.pdf')
+        with open(source, 'wb') as f:
+            f.write(b'%PDF-1.4 x')
+        sha256 = store.add(source, ['doi:10.1/x'])
+        dest = os.path.join(self.project_a, 'X.pdf')
+
+        self.assertEqual(store.link(sha256, dest), 'symlink')
+        self.assertTrue(os.path.islink(dest))
+        self.assertEqual(store.find(['doi:10.1/x'])[0], sha256)
+        self.assertIsNone(store.find(['doi:10.1/other']))
+
+
+class TestMirrorFailureTracking(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.pool = MirrorPool(os.path.join(self.tmp, 'mirror_health.json'))
+        bypass = patch.object(SciHubClient, '_ddos_guard_bypass', return_value=False)
+        bypass.start()
+        self.addCleanup(bypass.stop)
+        self.client = SciHubClient(use_selenium=False, preferred_mirrors=["https://m1.org", "https://m2.org"],
+                                   mirror_pool=self.pool, cookie_path=os.path.join(self.tmp, 'cookies.txt'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_failing_mirror_moves_behind_working_one(self):
+        def fake_http(identifier, mirror_config, is_doi=True):
+            if mirror_config["url"] == "https://m1.org":
+                return None, None, 'timeout'
+            return b'%PDF', 'https://m2.org/x.pdf', None
+
+        with patch.object(self.client, '_download_via_http', side_effect=fake_http) as mock_http:
+            for i in range(SciHubClient.MAX_CONSECUTIVE_FAILURES + 2):
+                content, _, mirror = self.client.download(f"10.1/{i}")
+                self.assertEqual(mirror, "https://m2.org")
+
+        # After its first timeout the dead mirror no longer costs anything per paper
+        tried = [c.args[1]["url"] for c in mock_http.call_args_list]
+        self.assertEqual(tried.count("https://m1.org"), 1)
+        self.assertEqual(tried[:3], ["https://m1.org", "https://m2.org", "https://m2.org"])
+        self.assertFalse(self.client.all_mirrors_disabled())
+
+    def test_breaker_opens_after_consecutive_failures(self):
+        with patch.object(self.client, '_download_via_http', return_value=(None, None, 'timeout')):
+            for i in range(SciHubClient.MAX_CONSECUTIVE_FAILURES):
+                with self.assertRaises(Exception):
+                    self.client.download(f"10.1/{i}")
+
+        self.assertEqual(self.client.disabled_mirrors, {"https://m1.org", "https://m2.org"})
+        self.assertTrue(self.client.all_mirrors_disabled())
+
+    def test_not_available_does_not_count_as_failure(self):
+        with patch.object(self.client, '_download_via_http', return_value=(None, None, 'not_available')):
+            for i in range(SciHubClient.MAX_CONSECUTIVE_FAILURES + 1):
+                with self.assertRaises(Exception):
+                    self.client.download(f"10.1/{i}")
+
+        self.assertEqual(self.client.disabled_mirrors, set())
+
+
+class TestHedgedSciHub(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        pool = MirrorPool(os.path.join(self.tmp, 'mirror_health.json'))
+        bypass = patch.object(SciHubClient, '_ddos_guard_bypass', return_value=False)
+        bypass.start()
+        self.addCleanup(bypass.stop)
+        self.client = SciHubClient(use_selenium=False, preferred_mirrors=["https://slow.org", "https://fast.org"],
+                                   mirror_pool=pool, hedge=True, cookie_path=os.path.join(self.tmp, 'cookies.txt'))
+        self.client.HEDGE_DEFAULT_DELAY = 0.1
+        self.client.HEDGE_MIN_DELAY = 0.05
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_slow_primary_is_hedged(self):
+        slow_stream = Mock()
+
+        def fake_http(identifier, mirror_config, is_doi=True):
+            if mirror_config["url"] == "https://slow.org":
+                time.sleep(0.5)
+                return slow_stream, 'https://slow.org/x.pdf', None
+            return b'%PDF', 'https://fast.org/x.pdf', None
+
+        with patch.object(self.client, '_download_via_http', side_effect=fake_http):
+            start = time.monotonic()
+            content, _, mirror = self.client.download("10.1/x")
+            elapsed = time.monotonic() - start
+            time.sleep(0.6)
+
+        self.assertEqual(mirror, "https://fast.org")
+        self.assertLess(elapsed, 0.4)
+        # The losing request's PDF is closed once it arrives
+        slow_stream.close.assert_called_once()
+
+    def test_not_available_still_stops(self):
+        with patch.object(self.client, '_download_via_http', return_value=(None, None, 'not_available')) as mock_http:
+            with self.assertRaises(Exception) as ctx:
+                self.client.download("10.1/x")
+        self.assertIn("not available", str(ctx.exception))
+        self.assertEqual(mock_http.call_count, 1)
+
+    def test_failure_moves_on_without_waiting(self):
+        def fake_http(identifier, mirror_config, is_doi=True):
+            if mirror_config["url"] == "https://slow.org":
+                return None, None, 'http_error'
+            return b'%PDF', 'https://fast.org/x.pdf', None
+
+        self.client.HEDGE_DEFAULT_DELAY = 5.0
+        with patch.object(self.client, '_download_via_http', side_effect=fake_http):
+            start = time.monotonic()
+            _, _, mirror = self.client.download("10.1/x")
+        self.assertEqual(mirror, "https://fast.org")
+        self.assertLess(time.monotonic() - start, 1.0)
+
+
+class TestNegativeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmp, 'misses.json')
+        self.client = Mock()
+        self.client.download.side_effect = SciHubDownloadError("Paper not available in Sci-Hub database",
+                                                               reason='not_available')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def run_paper(self, retry_unavailable=False):
+        session = downloader.DownloadSession(self.tmp, None, self.client, negative_cache=NegativeCache(self.cache_path),
+                                             retry_unavailable=retry_unavailable)
+        log = []
+        result = downloader._download_paper(Paper(title="Missing", DOI="10.1/Missing"), session, log)
+        session.close()
+        return result, log, session
+
+    def test_known_miss_skipped_on_next_run(self):
+        self.run_paper()
+        self.assertEqual(self.client.download.call_count, 1)
+
+        (downloaded, error), log, session = self.run_paper()
+        self.assertEqual(self.client.download.call_count, 1)
+        self.assertFalse(downloaded)
+        self.assertEqual(error, "Not available in Sci-Hub (cached)")
+        self.assertEqual(session.known_misses, 1)
+        self.assertIn("not available as of", log[0])
+
+        self.run_paper(retry_unavailable=True)
+        self.assertEqual(self.client.download.call_count, 2)
+
+    def test_transient_failures_not_cached(self):
+        self.client.download.side_effect = SciHubDownloadError("Request timeout: 10.1/missing", reason='timeout')
+        self.run_paper()
+        self.run_paper()
+        self.assertEqual(self.client.download.call_count, 2)
+
+    def test_ttl_per_failure_class(self):
+        cache = NegativeCache(self.cache_path, ttls={'no_pdf_link': 60})
+        self.assertTrue(cache.record("10.1/a", 'no_pdf_link'))
+        self.assertFalse(cache.record("10.1/b", 'mixed'))
+        cache.entries['doi:10.1/a']['at'] -= 61
+        self.assertIsNone(cache.lookup("10.1/A"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Unit tests for the on-disk metadata response cache.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import zlib
+from unittest.mock import Mock, patch
+
+import requests
+
+from utils import http_cache, http_client
+from utils.http_cache import HttpCache, get_ttl, make_key
+
+
+def make_response(body=b'{"results": []}', status=200, url="https://api.openalex.org/works"):
+    response = requests.Response()
+    response.status_code = status
+    response.url = url
+    response.headers['Content-Type'] = 'application/json; charset=utf-8'
+    response._content = body
+    return response
+
+
+class TestHttpCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache = HttpCache(os.path.join(self.tmp, 'cache.sqlite3'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_key_is_normalized(self):
+        a = make_key('get', "https://API.openalex.org/works?b=2", {'a': 1, 'mailto': 'me@x.org'})
+        b = make_key('GET', "https://api.openalex.org/works", {'b': '2', 'a': '1', 'mailto': 'other@x.org'})
+        c = make_key('GET', "https://api.openalex.org/works", {'a': 1, 'b': 3})
+
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+        self.assertNotEqual(make_key('POST', "https://api.core.ac.uk/v3/search/works", json_body={'q': 'x'}),
+                            make_key('POST', "https://api.core.ac.uk/v3/search/works", json_body={'q': 'y'}))
+
+    def test_ttl_per_endpoint(self):
+        self.assertEqual(get_ttl("https://api.openalex.org/authors/A1"), 30 * http_cache.DAY)
+        self.assertEqual(get_ttl("https://api.openalex.org/works?search=x"), 7 * http_cache.DAY)
+        self.assertIsNone(get_ttl("https://sci-hub.se/10.1/x"))
+
+    def test_round_trip(self):
+        self.cache.set('k', make_response(b'{"doi": "10.1/x"}'), ttl=60)
+        cached = self.cache.get('k')
+
+        self.assertEqual(cached.status_code, 200)
+        self.assertEqual(cached.json(), {'doi': '10.1/x'})
+        self.assertEqual(cached.headers['content-type'], 'application/json; charset=utf-8')
+        self.assertTrue(cached.from_cache)
+
+    def test_expired_entries_are_dropped(self):
+        self.cache.set('k', make_response(), ttl=-1)
+        self.assertIsNone(self.cache.get('k'))
+
+    def test_lru_eviction_by_size(self):
+        self.cache.max_bytes = 2500
+        body = os.urandom(1000)  # incompressible
+        self.cache.set('old', make_response(body), ttl=60)
+        time.sleep(0.01)
+        self.cache.set('recent', make_response(body), ttl=60)
+        time.sleep(0.01)
+        self.cache.get('old')  # touching makes 'recent' the least recently used
+        time.sleep(0.01)
+        self.cache.set('new', make_response(body), ttl=60)
+
+        self.assertIsNotNone(self.cache.get('old'))
+        self.assertIsNone(self.cache.get('recent'))
+        self.assertIsNotNone(self.cache.get('new'))
+
+    def test_writes_do_not_scan_the_table(self):
+        statements = []
+        self.cache._connect().set_trace_callback(statements.append)
+        for i in range(20):
+            self.cache.set(f'k{i}', make_response(b'body'), ttl=60)
+        self.cache.set('k0', make_response(b'longer body'), ttl=60)
+
+        self.assertEqual(sum('SUM(size)' in s for s in statements), 1)
+        self.assertEqual(self.cache._total, 19 * len(zlib.compress(b'body')) + len(zlib.compress(b'longer body')))
+
+    def test_shared_between_instances(self):
+        self.cache.set('k', make_response(b'shared'), ttl=60)
+        other = HttpCache(self.cache.path)
+        self.assertEqual(other.get('k').content, b'shared')
+
+
+class TestHttpClientCaching(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        http_client.configure(cache=HttpCache(os.path.join(self.tmp, 'cache.sqlite3')))
+
+    def tearDown(self):
+        http_client.configure(cache=False)
+        http_client.close_all()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_second_request_served_from_cache(self):
+        session = http_client.get_session("https://api.openalex.org")
+        live = make_response(b'{"results": [1]}')
+        with patch.object(session, 'request', return_value=live) as mock_request, \
+                patch('utils.http_client.rate_limit.get_limiter', return_value=None):
+            first = http_client.get("https://api.openalex.org/works", params={'search': 'x', 'mailto': 'a'})
+            second = http_client.get("https://api.openalex.org/works", params={'search': 'x', 'mailto': 'b'})
+            http_client.get("https://api.openalex.org/works", params={'search': 'x'}, cache=False)
+
+        self.assertIs(first, live)
+        self.assertEqual(second.json(), {'results': [1]})
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_errors_and_uncached_hosts_are_not_stored(self):
+        session = http_client.get_session("https://api.openalex.org")
+        with patch.object(session, 'request', return_value=make_response(status=404)) as mock_request, \
+                patch('utils.http_client.rate_limit.get_limiter', return_value=None):
+            http_client.get("https://api.openalex.org/works/W1")
+            http_client.get("https://api.openalex.org/works/W1")
+
+        self.assertEqual(mock_request.call_count, 2)
+
+        other = http_client.get_session("https://sci-hub.se")
+        with patch.object(other, 'request', return_value=Mock(status_code=200)) as mock_request:
+            http_client.get("https://sci-hub.se/10.1/x")
+            http_client.get("https://sci-hub.se/10.1/x")
+
+        self.assertEqual(mock_request.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Unit tests for the shared HTTP client registry.
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from utils import http_client
+
+
+class TestHttpClient(unittest.TestCase):
+
+    def setUp(self):
+        http_client.configure(cache=False)
+
+    def tearDown(self):
+        http_client.close_all()
+
+    def test_one_session_per_host(self):
+        a = http_client.get_session("https://api.openalex.org/works")
+        b = http_client.get_session("https://api.openalex.org/authors?search=x")
+        c = http_client.get_session("https://api.crossref.org/works/10.1/x")
+
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+
+    def test_default_headers_and_pool_size(self):
+        session = http_client.get_session("https://api.openalex.org/works")
+
+        self.assertIn('gzip', session.headers['Accept-Encoding'])
+        self.assertIn('AcademicArchiver', session.headers['User-Agent'])
+        adapter = session.get_adapter("https://api.openalex.org/works")
+        self.assertEqual(adapter._pool_maxsize, http_client.HOST_POOL_MAXSIZE['api.openalex.org'])
+
+    def test_requests_go_through_host_session(self):
+        session = http_client.get_session("https://export.arxiv.org")
+        ok = Mock(status_code=200)
+        with patch.object(session, 'request', return_value=ok) as mock_request, \
+                patch('utils.http_client.rate_limit.get_limiter', return_value=None):
+            result = http_client.get("https://export.arxiv.org/api/query", params={'q': 1}, timeout=5)
+
+        self.assertIs(result, ok)
+        mock_request.assert_called_once_with('GET', "https://export.arxiv.org/api/query",
+                                             params={'q': 1}, timeout=5)
+
+    def test_private_session_keeps_own_headers(self):
+        session = http_client.create_session(headers={'User-Agent': 'Browser'})
+
+        self.assertEqual(session.headers['User-Agent'], 'Browser')
+        self.assertNotIn(session, http_client._sessions.values())
+
+    def test_other_hosts_keep_browser_user_agent(self):
+        session = http_client.get_session("https://scholar.google.com/scholar")
+
+        self.assertNotIn('AcademicArchiver', session.headers['User-Agent'])
+        self.assertIn('Mozilla', session.headers['User-Agent'])
+
+    @patch('utils.http_client.time.sleep')
+    @patch('utils.http_client.rate_limit.get_limiter', return_value=None)
+    def test_throttled_request_is_retried(self, _, mock_sleep):
+        session = http_client.get_session("https://api.crossref.org")
+        throttled = Mock(status_code=429, headers={'Retry-After': '2'})
+        ok = Mock(status_code=200)
+        with patch.object(session, 'request', side_effect=[throttled, ok]) as mock_request:
+            result = http_client.get("https://api.crossref.org/works")
+
+        self.assertIs(result, ok)
+        self.assertEqual(mock_request.call_count, 2)
+        mock_sleep.assert_called_once_with(2.0)
+
+    @patch('utils.http_client.time.sleep')
+    @patch('utils.http_client.rate_limit.get_limiter', return_value=None)
+    def test_gives_up_after_max_retries(self, _, mock_sleep):
+        session = http_client.get_session("https://api.crossref.org")
+        throttled = Mock(status_code=503, headers={})
+        with patch.object(session, 'request', return_value=throttled) as mock_request:
+            result = http_client.get("https://api.crossref.org/works", retries=2)
+
+        self.assertIs(result, throttled)
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual([c.args[0] for c in mock_sleep.call_args_list], [1, 2])
+
+    @patch('utils.http_client.time.sleep')
+    def test_bot_wall_is_not_retried(self, mock_sleep):
+        session = http_client.get_session("https://scholar.google.com")
+        blocked = Mock(status_code=503, headers={})
+        with patch.object(session, 'request', return_value=blocked) as mock_request:
+            result = http_client.get("https://scholar.google.com/scholar?q=x")
+
+        self.assertIs(result, blocked)
+        mock_request.assert_called_once()
+        mock_sleep.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -36,7 +36,8 @@ class TestSciHubIntegration(unittest.TestCase):
     def test_real_download(self):
         """Attempt to download a real paper."""
         try:
-            pdf_content, source_url, mirror_url = self.client.download(self.test_doi)
+            pdf_stream, source_url, mirror_url = self.client.download(self.test_doi)
+            pdf_content = b''.join(pdf_stream)
             self.assertTrue(pdf_content.startswith(b'%PDF'), "Downloaded content is not a PDF")
             self.assertTrue(len(pdf_content) > 1000, "Downloaded PDF is suspiciously small")
             print(f"Successfully downloaded {self.test_doi} from {mirror_url}")
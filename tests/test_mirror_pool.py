@@ -0,0 +1,87 @@
+"""
+Unit tests for the health-scored Sci-Hub mirror pool.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from extractors.mirror_pool import MirrorPool, OPEN, HALF_OPEN, CLOSED
+
+
+class TestMirrorPool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'mirror_health.json')
+        self.pool = MirrorPool(self.path, max_failures=2, base_cooldown=60)
+        self.urls = ["https://a.org", "https://b.org", "https://c.org"]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_untried_first_then_by_score(self):
+        self.pool.record("https://a.org", None, 3.0)
+        self.pool.record("https://b.org", None, 0.5)
+        self.assertEqual(self.pool.ordered(self.urls), ["https://c.org", "https://b.org", "https://a.org"])
+
+        # A fast mirror that fails half the time ranks behind a slower reliable one
+        self.pool.record("https://c.org", None, 1.0)
+        self.pool.record("https://b.org", 'cloudflare', 0.5)
+        self.pool.record("https://b.org", 'cloudflare', 0.5)
+        self.assertEqual(self.pool.ordered(self.urls)[0], "https://c.org")
+
+    def test_breaker_opens_and_half_open_probe(self):
+        self.assertFalse(self.pool.record("https://a.org", 'timeout', 15.0))
+        self.assertTrue(self.pool.record("https://a.org", 'timeout', 15.0))
+        self.assertTrue(self.pool.is_open("https://a.org"))
+        self.assertNotIn("https://a.org", self.pool.ordered(self.urls))
+
+        # Cooldown over: exactly one caller gets the probe, after the healthy mirrors
+        self.pool.mirrors["https://a.org"]['opened_at'] = time.time() - 61
+        self.assertEqual(self.pool.summary()["https://a.org"]['state'], HALF_OPEN)
+        self.assertEqual(self.pool.ordered(self.urls)[-1], "https://a.org")
+        self.assertNotIn("https://a.org", self.pool.ordered(self.urls))
+
+        # Failed probe re-opens with a longer cooldown
+        self.pool.record("https://a.org", 'timeout', 15.0)
+        self.assertEqual(self.pool.mirrors["https://a.org"]['state'], OPEN)
+        self.assertEqual(self.pool.mirrors["https://a.org"]['cooldown'], 120)
+
+        # Successful probe closes the breaker
+        self.pool.mirrors["https://a.org"]['opened_at'] = time.time() - 121
+        self.assertIn("https://a.org", self.pool.ordered(self.urls))
+        self.pool.record("https://a.org", None, 1.0)
+        self.assertEqual(self.pool.summary()["https://a.org"]['state'], CLOSED)
+
+    def test_in_flight_failures_after_trip_do_not_extend_cooldown(self):
+        self.pool.record("https://a.org", 'timeout', 15.0)
+        self.assertTrue(self.pool.record("https://a.org", 'timeout', 15.0))
+        # Requests of other workers that were already running fail after the trip
+        for _ in range(4):
+            self.pool.record("https://a.org", 'timeout', 15.0)
+        self.assertEqual(self.pool.mirrors["https://a.org"]['cooldown'], 60)
+
+        # Only the failed probe doubles it, once, even with stragglers around it
+        self.pool.mirrors["https://a.org"]['opened_at'] = time.time() - 61
+        self.assertIn("https://a.org", self.pool.ordered(self.urls))
+        for _ in range(3):
+            self.pool.record("https://a.org", 'timeout', 15.0)
+        self.assertEqual(self.pool.mirrors["https://a.org"]['cooldown'], 120)
+
+    def test_persists_between_runs(self):
+        self.pool.record("https://a.org", 'timeout', 15.0)
+        self.pool.record("https://a.org", 'timeout', 15.0)
+        self.pool.record("https://b.org", None, 0.4)
+        self.pool.save()
+
+        reloaded = MirrorPool(self.path, max_failures=2)
+        self.assertTrue(reloaded.is_open("https://a.org"))
+        self.assertEqual(reloaded.ordered(self.urls), ["https://c.org", "https://b.org"])
+        self.assertAlmostEqual(reloaded.summary()["https://a.org"]['timeout_rate'], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
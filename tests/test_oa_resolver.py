@@ -0,0 +1,157 @@
+"""
+Unit tests for the open-access resolver stage.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from extractors import downloader
+from extractors.oa_resolver import OAResolver, arxiv_pdf_url, ARXIV, OPENALEX, UNPAYWALL
+from models.paper import Paper
+
+
+def json_response(data, status=200):
+    return Mock(status_code=status, json=Mock(return_value=data))
+
+
+class FakeAPIs:
+    """Answers OpenAlex and Unpaywall requests from fixed tables and records the calls."""
+
+    def __init__(self, openalex=None, unpaywall=None):
+        self.openalex = openalex or []
+        self.unpaywall = unpaywall or {}
+        self.calls = []
+        self.timeouts = []
+
+    def __call__(self, url, params=None, timeout=None, **kwargs):
+        self.calls.append((url, params))
+        self.timeouts.append(timeout)
+        if url.startswith(OAResolver.OPENALEX_URL):
+            return json_response({'results': self.openalex})
+        doi = url[len(OAResolver.UNPAYWALL_URL):]
+        if doi in self.unpaywall:
+            return json_response({'best_oa_location': {'url_for_pdf': self.unpaywall[doi]}})
+        return json_response({}, status=404)
+
+
+class TestArxivPdfUrl(unittest.TestCase):
+
+    def test_from_id_and_doi(self):
+        paper = Paper(title="A")
+        paper.arxiv_id = "2101.00001"
+        self.assertEqual(arxiv_pdf_url(paper), "https://arxiv.org/pdf/2101.00001")
+        self.assertEqual(arxiv_pdf_url(Paper(title="B", DOI="10.48550/arXiv.1706.03762")),
+                         "https://arxiv.org/pdf/1706.03762")
+        self.assertIsNone(arxiv_pdf_url(Paper(title="C", DOI="10.1/c")))
+
+
+class TestOAResolver(unittest.TestCase):
+
+    def test_candidates_in_order(self):
+        apis = FakeAPIs(
+            openalex=[{'doi': 'https://doi.org/10.1/a', 'ids': {}, 'best_oa_location': {'pdf_url': 'https://oa.org/a.pdf'}},
+                      {'doi': None, 'ids': {'pmid': 'https://pubmed.ncbi.nlm.nih.gov/123'},
+                       'best_oa_location': {'pdf_url': 'https://oa.org/pm.pdf'}}],
+            unpaywall={'10.1/b': 'https://repo.org/b.pdf'})
+        a = Paper(title="A", DOI="10.1/A")
+        a.arxiv_id = "2101.00001"
+        b = Paper(title="B", DOI="10.1/b")
+        c = Paper(title="C")
+        c.pmid = "123"
+        d = Paper(title="D", DOI="10.1/d")
+
+        with patch('extractors.oa_resolver.http_client.get', side_effect=apis):
+            resolved = OAResolver().resolve([a, b, c, d])
+
+        self.assertEqual(resolved, 3)
+        self.assertEqual(a.oa_links, [(ARXIV, "https://arxiv.org/pdf/2101.00001"), (OPENALEX, "https://oa.org/a.pdf")])
+        self.assertEqual(b.oa_links, [(UNPAYWALL, "https://repo.org/b.pdf")])
+        self.assertEqual(c.oa_links, [(OPENALEX, "https://oa.org/pm.pdf")])
+        self.assertEqual(d.oa_links, [])
+        # Unpaywall is only asked for DOIs OpenAlex had no PDF for
+        unpaywall_calls = [url for url, _ in apis.calls if url.startswith(OAResolver.UNPAYWALL_URL)]
+        self.assertEqual(sorted(unpaywall_calls), [OAResolver.UNPAYWALL_URL + "10.1/b",
+                                                   OAResolver.UNPAYWALL_URL + "10.1/d"])
+
+    def test_openalex_batches(self):
+        apis = FakeAPIs()
+        papers = [Paper(title=str(i), DOI=f"10.1/{i}") for i in range(5)]
+        with patch('extractors.oa_resolver.http_client.get', side_effect=apis):
+            OAResolver(unpaywall=False, batch_size=2).resolve(papers)
+        self.assertEqual(len(apis.calls), 3)
+        self.assertTrue(apis.calls[0][1]['filter'].startswith('doi:https://doi.org/10.1/0|'))
+
+    def test_request_timeouts_capped_by_deadline(self):
+        apis = FakeAPIs()
+        with patch('extractors.oa_resolver.http_client.get', side_effect=apis):
+            OAResolver(timeout=15, deadline=3).resolve([Paper(title="A", DOI="10.1/a")])
+        self.assertEqual(len(apis.timeouts), 2)
+        self.assertTrue(all(1 <= t <= 3 for t in apis.timeouts))
+
+    def test_failures_leave_no_candidates(self):
+        with patch('extractors.oa_resolver.http_client.get', side_effect=ConnectionError("down")):
+            paper = Paper(title="A", DOI="10.1/a")
+            self.assertEqual(OAResolver().resolve([paper]), 0)
+        self.assertEqual(paper.oa_links, [])
+
+
+class TestOAFirstDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_oa_candidate_tried_before_scihub(self):
+        paper = Paper(title="Open", DOI="10.1/open")
+        paper.oa_links = [(UNPAYWALL, "https://repo.org/open.pdf")]
+        client = Mock()
+        session = downloader.DownloadSession(self.tmp, None, client)
+
+        response = Mock(status_code=200, url="https://repo.org/open.pdf", headers={})
+        response.iter_content.return_value = iter([b'%PDF-1.4 open'])
+        log = []
+        with patch('extractors.downloader.http_client.get', return_value=response):
+            downloaded, _ = downloader._download_paper(paper, session, log)
+        session.close()
+
+        self.assertTrue(downloaded)
+        client.download.assert_not_called()
+        self.assertEqual(paper.download_source, UNPAYWALL)
+        self.assertTrue(any(f.endswith('.pdf') for f in os.listdir(self.tmp)))
+
+    def test_oa_stage_stops_starting_candidates_after_timeout(self):
+        paper = Paper(title="Slow", DOI="10.1/slow")
+        paper.oa_links = [(OPENALEX, "https://slow.org/a.pdf"), (UNPAYWALL, "https://slow.org/b.pdf")]
+        session = downloader.DownloadSession(self.tmp, None, None)
+        session.fetch_direct = Mock(return_value=False)
+        log = []
+        with patch('extractors.downloader.time.monotonic', side_effect=[0, 0, 100]):
+            downloaded, _, outcome = downloader._attempt_open_access(paper, session, log)
+        session.close()
+
+        self.assertFalse(downloaded)
+        self.assertIsNone(outcome)
+        session.fetch_direct.assert_called_once()
+        self.assertIn("Gave up on 1 open-access candidates", log[-1])
+
+    def test_oa_requests_do_not_outlive_stage(self):
+        paper = Paper(title="Slow", DOI="10.1/slow")
+        paper.oa_links = [(OPENALEX, "https://slow.org/a.pdf"), (UNPAYWALL, "https://slow.org/b.pdf")]
+        session = downloader.DownloadSession(self.tmp, None, None)
+        session.fetch_direct = Mock(return_value=None)
+        stage = downloader.OA_STAGE_TIMEOUT
+        with patch('extractors.downloader.time.monotonic', side_effect=[0, 0, stage - 4]):
+            downloader._attempt_open_access(paper, session, [])
+        session.close()
+
+        timeouts = [c.kwargs['timeout'] for c in session.fetch_direct.call_args_list]
+        self.assertEqual(timeouts, [downloader.DIRECT_TIMEOUT, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Unit tests for OpenAlexClient batch DOI lookups.
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from analysis.openalex import OpenAlexClient
+
+
+def response(status=200, payload=None):
+    resp = Mock(status_code=status)
+    resp.json.return_value = payload or {}
+    return resp
+
+
+class TestGetWorksByDois(unittest.TestCase):
+
+    def setUp(self):
+        self.client = OpenAlexClient()
+
+    def test_batch_results_yielded(self):
+        batch = response(payload={'results': [{'doi': 'https://doi.org/10.1/a'}]})
+        with patch('analysis.openalex.http_client.get', return_value=batch) as mock_get:
+            works = list(self.client.get_works_by_dois(["10.1/a"]))
+
+        self.assertEqual(works, [{'doi': 'https://doi.org/10.1/a'}])
+        mock_get.assert_called_once()
+        self.assertEqual(self.client.unresolved_dois, [])
+
+    def test_exhausted_retries_fall_back_to_single_lookups(self):
+        def fake_get(url, params=None, timeout=None):
+            if 'filter' in params:
+                return response(429)  # http_client already retried the batch
+            if url.endswith('10.1/a'):
+                return response(payload={'doi': 'https://doi.org/10.1/a'})
+            if url.endswith('10.1/gone'):
+                return response(404)
+            return response(429)
+
+        with patch('analysis.openalex.http_client.get', side_effect=fake_get) as mock_get:
+            works = list(self.client.get_works_by_dois(["10.1/a", "10.1/gone", "10.1/b"]))
+
+        self.assertEqual(works, [{'doi': 'https://doi.org/10.1/a'}])
+        self.assertEqual(mock_get.call_count, 4)
+        # A 404 is a confirmed miss; only the still-throttled DOI is reported
+        self.assertEqual(self.client.unresolved_dois, ["10.1/b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Unit tests for OpenAlexSource cursor paging.
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from sources.base import SourceError
+from sources.openalex import OpenAlexSource
+
+
+def work(i):
+    return {'id': f'https://openalex.org/W{i}', 'doi': f'https://doi.org/10.1/{i}', 'title': f'Work {i}'}
+
+
+def page_response(start, count, next_cursor, status=200, headers=None):
+    resp = Mock()
+    resp.status_code = status
+    resp.headers = headers or {}
+    resp.json.return_value = {
+        'meta': {'next_cursor': next_cursor},
+        'results': [work(i) for i in range(start, start + count)]
+    }
+    return resp
+
+
+class TestOpenAlexPaging(unittest.TestCase):
+
+    def setUp(self):
+        self.source = OpenAlexSource()
+
+    @patch('sources.openalex.http_client.get')
+    def test_small_limit_uses_single_request(self, mock_get):
+        mock_get.return_value = page_response(0, 10, 'abc')
+        papers = self.source.search("query", 10)
+
+        self.assertEqual(len(papers), 10)
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertNotIn('cursor', mock_get.call_args.kwargs['params'])
+
+    @patch('sources.openalex.http_client.get')
+    def test_cursor_paging_follows_next_cursor(self, mock_get):
+        mock_get.side_effect = [
+            page_response(0, 200, 'c1'),
+            page_response(200, 200, 'c2'),
+            page_response(400, 50, None),
+        ]
+        pages = list(self.source.iter_pages("query", 1000))
+
+        self.assertEqual([len(p) for p in pages], [200, 200, 50])
+        cursors = [c.kwargs['params']['cursor'] for c in mock_get.call_args_list]
+        self.assertEqual(cursors, ['*', 'c1', 'c2'])
+
+    @patch('sources.openalex.http_client.get')
+    def test_max_results_cap(self, mock_get):
+        mock_get.side_effect = [
+            page_response(0, 200, 'c1'),
+            page_response(200, 50, 'c2'),
+        ]
+        papers = self.source.search("query", 250)
+
+        self.assertEqual(len(papers), 250)
+        self.assertEqual(mock_get.call_count, 2)
+        # The last page only asks for what is left under the cap
+        self.assertEqual(mock_get.call_args_list[1].kwargs['params']['per-page'], 50)
+
+    @patch('sources.openalex.http_client.get')
+    def test_failed_page_raises_after_delivered_pages(self, mock_get):
+        mock_get.side_effect = [
+            page_response(0, 200, 'c1'),
+            page_response(0, 0, None, status=500),
+        ]
+        pages = []
+        with self.assertRaisesRegex(SourceError, "page 1 after 200 works"):
+            for page in self.source.iter_pages("query", 500):
+                pages.append(page)
+
+        self.assertEqual([len(p) for p in pages], [200])
+
+    @patch('sources.openalex.http_client.get')
+    def test_search_keeps_works_fetched_before_failure(self, mock_get):
+        mock_get.side_effect = [
+            page_response(0, 200, 'c1'),
+            page_response(0, 0, None, status=500),
+        ]
+        self.assertEqual(len(self.source.search("query", 500)), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
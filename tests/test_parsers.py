@@ -0,0 +1,64 @@
+"""
+Unit tests for the single-parse Sci-Hub page classifier.
+"""
+
+import os
+import unittest
+from unittest.mock import patch
+
+from extractors.parsers import (classify_scihub_page, getSchiHubPDF_xpath, is_scihub_paper_not_available,
+                                is_cloudflare_page, SciHubPage, SCIHUB_NOT_AVAILABLE, SCIHUB_CLOUDFLARE,
+                                SCIHUB_PDF_LINK, SCIHUB_UNKNOWN)
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), 'archive', 'scihub_pages')
+
+
+def saved_page(name):
+    with open(os.path.join(PAGES_DIR, name), 'rb') as f:
+        return f.read()
+
+
+class TestClassifySciHubPage(unittest.TestCase):
+
+    def test_saved_pages(self):
+        self.assertEqual(classify_scihub_page(saved_page('article_iframe.html')),
+                         SciHubPage(SCIHUB_PDF_LINK, '/downloads/2019-01-08/12/watson1953.pdf#navpanes=0&view=FitH'))
+        self.assertEqual(classify_scihub_page(saved_page('article_embed.html')).pdf_url,
+                         '//zero.sci-hub.se/4336/8d0b4b6f1de4e0f0a7e7a4b1d7c6f0b5/lecun2015.pdf#navpanes=0&view=FitH')
+        self.assertEqual(classify_scihub_page(saved_page('not_available.html')).kind, SCIHUB_NOT_AVAILABLE)
+        self.assertEqual(classify_scihub_page(saved_page('cloudflare.html')).kind, SCIHUB_CLOUDFLARE)
+        self.assertEqual(classify_scihub_page(saved_page('homepage.html')).kind, SCIHUB_UNKNOWN)
+
+    def test_agrees_with_three_step_analysis(self):
+        for name in sorted(os.listdir(PAGES_DIR)):
+            content = saved_page(name)
+            page = classify_scihub_page(content)
+            with self.subTest(page=name):
+                self.assertEqual(page.kind == SCIHUB_NOT_AVAILABLE, is_scihub_paper_not_available(content))
+                if page.kind not in (SCIHUB_NOT_AVAILABLE, SCIHUB_CLOUDFLARE):
+                    self.assertFalse(is_cloudflare_page(content))
+                    self.assertEqual(page.pdf_url, getSchiHubPDF_xpath(content))
+
+    def test_message_block_without_marker_bytes(self):
+        content = b'<html><block-rounded class="message">This paper is NOT YET AVAILABLE</block-rounded></html>'
+        self.assertEqual(classify_scihub_page(content).kind, SCIHUB_NOT_AVAILABLE)
+
+    def test_not_available_block_wins_over_cloudflare_markers(self):
+        content = (b'<html><title>Just a moment</title><block-rounded class="message">'
+                   b'This paper is NOT YET AVAILABLE</block-rounded></html>')
+        self.assertEqual(classify_scihub_page(content).kind, SCIHUB_NOT_AVAILABLE)
+
+    def test_pdf_body_is_not_parsed(self):
+        with patch('extractors.parsers.etree.HTML') as mock_parse:
+            page = classify_scihub_page(b'%PDF-1.7\n\x00\x01binary', 'https://m.org/10.1/a')
+        mock_parse.assert_not_called()
+        self.assertEqual(page, SciHubPage(SCIHUB_PDF_LINK, 'https://m.org/10.1/a', is_pdf=True))
+
+    def test_empty_and_garbage(self):
+        self.assertEqual(classify_scihub_page(b'').kind, SCIHUB_UNKNOWN)
+        self.assertEqual(classify_scihub_page(None).kind, SCIHUB_UNKNOWN)
+        self.assertEqual(classify_scihub_page(b'\x00\x00\x00').kind, SCIHUB_UNKNOWN)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+Unit tests for streamed and resumable PDF downloads.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import requests
+
+from extractors import pdf_stream
+from extractors.pdf_stream import PartialDownloads, open_resumable, write_atomic
+
+BODY = b'%PDF-1.5 ' + bytes(range(256)) * 4
+
+
+class FakeResponse:
+    """Streamed response serving body[start:], optionally dropping the connection after `fail_after` bytes."""
+
+    def __init__(self, body, status=200, start=0, headers=None, fail_after=None):
+        self.status_code = status
+        self.url = "https://mirror.example/x.pdf"
+        self.headers = dict(headers or {})
+        self.body = body[start:]
+        self.fail_after = fail_after
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        sent = 0
+        for i in range(0, len(self.body), 100):
+            chunk = self.body[i:i + 100]
+            if self.fail_after is not None and sent + len(chunk) > self.fail_after:
+                raise requests.exceptions.ChunkedEncodingError("connection reset")
+            sent += len(chunk)
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+class FakeServer:
+    """Answers GETs like a server with ETag and byte-range support."""
+
+    def __init__(self, fail_after=None, ranges=True, etag='"v1"'):
+        self.fail_after = list(fail_after or [])
+        self.ranges = ranges
+        self.etag = etag
+        self.requests = []
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        headers = headers or {}
+        self.requests.append(dict(headers))
+        fail = self.fail_after.pop(0) if self.fail_after else None
+        base = {'Accept-Ranges': 'bytes'} if self.ranges else {}
+        if self.etag:
+            base['ETag'] = self.etag
+        if 'Range' in headers and self.ranges and headers.get('If-Range') == self.etag:
+            start = int(headers['Range'].split('=')[1].rstrip('-'))
+            base['Content-Range'] = f'bytes {start}-{len(BODY) - 1}/{len(BODY)}'
+            return FakeResponse(BODY, 206, start, base, fail)
+        base['Content-Length'] = str(len(BODY))
+        return FakeResponse(BODY, 200, 0, base, fail)
+
+
+class TestResumableDownloads(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.partials = PartialDownloads(os.path.join(self.tmp, '.partial'))
+        self.dest = os.path.join(self.tmp, 'paper.pdf')
+        self.url = "https://mirror.example/x.pdf"
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def read_dest(self):
+        with open(self.dest, 'rb') as f:
+            return f.read()
+
+    def test_dropped_connection_resumes_with_range(self):
+        server = FakeServer(fail_after=[300])
+        download = open_resumable(server.get, self.url, self.partials)
+        write_atomic(self.dest, download)
+
+        self.assertEqual(self.read_dest(), BODY)
+        self.assertEqual(server.requests[1]['Range'], 'bytes=300-')
+        self.assertEqual(server.requests[1]['If-Range'], '"v1"')
+        self.assertEqual(os.listdir(self.partials.directory), [])
+
+    def test_partial_kept_and_resumed_in_next_run(self):
+        server = FakeServer(fail_after=[300, 100, 100, 100])
+        with self.assertRaises(requests.exceptions.RequestException):
+            write_atomic(self.dest, open_resumable(server.get, self.url, self.partials))
+
+        self.assertFalse(os.path.exists(self.dest))
+        self.assertEqual(self.partials.load(self.url)['bytes'], 600)
+
+        # Next run picks up where the last one stopped
+        server.requests.clear()
+        write_atomic(self.dest, open_resumable(server.get, self.url, self.partials))
+
+        self.assertEqual(self.read_dest(), BODY)
+        self.assertEqual(server.requests[0]['Range'], 'bytes=600-')
+
+    def test_changed_file_restarts_from_zero(self):
+        server = FakeServer(fail_after=[300, 100, 100, 100])
+        with self.assertRaises(requests.exceptions.RequestException):
+            write_atomic(self.dest, open_resumable(server.get, self.url, self.partials))
+
+        server.etag = '"v2"'  # If-Range no longer matches: server sends the full body
+        write_atomic(self.dest, open_resumable(server.get, self.url, self.partials))
+
+        self.assertEqual(self.read_dest(), BODY)
+
+    def test_no_validator_leaves_nothing_to_resume(self):
+        server = FakeServer(fail_after=[300], ranges=False, etag=None)
+        with self.assertRaises(requests.exceptions.RequestException):
+            write_atomic(self.dest, open_resumable(server.get, self.url, self.partials))
+
+        self.assertIsNone(self.partials.load(self.url))
+        self.assertEqual(os.listdir(self.partials.directory), [])
+
+    def test_non_pdf_is_rejected(self):
+        html = FakeResponse(b'<html>blocked</html>')
+        self.assertIsNone(open_resumable(lambda url, **kw: html, self.url, self.partials))
+        self.assertTrue(html.closed)
+
+    def test_short_body_is_not_accepted(self):
+        server = FakeServer()
+        with patch.object(pdf_stream, 'RESUME_RETRIES', 0):
+            download = open_resumable(server.get, self.url, self.partials)
+            download.meta['total'] = len(BODY) + 10
+            with self.assertRaises(requests.exceptions.RequestException):
+                write_atomic(self.dest, download)
+
+        self.assertFalse(os.path.exists(self.dest))
+
+
+if __name__ == '__main__':
+    unittest.main()
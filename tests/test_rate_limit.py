@@ -0,0 +1,77 @@
+"""
+Unit tests for the per-host token-bucket limiter.
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+
+from utils import rate_limit
+from utils.rate_limit import TokenBucket, parse_retry_after
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_threads_share_the_rate(self):
+        bucket = TokenBucket(rate=20)
+        stamps = []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(3):
+                bucket.acquire()
+                with lock:
+                    stamps.append(time.monotonic())
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # 12 requests at 20/s with a burst of 1: ~0.55 s, never faster
+        self.assertEqual(len(stamps), 12)
+        self.assertGreaterEqual(max(stamps) - start, 0.5)
+        self.assertLess(max(stamps) - start, 1.0)
+
+    def test_async_acquire(self):
+        bucket = TokenBucket(rate=20)
+
+        async def run():
+            start = time.monotonic()
+            await asyncio.gather(*(bucket.acquire_async() for _ in range(6)))
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(run())
+        self.assertGreaterEqual(elapsed, 0.24)
+        self.assertLess(elapsed, 0.6)
+
+    def test_pause_holds_callers(self):
+        bucket = TokenBucket(rate=100)
+        bucket.acquire()
+        bucket.pause(0.3)
+
+        start = time.monotonic()
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.28)
+
+
+class TestRateLimitHelpers(unittest.TestCase):
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("5"), 5.0)
+        self.assertEqual(parse_retry_after("100000"), rate_limit.MAX_RETRY_AFTER)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+    def test_known_hosts_have_limiters(self):
+        self.assertIsNotNone(rate_limit.get_limiter('api.openalex.org'))
+        self.assertAlmostEqual(rate_limit.get_limiter('export.arxiv.org').rate, 1 / 3)
+        self.assertIsNone(rate_limit.get_limiter('example.org'))
+
+
+if __name__ == '__main__':
+    unittest.main()
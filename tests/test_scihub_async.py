@@ -0,0 +1,130 @@
+"""
+Unit tests for the asyncio Sci-Hub client (client tests are skipped when httpx is not installed).
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from extractors import scihub_async
+from extractors.mirror_pool import MirrorPool
+from extractors.scihub import SciHubDownloadError, classify_mirror_page
+
+PAGE = b'<html><div id="article"><iframe src="/downloads/{}.pdf"></iframe></div></html>'
+NOT_AVAILABLE = b"<html><body>Alas, the following paper is not yet available in my database</body></html>"
+
+
+class TestClassifyMirrorPage(unittest.TestCase):
+    """The page classification shared by the sync and async clients."""
+
+    def test_error_taxonomy(self):
+        self.assertEqual(classify_mirror_page(504, b'', 'https://m.org/x'), (None, 'not_available', False))
+        self.assertEqual(classify_mirror_page(403, b'', 'https://m.org/x'), (None, 'http_error', False))
+        self.assertEqual(classify_mirror_page(200, NOT_AVAILABLE, 'https://m.org/x'), (None, 'not_available', False))
+        self.assertEqual(classify_mirror_page(200, b'<html></html>', 'https://m.org/x'), (None, 'no_pdf_link', False))
+
+    def test_relative_pdf_link_is_resolved(self):
+        result = classify_mirror_page(200, PAGE.replace(b'{}', b'a'), 'https://m.org/10.1/a')
+        self.assertEqual(result, ('https://m.org/downloads/a.pdf', None, False))
+
+    def test_pdf_body_is_flagged(self):
+        self.assertEqual(classify_mirror_page(200, b'%PDF-1.4 body', 'https://m.org/10.1/a'),
+                         ('https://m.org/10.1/a', None, True))
+
+
+class TestDownloadAll(unittest.TestCase):
+    """The pipeline only needs a client with download_to, so it runs without httpx."""
+
+    def test_unexpected_error_stays_with_its_job(self):
+        class FakeClient:
+            async def download_to(self, identifier, file_name, is_doi):
+                if identifier == 'bad':
+                    raise OSError("disk full")
+                if identifier == 'missing':
+                    raise SciHubDownloadError("gone", reason='not_available')
+                return 'https://m.org'
+
+        results = asyncio.run(scihub_async.download_all(
+            FakeClient(), [('ok', 'a.pdf'), ('bad', 'b.pdf'), ('missing', 'c.pdf')]))
+
+        self.assertEqual(results[0], 'https://m.org')
+        self.assertIsInstance(results[1], SciHubDownloadError)
+        self.assertEqual(results[1].reason, 'error')
+        self.assertIsInstance(results[1].__cause__, OSError)
+        self.assertEqual(results[2].reason, 'not_available')
+
+
+@unittest.skipIf(scihub_async.httpx is not None, "httpx is installed")
+class TestWithoutHttpx(unittest.TestCase):
+
+    def test_clear_import_error(self):
+        with self.assertRaises(ImportError) as ctx:
+            scihub_async.AsyncSciHubClient(preferred_mirrors=["https://m.org"])
+        self.assertIn("httpx", str(ctx.exception))
+
+
+@unittest.skipIf(scihub_async.httpx is None, "httpx not installed")
+class TestAsyncSciHubClient(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.requests = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def handler(self, request):
+        httpx = scihub_async.httpx
+        self.requests.append(request)
+        path = request.url.path
+        if path.startswith('/downloads/'):
+            return httpx.Response(200, content=b'%PDF-1.4 ' + path.encode())
+        if request.url.host == 'dead.org':
+            raise httpx.ConnectTimeout("timed out", request=request)
+        if 'missing' in path:
+            return httpx.Response(200, content=NOT_AVAILABLE)
+        return httpx.Response(200, content=PAGE.replace(b'{}', path.strip('/').replace('/', '_').encode()))
+
+    def make_client(self, mirrors):
+        return scihub_async.AsyncSciHubClient(
+            preferred_mirrors=[{"url": url, "method": "GET"} for url in mirrors],
+            mirror_pool=MirrorPool(os.path.join(self.tmp, 'health.json')),
+            cookie_path=os.path.join(self.tmp, 'cookies.txt'),
+            transport=scihub_async.httpx.MockTransport(self.handler))
+
+    def run_async(self, coro):
+        return asyncio.run(coro)
+
+    def test_concurrent_downloads_to_files(self):
+        async def main():
+            async with self.make_client(["https://m.org"]) as client:
+                client._warmed.add("https://m.org")
+                jobs = [(f"10.1/{i}", os.path.join(self.tmp, f"{i}.pdf")) for i in range(5)]
+                jobs.append(("10.1/missing", os.path.join(self.tmp, "missing.pdf")))
+                return await scihub_async.download_all(client, jobs)
+
+        results = self.run_async(main())
+        self.assertEqual(results[:5], ["https://m.org"] * 5)
+        self.assertIsInstance(results[5], SciHubDownloadError)
+        self.assertEqual(results[5].reason, 'not_available')
+        with open(os.path.join(self.tmp, "3.pdf"), 'rb') as f:
+            self.assertTrue(f.read().startswith(b'%PDF'))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, "missing.pdf")))
+
+    def test_timeout_falls_back_to_next_mirror(self):
+        async def main():
+            async with self.make_client(["https://dead.org", "https://m.org"]) as client:
+                client._warmed.update({"https://dead.org", "https://m.org"})
+                pdf_stream, _, mirror = await client.download("10.1/x")
+                await pdf_stream.aclose()
+                return mirror, client.mirror_pool.summary()
+
+        mirror, summary = self.run_async(main())
+        self.assertEqual(mirror, "https://m.org")
+        self.assertEqual(summary["https://dead.org"]['timeout_rate'], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,9 +2,16 @@
 Unit tests for the hybrid Sci-Hub client.
 """
 
+import os
+import shutil
+import tempfile
+import time
 import unittest
+from http.cookiejar import Cookie
 from unittest.mock import Mock, patch, MagicMock
 import extractors.scihub as scihub_client
+from extractors.mirror_pool import MirrorPool
+from extractors.pdf_url_cache import PDFURLCache
 
 class TestSciHubClient(unittest.TestCase):
     """Test cases for SciHubClient class."""
@@ -48,19 +55,57 @@ class TestSciHubClient(unittest.TestCase):
         mock_pdf = Mock()
         mock_pdf.status_code = 200
         mock_pdf.headers = {'content-type': 'application/pdf'}
-        mock_pdf.content = b'%PDF-1.4\nTest PDF content'
+        mock_pdf.iter_content.return_value = iter([b'%PDF-1.4\n', b'Test PDF content'])
         mock_pdf.url = 'https://sci-hub.st/downloads/paper.pdf'
         
         mock_get.side_effect = [mock_html, mock_pdf]
 
-        # We also need to patch getSchiHubPDF_xpath because our mock HTML is simple
-        with patch('extractors.scihub.getSchiHubPDF_xpath', return_value='https://sci-hub.st/downloads/paper.pdf'):
-            pdf_content, source_url, error = self.client._download_via_http("10.1038/171737a0", self.mirror_config, is_doi=True)
+        pdf_content, source_url, error = self.client._download_via_http("10.1038/171737a0", self.mirror_config, is_doi=True)
         
         self.assertIsNotNone(pdf_content)
-        self.assertEqual(pdf_content, b'%PDF-1.4\nTest PDF content')
+        self.assertEqual(b''.join(pdf_content), b'%PDF-1.4\nTest PDF content')
         self.assertIsNone(error)
+        # The PDF is requested as a stream, not buffered
+        self.assertTrue(mock_get.call_args_list[1].kwargs['stream'])
+
+    @patch('extractors.scihub.requests.Session.get')
+    def test_download_via_http_rejects_non_pdf_early(self, mock_get):
+        """An HTML body behind the PDF link is dropped after the first chunk."""
+        mock_html = Mock(status_code=200, content=b'<html><embed id="pdf" src="/downloads/paper.pdf"></html>',
+                         url='https://sci-hub.st/10.1/x')
+        mock_page = Mock(status_code=200, url='https://sci-hub.st/downloads/paper.pdf')
+        mock_page.iter_content.return_value = iter([b'<html>captcha', b'never read'])
+        mock_get.side_effect = [mock_html, mock_page]
+
+        pdf_content, source_url, error = self.client._download_via_http("10.1/x", self.mirror_config)
+
+        self.assertIsNone(pdf_content)
+        self.assertEqual(error, 'invalid_pdf')
+        mock_page.close.assert_called_once()
     
+    @patch('extractors.scihub.requests.Session.get')
+    def test_pdf_answer_is_saved_without_second_request(self, mock_get):
+        """A mirror that answers with the PDF itself is not asked for it again."""
+        mock_get.return_value = Mock(status_code=200, content=b'%PDF-1.4\nbody', url='https://sci-hub.st/10.1/x')
+
+        pdf_content, source_url, error = self.client._download_via_http("10.1/x", self.mirror_config)
+
+        self.assertEqual(b''.join(pdf_content), b'%PDF-1.4\nbody')
+        self.assertEqual(source_url, 'https://sci-hub.st/10.1/x')
+        self.assertIsNone(error)
+        mock_get.assert_called_once()
+
+    @patch('extractors.scihub.requests.Session.get')
+    @patch('extractors.scihub.requests.Session.post')
+    def test_pdf_answer_to_post_mirror(self, mock_post, mock_get):
+        mock_post.return_value = Mock(status_code=200, content=b'%PDF-1.4\nbody', url='https://sci-hub.st/')
+
+        pdf_content, _, error = self.client._download_via_http("10.1/x", {"url": "https://sci-hub.st", "method": "POST"})
+
+        self.assertEqual(b''.join(pdf_content), b'%PDF-1.4\nbody')
+        self.assertIsNone(error)
+        mock_get.assert_not_called()
+
     @patch('extractors.scihub.requests.Session.get')
     def test_download_via_http_error_page(self, mock_get):
         """Test HTTP download with error page."""
@@ -89,5 +134,129 @@ class TestSciHubClient(unittest.TestCase):
         # Mock doesn't strictly reset attribute, but we check call
         mock_driver.quit.assert_called_once()
 
+def guard_cookie(domain, expires=None):
+    return Cookie(0, '__ddg1_', 'token', None, False, domain, False, False, '/', True,
+                  False, expires, expires is None, None, None, {})
+
+
+class TestGuardCookies(unittest.TestCase):
+    """DDOS-Guard bypass runs lazily per mirror and its cookies persist between runs."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cookie_path = os.path.join(self.tmp, 'cookies.txt')
+        self.mirrors = ["https://m1.org", "https://m2.org"]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def make_client(self):
+        return scihub_client.SciHubClient(use_selenium=False, preferred_mirrors=self.mirrors,
+                                          cookie_path=self.cookie_path,
+                                          mirror_pool=MirrorPool(os.path.join(self.tmp, 'health.json')))
+
+    def test_no_requests_at_construction(self):
+        with patch('extractors.scihub.requests.Session.get') as mock_get:
+            self.make_client()
+        mock_get.assert_not_called()
+
+    def test_bypass_once_per_mirror_and_cookies_reused(self):
+        client = self.make_client()
+
+        def bypass(url):
+            client.session.cookies.set_cookie(guard_cookie(url.split('//')[1]))
+            return True
+
+        with patch.object(client, '_ddos_guard_bypass', side_effect=bypass) as mock_bypass, \
+                patch.object(client, '_download_via_http', return_value=(None, None, 'not_available')):
+            for doi in ("10.1/a", "10.1/b", "10.1/c", "10.1/d"):
+                with self.assertRaises(scihub_client.SciHubDownloadError):
+                    client.download(doi)
+        self.assertEqual(sorted(c.args[0] for c in mock_bypass.call_args_list), self.mirrors)
+        client.close()
+
+        # Next run: the saved cookies (no expiry of their own, so COOKIE_TTL applies) are still valid
+        client = self.make_client()
+        with patch.object(client, '_ddos_guard_bypass') as mock_bypass:
+            client._ensure_warm("https://m1.org")
+            client._ensure_warm("https://m2.org")
+            client._ensure_warm("https://m3.org")
+        mock_bypass.assert_called_once_with("https://m3.org")
+
+    def test_expired_cookies_are_not_loaded(self):
+        client = self.make_client()
+        client.session.cookies.set_cookie(guard_cookie('m1.org', expires=int(time.time()) - 10))
+        client._save_cookies()
+        self.assertFalse(self.make_client()._has_cookies("https://m1.org"))
+
+    def test_background_warm_up_fills_jar(self):
+        def bypass(client, url):
+            client.session.cookies.set_cookie(guard_cookie(url.split('//')[1]))
+            return True
+
+        with patch.object(scihub_client.SciHubClient, '_ddos_guard_bypass', autospec=True, side_effect=bypass):
+            scihub_client.start_warm_up(self.mirrors, cookie_path=self.cookie_path).join(5)
+
+        client = self.make_client()
+        self.assertTrue(client._has_cookies("https://m1.org"))
+        self.assertTrue(client._has_cookies("https://m2.org"))
+
+
+class TestPDFURLCache(unittest.TestCase):
+    """Papers fetched before go straight to their PDF URL; stale URLs fall back to the mirror page."""
+
+    PAGE = b'<html><div id="article"><iframe src="/downloads/a.pdf"></iframe></div></html>'
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmp, 'pdf_urls.json')
+        self.requested = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def make_client(self):
+        client = scihub_client.SciHubClient(use_selenium=False,
+                                            preferred_mirrors=[{"url": "https://m1.org", "method": "GET"}],
+                                            cookie_path=os.path.join(self.tmp, 'cookies.txt'),
+                                            mirror_pool=MirrorPool(os.path.join(self.tmp, 'health.json')),
+                                            url_cache=PDFURLCache(self.cache_path))
+        client._warmed.add("https://m1.org")
+        return client
+
+    def fake_get(self, url, **kwargs):
+        self.requested.append(url)
+        if url.endswith('.pdf'):
+            response = Mock(status_code=200, url=url, headers={})
+            response.iter_content.return_value = iter([b'%PDF-1.4 a' if url.endswith('/a.pdf') else b'<html>gone</html>'])
+            return response
+        return Mock(status_code=200, content=self.PAGE, url=url)
+
+    def download(self):
+        client = self.make_client()
+        with patch.object(client.session, 'get', side_effect=self.fake_get):
+            pdf_stream, _, mirror_url = client.download("10.1/A")
+            self.assertEqual(b''.join(pdf_stream), b'%PDF-1.4 a')
+        client.close()
+        return mirror_url
+
+    def test_repeat_download_skips_mirror_page(self):
+        self.assertEqual(self.download(), "https://m1.org")
+        self.assertEqual(self.requested, ["https://m1.org/10.1/A", "https://m1.org/downloads/a.pdf"])
+
+        self.requested = []
+        self.assertEqual(self.download(), "https://m1.org")
+        self.assertEqual(self.requested, ["https://m1.org/downloads/a.pdf"])
+
+    def test_stale_url_falls_back_to_mirror_page(self):
+        cache = PDFURLCache(self.cache_path)
+        cache.record("10.1/a", "https://m1.org", "https://m1.org/downloads/old.pdf")
+        cache.save()
+        self.download()
+        self.assertEqual(self.requested, ["https://m1.org/downloads/old.pdf", "https://m1.org/10.1/A",
+                                          "https://m1.org/downloads/a.pdf"])
+        self.assertEqual(PDFURLCache(self.cache_path).lookup("10.1/a")['pdf_url'], "https://m1.org/downloads/a.pdf")
+
+
 if __name__ == '__main__':
     unittest.main()
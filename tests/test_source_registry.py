@@ -0,0 +1,54 @@
+"""
+Unit tests for the lazy source registry.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from sources import registry
+
+
+class TestSourceRegistry(unittest.TestCase):
+
+    def test_creates_only_selected_sources(self):
+        sources = registry.create_sources(['arxiv', 'openalex', 'arxiv'])
+        self.assertEqual([s.name for s in sources], ['arxiv', 'openalex'])
+
+    def test_unknown_source_rejected(self):
+        with self.assertRaises(ValueError):
+            registry.create_sources(['arxiv', 'nope'])
+        with self.assertRaises(ValueError):
+            registry.parse_source_list('openalex, nope')
+        self.assertEqual(registry.parse_source_list('openalex, pubmed'), ['openalex', 'pubmed'])
+
+    def test_registered_names_match_source_tags(self):
+        for name in registry.available_sources():
+            self.assertEqual(registry.get_source_class(name).name, name)
+
+    def test_preset_sources(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'presets.json')
+            with open(path, 'w') as f:
+                json.dump({'cs': {'sources': ['arxiv', 'bogus', 'openalex']}, 'bare': {}}, f)
+
+            self.assertEqual(registry.preset_sources('cs', path), ['arxiv', 'openalex'])
+            self.assertIsNone(registry.preset_sources('bare', path))
+            self.assertIsNone(registry.preset_sources('cs', os.path.join(tmp, 'missing.json')))
+
+    def test_scholar_not_imported_unless_selected(self):
+        src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+        code = ("import sys; import core.cli; from core.aggregator import Aggregator; "
+                "Aggregator(sources=['openalex', 'arxiv']); "
+                "print('extractors.scholar' in sys.modules, 'undetected_chromedriver' in sys.modules, "
+                "'selenium' in sys.modules)")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                env=dict(os.environ, PYTHONPATH=src))
+        self.assertEqual(result.stdout.strip(), 'False False False', result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
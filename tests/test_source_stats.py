@@ -0,0 +1,160 @@
+"""
+Unit tests for per-source search statistics and budget scheduling.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from core.aggregator import Aggregator
+from core.source_stats import SourceStats, RUN, SKIP, RETRY, PROBE, DEPRIORITIZE, REPROBE_AFTER
+from models.paper import Paper
+from sources.base import BaseSource, SourceError
+
+
+class FlakySource(BaseSource):
+    """Fails the first `failures` calls, then returns its papers."""
+
+    def __init__(self, name, papers, failures=0):
+        self.name = name
+        self.papers = papers
+        self.failures = failures
+        self.calls = 0
+
+    def search(self, query, limit):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("flaky")
+        return self.papers
+
+
+class TruncatedSource(BaseSource):
+    """Delivers one page, then fails the harvest."""
+    name = 'truncated'
+
+    def search(self, query, limit):
+        return []
+
+    def iter_pages(self, query, limit):
+        yield [make_paper("Early", "10.1/early", self.name)]
+        raise SourceError("failed on page 1 after 1 works")
+
+
+def make_paper(title, doi, source):
+    p = Paper(title=title, DOI=doi)
+    p.sources.add(source)
+    return p
+
+
+class TestSourceStats(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'stats.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_record_and_persist(self):
+        stats = SourceStats(self.path)
+        stats.record('openalex', 'ok', 0.5, returned=10, unique=4)
+        stats.record('openalex', 'error', 1.5)
+        stats.save()
+
+        summary = SourceStats(self.path).summary()['openalex']
+        self.assertEqual(summary['runs'], 2)
+        self.assertEqual(summary['error_rate'], 0.5)
+        self.assertEqual(summary['mean_latency'], 1.0)
+        self.assertEqual(summary['mean_unique'], 2.0)
+
+    def test_plan(self):
+        stats = SourceStats(self.path)
+        for _ in range(3):
+            stats.record('fast', 'ok', 0.2, returned=10, unique=5)
+            stats.record('slow', 'ok', 60, returned=10, unique=5)
+            stats.record('costly', 'ok', 5, returned=10, unique=1)
+        stats.record('flaky', 'error', 1)
+        stats.record('flaky', 'ok', 1, returned=10, unique=5)
+        stats.record('flaky', 'ok', 1, returned=10, unique=5)
+
+        plan = stats.plan(['fast', 'slow', 'costly', 'flaky', 'new'], budget=30)
+
+        self.assertEqual(plan['fast'], (RUN, 30))
+        self.assertEqual(plan['slow'][0], SKIP)
+        self.assertEqual(plan['costly'][0], DEPRIORITIZE)
+        self.assertEqual(plan['flaky'], (RETRY, 30))
+        self.assertEqual(plan['new'], (RUN, 30))
+
+    def test_deadline_message_uses_scheduled_budget(self):
+        class SlowSource(FlakySource):
+            def search(self, query, limit):
+                time.sleep(1)
+                return []
+
+        agg = Aggregator(sources=[], stats=SourceStats(self.path), time_budget=30)
+        agg._rescue_missing_dois = lambda papers: None
+        agg.sources = [SlowSource('slow', [])]
+        agg.stats.plan = lambda names, budget: {'slow': (DEPRIORITIZE, 0.2)}
+        with self.assertLogs(level='WARNING') as logs:
+            agg.search_all("query")
+
+        self.assertTrue(any("missed its deadline (0.2s, scheduled as deprioritize)" in line for line in logs.output))
+
+    def test_truncated_harvest_recorded_as_error(self):
+        stats = SourceStats(self.path)
+        agg = Aggregator(sources=[], stats=stats)
+        agg._rescue_missing_dois = lambda papers: None
+        agg.sources = [TruncatedSource()]
+        results = agg.search_all("query")
+
+        self.assertIn("10.1/early", results)
+        self.assertEqual(agg.source_status, {'truncated': 'error'})
+        self.assertEqual(stats.sources['truncated']['errors'], 1)
+        self.assertEqual(stats.sources['truncated']['returned'], 1)
+
+    def test_skipped_source_is_probed_and_recovers(self):
+        stats = SourceStats(self.path)
+        for _ in range(3):
+            stats.record('down', 'error', 1)
+        self.assertEqual(stats.plan(['down'], budget=30)['down'], (SKIP, 0))
+
+        stats.sources['down']['last_run'] -= REPROBE_AFTER
+        self.assertEqual(stats.plan(['down'], budget=30)['down'], (PROBE, 30))
+
+        # One good probe brings the recent failure rate back under the skip threshold
+        stats.record('down', 'ok', 1, returned=10, unique=5)
+        self.assertNotEqual(stats.plan(['down'], budget=30)['down'][0], SKIP)
+
+    def test_aggregator_records_and_schedules(self):
+        stats = SourceStats(self.path)
+        agg = Aggregator(sources=[], stats=stats)
+        agg._rescue_missing_dois = lambda papers: None
+        agg.sources = [
+            FlakySource('a', [make_paper("Shared", "10.1/s", 'a'), make_paper("Only A", "10.1/a", 'a')]),
+            FlakySource('b', [make_paper("Shared", "10.1/s", 'b')]),
+        ]
+        agg.search_all("query")
+
+        self.assertEqual(stats.sources['a']['unique'], 1)
+        self.assertEqual(stats.sources['b']['unique'], 0)
+        self.assertEqual(stats.sources['a']['returned'], 2)
+        self.assertTrue(os.path.exists(self.path))
+
+        # With a budget, a retried source gets a second attempt and a skipped one never runs
+        agg.time_budget = 10
+        flaky = FlakySource('flaky', [make_paper("Flaky", "10.1/f", 'flaky')], failures=1)
+        dead = FlakySource('dead', [], failures=99)
+        agg.sources = [flaky, dead]
+        agg.stats.plan = lambda names, budget: {'flaky': (RETRY, budget), 'dead': (SKIP, 0)}
+        results = agg.search_all("query")
+
+        self.assertIn("10.1/f", results)
+        self.assertEqual(flaky.calls, 2)
+        self.assertEqual(dead.calls, 0)
+        self.assertEqual(agg.source_status, {'flaky': 'ok', 'dead': 'skipped'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Unit tests for learned download strategy ordering.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from extractors import downloader
+from extractors.scihub import SciHubDownloadError
+from extractors.strategy_stats import (StrategyStats, strategy_keys, STRATEGIES, SKIP_AFTER_FAILURES, EXPLORE_EVERY,
+                                       DIRECT, OPEN_ACCESS, SCHOLAR_PDF, SCIHUB_DOI, SCIHUB_LINK, SUCCESS,
+                                       NOT_AVAILABLE, INVALID_PDF)
+from models.paper import Paper
+
+
+def landing_page(url, headers=None, timeout=None, stream=False):
+    response = Mock(status_code=200, url=url, headers={})
+    response.iter_content.return_value = iter([b'<html>landing</html>'])
+    return response
+
+
+class TestStrategyStats(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'strategies.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_keys(self):
+        paper = Paper(title="A", DOI="10.1016/J.X.2020", link_pdf="https://WWW.Pub.com/a.pdf")
+        self.assertEqual(strategy_keys(paper), ['host:www.pub.com', 'prefix:10.1016'])
+
+    def test_default_order_without_numbers(self):
+        ordered, skipped = StrategyStats(self.path).order(['prefix:10.1'], list(STRATEGIES))
+        self.assertEqual(ordered, list(STRATEGIES))
+        self.assertEqual(skipped, {})
+
+    def test_fast_reliable_strategy_moves_first(self):
+        stats = StrategyStats(self.path)
+        keys = ['host:pub.com', 'prefix:10.1016']
+        for _ in range(4):
+            stats.record(keys, SCIHUB_DOI, SUCCESS, 1.0)
+            stats.record(keys, DIRECT, INVALID_PDF, 4.0)
+        stats.save()
+
+        ordered, _ = StrategyStats(self.path).order(keys, [DIRECT, SCHOLAR_PDF, SCIHUB_DOI])
+        self.assertEqual(ordered[0], SCIHUB_DOI)
+        self.assertEqual(ordered[-1], DIRECT)
+        # Another publisher keeps the default order
+        ordered, _ = StrategyStats(self.path).order(['prefix:10.1038'], [DIRECT, SCIHUB_DOI])
+        self.assertEqual(ordered, [DIRECT, SCIHUB_DOI])
+
+    def test_learned_failure_skipped(self):
+        stats = StrategyStats(self.path)
+        for _ in range(SKIP_AFTER_FAILURES):
+            stats.record(['host:pub.com'], DIRECT, INVALID_PDF, 0.5)
+        ordered, skipped = stats.order(['host:pub.com', 'prefix:10.1'], [DIRECT, OPEN_ACCESS, SCIHUB_LINK])
+        self.assertEqual(skipped, {DIRECT: 'host:pub.com'})
+        self.assertNotIn(DIRECT, ordered)
+
+        stats.keys['host:pub.com'][DIRECT]['last_attempt'] -= 8 * 24 * 3600
+        self.assertEqual(stats.order(['host:pub.com'], [DIRECT])[1], {})
+
+    def test_scihub_outcomes_not_charged_to_link_host(self):
+        stats = StrategyStats(self.path)
+        stats.record(['host:scholar.com', 'prefix:10.1'], SCIHUB_DOI, SUCCESS, 1.0)
+        stats.record(['host:scholar.com', 'prefix:10.1'], DIRECT, INVALID_PDF, 1.0)
+
+        self.assertEqual(set(stats.keys['host:scholar.com']), {DIRECT})
+        self.assertEqual(set(stats.keys['prefix:10.1']), {DIRECT, SCIHUB_DOI})
+
+    def test_skipped_strategy_is_explored_now_and_then(self):
+        stats = StrategyStats(self.path)
+        for _ in range(SKIP_AFTER_FAILURES):
+            stats.record(['prefix:10.1'], SCIHUB_DOI, INVALID_PDF, 0.5)
+        orders = [stats.order(['prefix:10.1'], [SCIHUB_DOI, DIRECT]) for _ in range(EXPLORE_EVERY)]
+
+        self.assertTrue(all(skipped == {SCIHUB_DOI: 'prefix:10.1'} for _, skipped in orders[:-1]))
+        # The exploration attempt runs after the strategies that work
+        self.assertEqual(orders[-1], ([DIRECT, SCIHUB_DOI], {}))
+
+
+class TestLearnedDownloadOrder(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.stats = StrategyStats(os.path.join(self.tmp, 'strategies.json'))
+        self.client = Mock()
+        self.client.download.return_value = (iter([b'%PDF-1.4 body']), "https://m.org/x.pdf", "https://m.org")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def run_paper(self, n, get=landing_page):
+        session = downloader.DownloadSession(self.tmp, None, self.client, strategy_stats=self.stats)
+        paper = Paper(title=f"Paper {n}", DOI=f"10.1016/{n}", link_pdf=f"https://pub.com/{n}")
+        log = []
+        with patch('extractors.downloader.http_client.get', side_effect=get) as mock_get:
+            downloaded, _ = downloader._download_paper(paper, session, log)
+        session.close()
+        return downloaded, log, mock_get.call_count
+
+    def test_landing_page_host_moves_behind_scihub(self):
+        downloaded, log, direct_calls = self.run_paper(0)
+        self.assertTrue(downloaded)
+        self.assertEqual(direct_calls, 1)
+        self.assertIn("Downloaded from Sci-Hub", log[-1])
+
+        # The direct link failed where Sci-Hub succeeded: later papers go to Sci-Hub first
+        downloaded, log, direct_calls = self.run_paper(1)
+        self.assertTrue(downloaded)
+        self.assertEqual(direct_calls, 0)
+        self.assertEqual(len(log), 1)
+
+    def test_transient_failures_not_recorded(self):
+        def server_error(url, headers=None, timeout=None, stream=False):
+            return Mock(status_code=503, url=url, headers={})
+
+        self.client.download.side_effect = SciHubDownloadError("timeout", reason='timeout')
+        downloaded, _, _ = self.run_paper(0, get=server_error)
+        self.client.download.side_effect = SciHubDownloadError("disabled", reason='mirrors_disabled')
+        self.run_paper(1, get=server_error)
+
+        self.assertFalse(downloaded)
+        self.assertEqual(self.stats.keys, {})
+
+        # A definitive miss is recorded
+        self.client.download.side_effect = SciHubDownloadError("missing", reason='not_available')
+        self.run_paper(2, get=server_error)
+        self.assertEqual(self.stats.keys['prefix:10.1016'][SCIHUB_DOI]['attempts'], 1)
+        self.assertNotIn(DIRECT, self.stats.keys['prefix:10.1016'])
+        self.assertNotIn(SCIHUB_DOI, self.stats.keys.get('host:pub.com', {}))
+
+    def test_not_available_misses_do_not_skip_scihub_for_prefix(self):
+        def server_error(url, headers=None, timeout=None, stream=False):
+            return Mock(status_code=503, url=url, headers={})
+
+        self.client.download.side_effect = SciHubDownloadError("missing", reason='not_available')
+        for n in range(SKIP_AFTER_FAILURES):
+            self.run_paper(n, get=server_error)
+        self.assertEqual(self.client.download.call_count, SKIP_AFTER_FAILURES)
+
+        downloaded, log, _ = self.run_paper(SKIP_AFTER_FAILURES, get=server_error)
+        self.assertEqual(self.client.download.call_count, SKIP_AFTER_FAILURES + 1)
+        self.assertFalse(any("Skipping" in line for line in log))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Unit tests for ranged-GET probing of direct PDF links.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from extractors import downloader
+from extractors import url_probe
+from extractors.url_probe import URLProber, classify_probe, host_pattern, PDF, LANDING_PAGE, PAYWALL, TOO_LARGE, BROKEN
+from models.paper import Paper
+
+
+def response(body, status=200, headers=None):
+    resp = Mock(status_code=status, url="https://example.org/x", headers=headers or {})
+    resp.iter_content.side_effect = lambda chunk_size=None: iter([body[:chunk_size], body[chunk_size:]])
+    return resp
+
+
+class FakeHosts:
+    """Serves fixed bodies per URL and records which requests were ranged."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def __call__(self, url, headers=None, timeout=None, stream=False):
+        ranged = 'Range' in (headers or {})
+        self.calls.append((url, ranged))
+        body, status = self.pages[url]
+        if ranged and status == 200:
+            return response(body[:url_probe.PROBE_BYTES], 206, {'Content-Range': f'bytes 0-1023/{len(body)}'})
+        return response(body, status)
+
+
+class TestClassifyProbe(unittest.TestCase):
+
+    def test_verdicts(self):
+        self.assertEqual(classify_probe(206, b'%PDF-1.5 ...', 5000), PDF)
+        self.assertEqual(classify_probe(200, b'%PDF-1.5 ...', 10 ** 9), TOO_LARGE)
+        self.assertEqual(classify_probe(200, b'<html><body>Article</body></html>'), LANDING_PAGE)
+        self.assertEqual(classify_probe(200, b'<html>Buy this article for $39.95</html>'), PAYWALL)
+        self.assertEqual(classify_probe(403, b''), PAYWALL)
+        self.assertEqual(classify_probe(404, b''), BROKEN)
+        self.assertEqual(classify_probe(502, b''), url_probe.UNREACHABLE)
+
+    def test_host_pattern(self):
+        self.assertEqual(host_pattern("https://WWW.Journal.org/doi/pdf/10.1/x"), "www.journal.org/doi")
+
+
+class TestURLProber(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'verdicts.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_verdicts_cached_across_runs(self):
+        hosts = FakeHosts({"https://a.org/1.pdf": (b'%PDF-1.4' + b'x' * 5000, 200),
+                           "https://b.org/article/1": (b'<html>landing</html>', 200)})
+        with patch('extractors.url_probe.http_client.get', side_effect=hosts):
+            prober = URLProber(self.path)
+            verdicts = prober.probe_all(list(hosts.pages))
+            prober.save()
+            self.assertEqual(verdicts, {"https://a.org/1.pdf": PDF, "https://b.org/article/1": LANDING_PAGE})
+            self.assertTrue(all(ranged for _, ranged in hosts.calls))
+
+            self.assertEqual(URLProber(self.path).probe("https://b.org/article/1"), LANDING_PAGE)
+        self.assertEqual(len(hosts.calls), 2)
+
+    def test_host_pattern_predicted(self):
+        pages = {f"https://pub.org/doi/{i}": (b'<html>landing</html>', 200) for i in range(url_probe.PATTERN_MIN_SAMPLES)}
+        hosts = FakeHosts(pages)
+        prober = URLProber(self.path)
+        with patch('extractors.url_probe.http_client.get', side_effect=hosts):
+            prober.probe_all(list(pages))
+            self.assertEqual(prober.probe("https://pub.org/doi/new"), LANDING_PAGE)
+        self.assertEqual(len(hosts.calls), url_probe.PATTERN_MIN_SAMPLES)
+
+    def test_unreachable_not_cached(self):
+        prober = URLProber(self.path)
+        with patch('extractors.url_probe.http_client.get', side_effect=ConnectionError("down")):
+            self.assertEqual(prober.probe("https://a.org/1.pdf"), url_probe.UNREACHABLE)
+        self.assertIsNone(prober.cached("https://a.org/1.pdf"))
+
+
+class TestProbedDownloads(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_only_confirmed_pdfs_downloaded(self):
+        hosts = FakeHosts({"https://a.org/1.pdf": (b'%PDF-1.4 one', 200),
+                           "https://b.org/landing": (b'<html>landing</html>', 200)})
+        papers = [Paper(title="One", link_pdf="https://a.org/1.pdf"),
+                  Paper(title="Two", link_pdf="https://b.org/landing")]
+        prober = URLProber(os.path.join(self.tmp, 'verdicts.json'))
+        with patch('extractors.url_probe.http_client.get', side_effect=hosts), \
+                patch('extractors.downloader.http_client.get', side_effect=hosts), \
+                patch('extractors.downloader.URLProber', return_value=prober):
+            downloader.download_papers(papers, self.tmp, None, scihub_mode='http', resolve_oa=False,
+                                     learn_order=False)
+
+        self.assertTrue(papers[0].downloaded)
+        self.assertFalse(papers[1].downloaded)
+        full_gets = [url for url, ranged in hosts.calls if not ranged]
+        self.assertEqual(full_gets, ["https://a.org/1.pdf"])
+
+
+if __name__ == '__main__':
+    unittest.main()